@@ -1,111 +1,101 @@
 import streamlit as st
 import sys
 import os
+import pandas as pd
+import polars as pl
+import matplotlib.pyplot as plt
+from matplotlib.colors import SymLogNorm
+import time
 
 # Add parent folder so Streamlit can import src modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # ---- IMPORT ANALYTICS MODULES ----
 from src.regime import classify_regime
-from src.predict import predict_short_term
-from src.process import (
-    load_all_trades,
-    compute_vwap,
-    compute_buy_sell_ratio,
-    compute_volatility,
-    build_price_series,
-)
-from src.process_depth import (
-    load_depth,
-    compute_orderbook_metrics,
-    build_imbalance_series,
+from src.predict import predict_short_term_confidence
+from src.process import PREDICT_FLOW_WINDOW, REGIME_FLOW_WINDOW
+from dashboards.cached import (
+    versions,
+    trade_analytics,
+    bar_series,
+    depth_analytics,
+    liquidity_heatmap,
+    liquidity_walls,
+    regime_probabilities,
 )
 
 # ---- AUTO-LAUNCH INGESTION ----
 from src.ingestion_launcher import start_ingestion
 
-
-# ---- AUTO-REFRESH ----
-try:
-    from streamlit_autorefresh import st_autorefresh
-    st_autorefresh(interval=1500)
-except:
-    st.warning("Install auto-refresh with: pip install streamlit-autorefresh")
-
-
-# ---- LAYOUT CONFIG ----
-st.set_page_config(page_title="Crypto Real-Time Dashboard", layout="wide")
-st.title("📈 Real-Time Crypto Market Dashboard")
-
-# Start ingestion on dashboard launch
-st.info("Starting ingestion processes in background (trades + depth)...")
-start_ingestion()
-
-
-st.caption("Dashboard auto-refreshes every 1.5 seconds.")
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PREDICTION_LOG = os.path.join(PROJECT_ROOT, "data", "prediction_log.csv")
+PREDICTION_HORIZON = 5  # seconds
 
 
 # =======================================================
 # TRADE ANALYTICS
 # =======================================================
-st.header("🔹 Trade Analytics (VWAP, Volatility, Flow)")
+def render_trades(trades, bars_df):
+    st.header("🔹 Trade Analytics (VWAP, Volatility, Flow)")
 
-trades_df = load_all_trades()
-
-if trades_df is None:
-    st.warning("⚠ No trade data yet — ingestion might still be starting.")
-else:
-    vwap = compute_vwap(trades_df)
-    buys, sells, ratio = compute_buy_sell_ratio(trades_df)
-    vol_1m = compute_volatility(trades_df, 60)
-    vol_5m = compute_volatility(trades_df, 300)
+    if trades is None:
+        st.warning("⚠ No trade data yet — ingestion might still be starting.")
+        return
 
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("VWAP", f"{vwap:,.2f}")
-    col2.metric("Buys", f"{buys}")
-    col3.metric("Sells", f"{sells}")
-    col4.metric("Buy/Sell Ratio", f"{ratio:.2f}")
+    col1.metric("VWAP", f"{trades['vwap']:,.2f}")
+    col2.metric("Buys", f"{trades['buys']}")
+    col3.metric("Sells", f"{trades['sells']}")
+    col4.metric("Buy/Sell Ratio", f"{trades['ratio']:.2f}")
 
     col5, col6 = st.columns(2)
-    col5.metric("Volatility (1m)", "N/A" if vol_1m is None else f"{vol_1m:.6f}")
-    col6.metric("Volatility (5m)", f"{vol_5m:.6f}")
+    col5.metric("Volatility (1m)", "N/A" if trades["vol_1m"] is None else f"{trades['vol_1m']:.6f}")
+    col6.metric("Volatility (5m)", "N/A" if trades["vol_5m"] is None else f"{trades['vol_5m']:.6f}")
+
+    st.subheader("🌊 Trade Flow (trailing windows)")
+    decimals = ["buy_volume", "sell_volume", "volume_ratio", "count_ratio", "flow_imbalance"]
+    st.dataframe(
+        pl.DataFrame([{"window": w, **m} for w, m in trades["flow"].items()]).select(
+            "window", "buy_volume", "sell_volume", "volume_ratio", "buys", "sells",
+            "count_ratio", "flow_imbalance",
+        ),
+        hide_index=True,
+        column_config={c: st.column_config.NumberColumn(format="%.3f") for c in decimals},
+    )
 
-    # Price sparkline
-    price_df = build_price_series(trades_df, 300)
+    # Chart frames are Polars; Streamlit takes them as Arrow (no pandas copy)
+    price_df = trades["price_df"]
     if price_df is not None:
         st.subheader("📉 Price (last 5 minutes)")
-        st.line_chart(price_df.set_index("ts")["price"])
+        st.line_chart(price_df, x="ts", y="price")
     else:
         st.info("Not enough recent trades to plot price series.")
 
+    if bars_df is not None:
+        st.subheader("🕯 Price & VWAP (last 24 hours, OHLCV bars)")
+        st.line_chart(bars_df, x="ts", y=["price", "vwap"])
+
 
 # =======================================================
 # ORDER BOOK ANALYTICS
 # =======================================================
-st.header("🔸 Order Book Analytics (Spread, Microprice, Imbalance)")
-
-depth_df = load_depth()
-if depth_df is None:
-    st.warning("⚠ No depth data yet — ingestion might still be starting.")
-else:
-    ob = compute_orderbook_metrics(depth_df)
+def render_order_book(depth, hm, walls):
+    st.header("🔸 Order Book Analytics (Spread, Microprice, Imbalance)")
 
-    bid = ob["bid_price"]
-    ask = ob["ask_price"]
-    spread = ob["spread"]
-    mid = ob["mid_price"]
-    micro = ob["microprice"]
-    imbalance = ob["orderbook_imbalance"]
+    if depth is None:
+        st.warning("⚠ No depth data yet — ingestion might still be starting.")
+        return
 
+    ob = depth["ob"]
     col1, col2, col3 = st.columns(3)
-    col1.metric("Best Bid", f"{bid:,.2f}")
-    col2.metric("Best Ask", f"{ask:,.2f}")
-    col3.metric("Spread", f"{spread:.4f}")
+    col1.metric("Best Bid", f"{ob['bid_price']:,.2f}")
+    col2.metric("Best Ask", f"{ob['ask_price']:,.2f}")
+    col3.metric("Spread", f"{ob['spread']:.4f}")
 
     col4, col5, col6 = st.columns(3)
-    col4.metric("Mid Price", f"{mid:,.2f}")
-    col5.metric("Microprice", f"{micro:,.2f}")
-    col6.metric("OB Imbalance", f"{imbalance:.3f}")
+    col4.metric("Mid Price", f"{ob['mid_price']:,.2f}")
+    col5.metric("Microprice", f"{ob['microprice']:,.2f}")
+    col6.metric("OB Imbalance", f"{ob['orderbook_imbalance']:.3f}")
 
     st.subheader("📊 Bid vs Ask Size (Top of Book)")
     st.bar_chart({
@@ -113,32 +103,149 @@ else:
         "Ask Size": [ob["ask_size"]],
     })
 
-    # Historical imbalance/spread
-    imb_df = build_imbalance_series(depth_df, 300)
+    imb_df = depth["imb_df"]
     if imb_df is not None:
         st.subheader("📈 Order Book Imbalance (last 5 minutes)")
-        st.line_chart(imb_df.set_index("ts")[["imbalance"]])
+        st.line_chart(imb_df, x="ts", y="imbalance")
 
         st.subheader("📉 Spread (last 5 minutes)")
-        st.line_chart(imb_df.set_index("ts")[["spread"]])
+        st.line_chart(imb_df, x="ts", y="spread")
     else:
         st.info("Not enough recent depth data for charts.")
 
+    # ---- LIQUIDITY HEATMAP (TIME × PRICE) ----
+    st.subheader("🌡 Liquidity Heatmap (last 10 minutes)")
+    if hm["bid"].size:
+        n_rows, n_cols = hm["bid"].shape
+        fig, ax = plt.subplots(figsize=(10, 4))
+        # bids positive (green), asks negative (red)
+        ax.imshow(
+            hm["bid"] - hm["ask"],
+            aspect="auto",
+            origin="lower",
+            cmap="RdYlGn",
+            norm=SymLogNorm(linthresh=0.01, vmin=-5, vmax=5),
+            extent=[-n_cols, 0, hm["prices"][0], hm["prices"][-1] + hm["price_bin"]],
+            interpolation="nearest",
+        )
+        ax.set_xlabel("seconds ago")
+        ax.set_ylabel("price")
+        st.pyplot(fig)
+        plt.close(fig)
+    else:
+        st.info("Liquidity heatmap builds up as new depth snapshots arrive.")
+
+    # ---- ORDER BOOK HEATMAP (TOP 5 LEVELS) ----
+    st.subheader("🔥 Order Book Heatmap (Top 5 Levels)")
+    heatmap_df = depth["heatmap_df"]
+    if heatmap_df is not None:
+        # normalization is precomputed in Polars; bars replace the pandas Styler
+        st.dataframe(
+            heatmap_df,
+            hide_index=True,
+            column_config={
+                "bid_size": st.column_config.NumberColumn(format="%.4f"),
+                "ask_size": st.column_config.NumberColumn(format="%.4f"),
+                "bid_norm": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0),
+                "ask_norm": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0),
+            },
+        )
+    else:
+        st.info("Heatmap unavailable – not enough depth data.")
+
+    with st.expander("ℹ How to read this Heatmap"):
+        st.write("""
+        ## 🔥 Order Book Heatmap — What You Are Seeing
+
+        Each row represents a **price level** in the order book.
+
+        ### 🟩 bid_size (Buyers waiting)
+        - These are people placing **limit BUY orders**
+        - The fuller the bid_norm bar → the **larger the buyer queue** at that price
+
+        ### 🟥 ask_size (Sellers waiting)
+        - These are people placing **limit SELL orders**
+        - Fuller ask_norm bar = **more sellers at that level**
+
+        ### 🟩 bid_norm / 🟥 ask_norm
+        Normalized liquidity strength (0 to 1), shown as bars.
+
+        ## 🧠 How traders interpret this
+        - **Big green block below price → support → price may bounce up.**
+        - **Big red block above price → resistance → price may stall or fall.**
+        - **If both sides are light → low liquidity → high chance of volatility.**
+
+        The **Liquidity Walls** panel below does this tracking for you across snapshots.
+        """)
+
+    # ---- LIQUIDITY WALLS & SPOOFING ----
+    st.subheader("🧱 Liquidity Walls & Pulled Orders")
+    counts = walls["counts"]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Persistent walls", counts["wall"])
+    col2.metric("Pulled walls", counts["pull"])
+    col3.metric("Fleeting orders", counts["fleeting"])
+    if walls["walls"] is not None:
+        st.write("**Walls standing now**")
+        st.dataframe(walls["walls"], hide_index=True)
+    if walls["events"].height:
+        st.write("**Recent events**")
+        st.dataframe(walls["events"], hide_index=True)
+    else:
+        st.info("No walls or pulled orders detected yet.")
+
+    with st.expander("ℹ How walls are detected"):
+        st.write("""
+        A level counts as **large** when it holds at least 10× the median level
+        size of the snapshot (and at least 1 BTC). Each large level is followed
+        from snapshot to snapshot:
+
+        - **Wall** – stays large for 10 seconds or more.
+        - **Pull** – the size disappears while the level is still in view and
+          price never reached it: liquidity that was shown, then removed.
+        - **Fleeting** – a pull within 1 second of appearing. Repeated flashes
+          like this are a classic **spoofing** pattern.
+
+        Levels that are traded through, or that drift out of the top 5, are not flagged.
+        """)
+
 
 # =======================================================
-# MARKET REGIME
+# MARKET REGIME + SHORT-TERM PREDICTION
 # =======================================================
-st.header("📊 Market Regime (Short-Term Microstructure Signal)")
-
-if trades_df is not None and depth_df is not None:
-    regime = classify_regime(
-        imbalance=imbalance,
-        microprice=micro,
-        mid_price=mid,
-        buy_sell_ratio=ratio,
-        vol_1m=vol_1m,
+def compute_signals(trades, depth, regime_model):
+    if trades is None or depth is None:
+        return None
+
+    ob = depth["ob"]
+    if regime_model is not None:
+        regime = regime_model["regime"]
+    else:
+        regime = classify_regime(
+            imbalance=ob["orderbook_imbalance"],
+            microprice=ob["microprice"],
+            mid_price=ob["mid_price"],
+            buy_sell_ratio=trades["flow"][REGIME_FLOW_WINDOW]["volume_ratio"],
+            vol_1m=trades["vol_1m"],
+        )
+    direction, confidence = predict_short_term_confidence(
+        microprice=ob["microprice"],
+        mid_price=ob["mid_price"],
+        imbalance=ob["orderbook_imbalance"],
+        buy_sell_ratio=trades["flow"][PREDICT_FLOW_WINDOW]["volume_ratio"],
+        spread=ob["spread"],
+        volatility_1m=trades["vol_1m"],
     )
+    return regime, direction, confidence
+
 
+def render_signals(signals, regime_model):
+    st.header("📊 Market Regime (Short-Term Microstructure Signal)")
+    if signals is None:
+        st.info("Regime and prediction require both trades and depth data.")
+        return
+
+    regime, direction, confidence = signals
     if "STRONGLY BULLISH" in regime:
         st.subheader(f"🟢 {regime}")
     elif "BULLISH" in regime:
@@ -149,82 +256,181 @@ if trades_df is not None and depth_df is not None:
         st.subheader(f"🟥 {regime}")
     else:
         st.subheader(f"⚪ {regime}")
-else:
-    st.info("Regime requires both trades and depth data.")
+
+    if regime_model is not None:
+        col1, col2 = st.columns([1, 2])
+        col1.caption("Regime probabilities (HMM forward filter)")
+        probs = regime_model["probabilities"]
+        col1.bar_chart(
+            pl.DataFrame({"regime": list(probs), "probability": list(probs.values())}),
+            x="regime", y="probability",
+        )
+        col2.caption("Probability history (last 5 minutes)")
+        col2.area_chart(regime_model["history"], x="ts", y=list(probs))
+    else:
+        st.caption("Rule-based regime — run `python src/regime.py` to fit the probabilistic model.")
+
+    st.header("🤖 Short-Term Price Prediction (5–10 seconds)")
+    if direction == "UP":
+        st.subheader(f"📈 **UP — {confidence:.1f}% confidence**")
+    elif direction == "DOWN":
+        st.subheader(f"📉 **DOWN — {confidence:.1f}% confidence**")
+    else:
+        st.subheader(f"➡️ **NEUTRAL — {confidence:.1f}% confidence**")
 
 
 # =======================================================
-# SHORT-TERM PRICE PREDICTION
+# PREDICTION ACCURACY TRACKING
 # =======================================================
-st.header("🤖 Short-Term Price Prediction (5–10 seconds)")
-
-if trades_df is not None and depth_df is not None:
-    prediction = predict_short_term(
-        microprice=micro,
-        mid_price=mid,
-        imbalance=imbalance,
-        buy_sell_ratio=ratio,
-        spread=spread,
-        volatility_1m=vol_1m,
-    )
-
-    if prediction == "UP":
-        st.subheader("📈 **UP — price may rise shortly**")
-    elif prediction == "DOWN":
-        st.subheader("📉 **DOWN — price may fall shortly**")
+def update_prediction_log(direction, trades):
+    """Append the current prediction and grade those whose horizon has passed."""
+    if not os.path.exists(PREDICTION_LOG):
+        pd.DataFrame(columns=[
+            "timestamp", "start_price", "prediction", "actual_price", "actual_dir", "is_correct"
+        ]).to_csv(PREDICTION_LOG, index=False)
+
+    log_df = pd.read_csv(PREDICTION_LOG)
+
+    # record at most one prediction per second
+    now = time.time()
+    last_log_time = log_df.iloc[-1]["timestamp"] if not log_df.empty else 0
+    if now - last_log_time > 1.0:
+        new_row_df = pd.DataFrame([{
+            "timestamp": now,
+            "start_price": trades["last_price"],
+            "prediction": direction,
+            "actual_price": None,
+            "actual_dir": None,
+            "is_correct": None,
+        }])
+        log_df = new_row_df if log_df.empty else pd.concat([log_df, new_row_df], ignore_index=True)
+
+    # grade with the first trade at/after T + horizon
+    recent = trades["recent"]
+    ts_sec = recent["trade_time"] / 1000.0
+    for idx, row in log_df[log_df["is_correct"].isna()].iterrows():
+        target_time = row["timestamp"] + PREDICTION_HORIZON
+        if now <= target_time:
+            continue
+
+        future = recent[ts_sec >= target_time]
+        if future.empty:
+            continue
+
+        end_price = future.iloc[0]["price"]
+        if end_price > row["start_price"]:
+            act_dir = "UP"
+        elif end_price < row["start_price"]:
+            act_dir = "DOWN"
+        else:
+            act_dir = "NEUTRAL"
+
+        log_df.at[idx, "actual_price"] = end_price
+        log_df.at[idx, "actual_dir"] = act_dir
+        log_df.at[idx, "is_correct"] = row["prediction"] == act_dir
+
+    log_df.to_csv(PREDICTION_LOG, index=False)
+    return log_df
+
+
+def render_accuracy(log_df):
+    st.header("📊 Prediction Accuracy (5s Horizon)")
+    if log_df is None:
+        st.info("Accuracy tracking starts once predictions are available.")
+        return
+
+    scored = log_df.dropna(subset=["is_correct"]).copy()
+    if len(scored) == 0:
+        st.info("Gathering data... wait 5 seconds for first verification.")
+        return
+
+    scored["is_correct"] = scored["is_correct"].astype(bool)
+    accuracy = scored["is_correct"].mean()
+
+    col1, col2 = st.columns(2)
+    col1.metric("Total Predictions", len(scored))
+    acc_str = f"{accuracy:.1%}"
+    if accuracy > 0.55:
+        col2.metric("Accuracy", acc_str, delta="High")
     else:
-        st.subheader("➡️ **NEUTRAL — no strong pressure right now**")
-else:
-    st.info("Prediction requires both trades and depth data.")
+        col2.metric("Accuracy", acc_str, delta="-Low", delta_color="inverse")
+
+    st.caption("Rolling Accuracy (Moving Average of last 10)")
+    scored["rolling_acc"] = scored["is_correct"].rolling(10).mean()
+    st.line_chart(scored.set_index("timestamp")["rolling_acc"])
+
+    with st.expander("See Prediction Log"):
+        st.dataframe(scored.tail(10).sort_values("timestamp", ascending=False))
 
 
 # =======================================================
-# HOW IT WORKS (CHILD-FRIENDLY)
+# HOW IT WORKS
 # =======================================================
-with st.expander("ℹ How this dashboard works"):
+def render_guide():
     st.write("""
     ## 👶 Imagine the market is a busy toy shop…
 
     Buyers and sellers are like kids trading toys.
     The price moves depending on who is more excited.
 
-    ---
-
     ## 🧸 What people *actually bought*
-    - **VWAP**: the real average price toys were sold for  
-    - **Buy/Sell Ratio**: are more kids buying or selling?  
+    - **VWAP**: the real average price toys were sold for
+    - **Buy/Sell Ratio**: are more kids buying or selling?
     - **Volatility**: is the shop calm or chaotic?
 
-    ---
-
     ## 🎒 What people *want* to buy or sell
-    - **Best Bid**: highest offer from a buyer  
-    - **Best Ask**: lowest offer from a seller  
-    - **Spread**: how far apart they are  
-    - **Imbalance**: which side has more kids waiting  
+    - **Best Bid**: highest offer from a buyer
+    - **Best Ask**: lowest offer from a seller
+    - **Spread**: how far apart they are
+    - **Imbalance**: which side has more kids waiting
     - **Microprice**: which direction the line is leaning
 
-    ---
-
     ## 🎯 Overall Market Mood
-    - Strongly Bullish → lots of excited buyers  
-    - Bullish → buyers slightly stronger  
-    - Neutral → balanced  
-    - Bearish → sellers stronger  
-    - Strongly Bearish → sellers dominating  
-
-    ---
+    Strongly Bullish → Bullish → Neutral → Bearish → Strongly Bearish
 
     ## 🤖 Prediction (next 5–10 seconds)
-    Using:
-    - buyer vs seller strength  
-    - price pressure  
-    - chaos level  
-    - order sizes  
-
-    The dashboard predicts:
-    - **📈 UP**,  
-    - **📉 DOWN**, or  
-    - **➡️ NEUTRAL**  
+    Uses buyer vs seller pressure, price leaning, liquidity imbalance and
+    the chaos level (volatility) to predict **📈 UP**, **📉 DOWN** or **➡️ NEUTRAL**.
     """)
 
+
+# =======================================================
+# PAGE
+# =======================================================
+st.set_page_config(page_title="Crypto Real-Time Dashboard", layout="wide")
+
+try:
+    from streamlit_autorefresh import st_autorefresh
+    st_autorefresh(interval=1500)
+except:
+    st.warning("Install auto-refresh with: pip install streamlit-autorefresh")
+
+st.title("📈 Real-Time Crypto Market Dashboard")
+
+start_ingestion()
+st.caption("Dashboard auto-refreshes every 1.5 seconds; analytics are recomputed only when new data lands.")
+
+# Heavy work happens inside the cached functions, once per data version
+v = versions()
+trades = trade_analytics(v["trades"])
+depth = depth_analytics(v["depth"])
+bars_df = bar_series(v["bars"])
+hm = liquidity_heatmap(v["depth"])
+walls = liquidity_walls(v["depth"])
+regime_model = regime_probabilities(v["trades"], v["depth"])
+signals = compute_signals(trades, depth, regime_model)
+log_df = update_prediction_log(signals[1], trades) if signals is not None else None
+
+tab_trades, tab_book, tab_signals, tab_accuracy, tab_guide = st.tabs(
+    ["🔹 Trades", "🔸 Order Book", "📊 Regime & Prediction", "🎯 Accuracy", "ℹ How it works"]
+)
+with tab_trades:
+    render_trades(trades, bars_df)
+with tab_book:
+    render_order_book(depth, hm, walls)
+with tab_signals:
+    render_signals(signals, regime_model)
+with tab_accuracy:
+    render_accuracy(log_df)
+with tab_guide:
+    render_guide()
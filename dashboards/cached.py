@@ -0,0 +1,146 @@
+import streamlit as st
+import sys
+import os
+import time
+import polars as pl
+
+# Add parent folder so Streamlit can import src modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bars import bar_prefix, pick_resolution
+from src.features import build_feature_tables
+from src.heatmap import refresh_liquidity_heatmap
+from src.process import (
+    FLOW_WINDOWS,
+    REGIME_FLOW_WINDOW,
+    load_all_trades,
+    compute_vwap,
+    compute_buy_sell_ratio,
+    compute_volatility,
+    compute_window_flow,
+    build_price_series,
+    build_bar_price_series,
+    get_recent_trades,
+)
+from src.process_depth import (
+    load_depth,
+    compute_orderbook_metrics,
+    build_imbalance_series,
+    build_orderbook_heatmap,
+)
+from src.regime import REGIMES, GaussianHMM, regime_observations, smooth_observations
+from src.store import dataset_version
+from src.walls import refresh_wall_detector
+
+# =======================================================
+# CACHED DATA LAYER
+# =======================================================
+# Every function takes the dataset's version token (file count + newest
+# file, see `dataset_version`) as its first argument, so Streamlit's cache
+# key changes exactly when new data lands: reruns, tabs and browser
+# sessions between two flushes share one computation. The TTL only
+# bounds staleness for time-windowed views when no new files arrive.
+CACHE_TTL = 30              # seconds
+BAR_WINDOW = 24 * 3600      # long-horizon chart span
+HEATMAP_WINDOW = 600        # liquidity heatmap span
+ACCURACY_WINDOW = 600       # trades kept for grading predictions
+REGIME_WINDOW = 300         # regime probability history span
+
+
+def versions() -> dict:
+    """Current version tokens (directory listings only — cheap per rerun)."""
+    return {
+        "trades": dataset_version("trades"),
+        "depth": dataset_version("depth"),
+        "bars": dataset_version(bar_prefix(pick_resolution(BAR_WINDOW))),
+    }
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=2, show_spinner=False)
+def trade_analytics(version):
+    """Trade metrics, price chart and recent trades (for prediction grading)."""
+    df = load_all_trades()
+    if df is None:
+        return None
+
+    buys, sells, ratio = compute_buy_sell_ratio(df)
+    return {
+        "vwap": float(compute_vwap(df)),
+        "buys": buys,
+        "sells": sells,
+        "ratio": float(ratio),
+        "vol_1m": compute_volatility(df, 60),
+        "vol_5m": compute_volatility(df, 300),
+        "last_price": float(df["price"][-1]),
+        "flow": compute_window_flow(df),
+        "price_df": build_price_series(df, 300),
+        "recent": get_recent_trades(df, ACCURACY_WINDOW).select(["trade_time", "price"]).to_pandas(),
+    }
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=2, show_spinner=False)
+def bar_series(version):
+    return build_bar_price_series(BAR_WINDOW)
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=2, show_spinner=False)
+def depth_analytics(version):
+    """Top-of-book metrics, imbalance/spread history and the level heatmap."""
+    df = load_depth()
+    if df is None:
+        return None
+
+    return {
+        "ob": compute_orderbook_metrics(df),
+        "imb_df": build_imbalance_series(df, 300),
+        "heatmap_df": build_orderbook_heatmap(df, levels=5),
+    }
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=2, show_spinner=False)
+def liquidity_heatmap(version):
+    # incremental underneath: only snapshots newer than the last call are read
+    return refresh_liquidity_heatmap(
+        window_seconds=HEATMAP_WINDOW, time_bucket_ms=1000, price_bin=0.5
+    )
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=2, show_spinner=False)
+def liquidity_walls(version):
+    # incremental underneath: only snapshots newer than the last call are read
+    state = refresh_wall_detector(warmup_seconds=HEATMAP_WINDOW)
+    events = pl.DataFrame(state["events"][::-1], schema={
+        "event": pl.String, "side": pl.String, "price": pl.Float64,
+        "size": pl.Float64, "age_ms": pl.Int64, "ts": pl.Int64,
+    })
+    return {
+        "walls": pl.DataFrame(state["walls"]) if state["walls"] else None,
+        "events": events.with_columns(pl.col("ts").cast(pl.Datetime("ms"))),
+        "counts": state["counts"],
+    }
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=2, show_spinner=False)
+def regime_probabilities(trades_version, depth_version):
+    """HMM regime probabilities per depth tick (None until `python src/regime.py` has fitted it)."""
+    model = GaussianHMM.load()
+    if not model.fitted:
+        return None
+
+    since_ms = int(time.time() * 1000) - REGIME_WINDOW * 1000
+    tables = build_feature_tables(since_ms, windows={REGIME_FLOW_WINDOW: FLOW_WINDOWS[REGIME_FLOW_WINDOW]})
+    if tables is None:
+        return None
+    times, raw = regime_observations(tables[1])
+    if len(times) == 0:
+        return None
+
+    probs = model.filter(smooth_observations(raw))
+    history = pl.DataFrame(probs, schema=list(REGIMES)).insert_column(
+        0, pl.Series("ts", times).cast(pl.Datetime("ms"))
+    )
+    return {
+        "regime": REGIMES[int(probs[-1].argmax())],
+        "probabilities": dict(zip(REGIMES, probs[-1].tolist())),
+        "history": history,
+    }
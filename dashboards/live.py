@@ -0,0 +1,127 @@
+import streamlit as st
+import sys
+import os
+
+# Add parent folder so Streamlit can import src modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Thin client: every number below comes precomputed from the metrics API
+# (`python src/api.py`), so extra viewers add no analytics or disk load.
+from src.api_client import API_URL, fetch, series_frame
+from src.ingestion_launcher import start_ingestion
+
+
+# ---- AUTO-REFRESH ----
+try:
+    from streamlit_autorefresh import st_autorefresh
+    st_autorefresh(interval=1500)
+except:
+    st.warning("Install auto-refresh with: pip install streamlit-autorefresh")
+
+
+# ---- LAYOUT CONFIG ----
+st.set_page_config(page_title="Crypto Real-Time Dashboard (API)", layout="wide")
+st.title("📈 Real-Time Crypto Market Dashboard")
+
+start_ingestion()  # also starts the API server
+snapshot = fetch("snapshot")
+
+if snapshot is None:
+    st.warning(f"⚠ Metrics API at {API_URL} is not ready yet — it starts with ingestion.")
+    st.stop()
+
+st.caption(f"Served by {API_URL} · auto-refreshes every 1.5 seconds.")
+
+
+# =======================================================
+# TRADE ANALYTICS
+# =======================================================
+st.header("🔹 Trade Analytics (VWAP, Volatility, Flow)")
+
+t = snapshot["trades"]
+if t is None:
+    st.warning("⚠ No trade data yet — ingestion might still be starting.")
+else:
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("VWAP", f"{t['vwap']:,.2f}")
+    col2.metric("Buys", f"{t['buys']}")
+    col3.metric("Sells", f"{t['sells']}")
+    col4.metric("Buy/Sell Ratio", f"{t['buy_sell_ratio']:.2f}")
+
+    col5, col6 = st.columns(2)
+    col5.metric("Volatility (1m)", "N/A" if t["vol_1m"] is None else f"{t['vol_1m']:.6f}")
+    col6.metric("Volatility (5m)", "N/A" if t["vol_5m"] is None else f"{t['vol_5m']:.6f}")
+
+    price_df = series_frame(snapshot["series"]["price"])
+    if price_df is not None:
+        st.subheader("📉 Price (last 5 minutes)")
+        st.line_chart(price_df["price"])
+
+    bar_df = series_frame(snapshot["series"]["bars"])
+    if bar_df is not None:
+        st.subheader("🕯 Price & VWAP (last 24 hours, OHLCV bars)")
+        st.line_chart(bar_df[["price", "vwap"]])
+
+
+# =======================================================
+# ORDER BOOK ANALYTICS
+# =======================================================
+st.header("🔸 Order Book Analytics (Spread, Microprice, Imbalance)")
+
+ob = snapshot["orderbook"]
+if ob is None:
+    st.warning("⚠ No depth data yet — ingestion might still be starting.")
+else:
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Best Bid", f"{ob['bid_price']:,.2f}")
+    col2.metric("Best Ask", f"{ob['ask_price']:,.2f}")
+    col3.metric("Spread", f"{ob['spread']:.4f}")
+
+    col4, col5, col6 = st.columns(3)
+    col4.metric("Mid Price", f"{ob['mid_price']:,.2f}")
+    col5.metric("Microprice", f"{ob['microprice']:,.2f}")
+    col6.metric("OB Imbalance", f"{ob['orderbook_imbalance']:.3f}")
+
+    imb_df = series_frame(snapshot["series"]["imbalance"])
+    if imb_df is not None:
+        st.subheader("📈 Order Book Imbalance (last 5 minutes)")
+        st.line_chart(imb_df[["imbalance"]])
+
+        st.subheader("📉 Spread (last 5 minutes)")
+        st.line_chart(imb_df[["spread"]])
+
+
+# =======================================================
+# MARKET REGIME + SHORT-TERM PREDICTION
+# =======================================================
+st.header("📊 Market Regime (Short-Term Microstructure Signal)")
+if snapshot["regime"] is None:
+    st.info("Regime requires both trades and depth data.")
+else:
+    st.subheader(snapshot["regime"])
+    if snapshot["regime_probabilities"] is not None:
+        st.bar_chart({"probability": snapshot["regime_probabilities"]})
+
+st.header("🤖 Short-Term Price Prediction (5–10 seconds)")
+pred = snapshot["prediction"]
+if pred is not None:
+    icon = {"UP": "📈", "DOWN": "📉"}.get(pred["direction"], "➡️")
+    st.subheader(f"{icon} **{pred['direction']} — {pred['confidence']:.1f}% confidence**")
+
+# =======================================================
+# CROSS-SYMBOL CORRELATION
+# =======================================================
+corr = snapshot.get("correlation")
+if corr is not None and len(corr["symbols"]) > 1:
+    st.header("🔗 Cross-Symbol Correlation (1s returns)")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Correlation")
+        st.dataframe({"symbol": corr["symbols"],
+                      **{s: [row[j] for row in corr["correlation"]] for j, s in enumerate(corr["symbols"])}},
+                     hide_index=True)
+    with col2:
+        st.subheader("Lead-lag (s, column leads row)")
+        st.dataframe({"symbol": corr["symbols"],
+                      **{s: [row[j] for row in corr["lead_lag"]] for j, s in enumerate(corr["symbols"])}},
+                     hide_index=True)
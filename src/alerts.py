@@ -0,0 +1,461 @@
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+# Allow `python src/alerts.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ============================================================
+#                 RULE SETTINGS
+# ============================================================
+# Rules are declared in YAML (or JSON) and compiled per symbol into
+# vectorized groups: every rule of one kind on one (symbol, metric) keeps
+# its parameters and state in NumPy arrays, so a metric update evaluates
+# all of them with a handful of array operations. Per-update cost is
+# bounded by the number of groups touched, not the number of rules.
+#
+#   kind       fires when                               extra keys
+#   threshold  value op threshold held for `for` s      op (>, >=, <, <=), clear
+#   spike      value / EWMA baseline >= threshold       halflife (s), clear
+#   flip       value crosses from >= +t to <= -t        (or back)
+#   stale      no update of `feed` for threshold s      feed
+#
+# Common keys: name, symbol ("*" = every symbol), metric, threshold,
+# cooldown (s, min gap between notifications), severity, sinks.
+# `clear` is the hysteresis level that resolves an active alert
+# (default: the threshold itself).
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALERT_RULES = os.environ.get("ALERT_RULES", os.path.join(PROJECT_ROOT, "alerts.yaml"))
+ALERT_LOG = os.path.join(PROJECT_ROOT, "data", "alerts.jsonl")
+
+KINDS = ("threshold", "spike", "flip", "stale")
+DEFAULT_COOLDOWN = 60       # seconds
+RECENT_ALERTS = 100         # events kept in memory for the API
+
+
+# ============================================================
+#                 VECTORIZED RULE GROUPS
+# ============================================================
+class _Group:
+    """Rules of one kind on one (symbol, metric); parameters and state as arrays."""
+
+    def __init__(self, rules: list):
+        n = len(rules)
+        self.rules = rules
+        self.threshold = np.array([r["threshold"] for r in rules], dtype=np.float64)
+        self.clear = np.array([r.get("clear", r["threshold"]) for r in rules], dtype=np.float64)
+        self.cooldown_ms = np.array([r.get("cooldown", DEFAULT_COOLDOWN) * 1000 for r in rules])
+        self.last_notified = np.full(n, np.iinfo(np.int64).min // 2, dtype=np.int64)
+        self.active = np.zeros(n, dtype=bool)
+        self.notified = np.zeros(n, dtype=bool)   # active alert was sent (so send its resolve)
+        self.suppressed = 0
+
+    def _events(self, ts: int, value: float, fire: np.ndarray, resolve: np.ndarray) -> list:
+        """Rate-limit new firings; resolves go out only for alerts that were sent."""
+        events = []
+        for i in np.flatnonzero(resolve):
+            if self.notified[i]:
+                events.append((self.rules[i], "resolved", value))
+            self.notified[i] = False
+
+        for i in np.flatnonzero(fire):
+            if ts - self.last_notified[i] >= self.cooldown_ms[i]:
+                self.last_notified[i] = ts
+                self.notified[i] = True
+                events.append((self.rules[i], "firing", value))
+            else:
+                self.suppressed += 1
+        return events
+
+
+class ThresholdGroup(_Group):
+    def __init__(self, rules: list):
+        super().__init__(rules)
+        self.direction = np.array([-1.0 if r.get("op", ">") in ("<", "<=") else 1.0 for r in rules])
+        self.inclusive = np.array([r.get("op", ">") in (">=", "<=") for r in rules])
+        self.hold_ms = np.array([r.get("for", 0) * 1000 for r in rules])
+        self.since = np.full(len(rules), -1, dtype=np.int64)   # start of the current breach
+
+    def update(self, ts: int, value: float) -> list:
+        # >= / <= also breach at the threshold, so they clear only strictly past `clear`
+        margin = self.direction * (value - self.threshold)
+        breach = (margin > 0) | (self.inclusive & (margin == 0))
+        margin = self.direction * (value - self.clear)
+        cleared = (margin < 0) | (~self.inclusive & (margin == 0))
+        self.since = np.where(breach, np.where(self.since < 0, ts, self.since), -1)
+
+        fire = breach & ~self.active & (ts - self.since >= self.hold_ms)
+        resolve = self.active & cleared
+        self.active = (self.active | fire) & ~resolve
+        return self._events(ts, value, fire, resolve)
+
+
+class SpikeGroup(_Group):
+    """Ratio of the value to its own time-based EWMA baseline (e.g. volatility spikes)."""
+
+    def __init__(self, rules: list):
+        super().__init__(rules)
+        self.halflife_ms = np.array([r.get("halflife", 300) * 1000 for r in rules], dtype=np.float64)
+        self.baseline = np.full(len(rules), np.nan)
+        self.first_ts = None
+        self.last_ts = None
+
+    def update(self, ts: int, value: float) -> list:
+        if self.first_ts is None:
+            self.first_ts = self.last_ts = ts
+            self.baseline[:] = value
+            return []
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(self.baseline > 0, value / self.baseline, 0.0)
+        warm = ts - self.first_ts >= self.halflife_ms   # baseline needs history first
+        fire = warm & ~self.active & (ratio >= self.threshold)
+        resolve = self.active & (ratio < self.clear)
+        self.active = (self.active | fire) & ~resolve
+
+        alpha = 1 - 0.5 ** ((ts - self.last_ts) / self.halflife_ms)
+        self.baseline += alpha * (value - self.baseline)
+        self.last_ts = ts
+        return self._events(ts, value, fire, resolve)
+
+
+class FlipGroup(_Group):
+    """Sign flips with a dead band: the side only changes beyond +/- threshold."""
+
+    def __init__(self, rules: list):
+        super().__init__(rules)
+        self.side = np.zeros(len(rules))
+
+    def update(self, ts: int, value: float) -> list:
+        side = np.where(value >= self.threshold, 1.0,
+                        np.where(value <= -self.threshold, -1.0, self.side))
+        fire = (self.side != 0) & (side != self.side)
+        self.side = side
+        events = self._events(ts, value, fire, np.zeros_like(fire))
+        self.notified[:] = False   # flips are one-shot events
+        return events
+
+
+GROUPS = {"threshold": ThresholdGroup, "spike": SpikeGroup, "flip": FlipGroup}
+
+
+# ============================================================
+#                 SINKS
+# ============================================================
+class LogSink:
+    def emit(self, alert: dict):
+        icon = "🔔" if alert["state"] == "firing" else "✅"
+        print(f"{icon} [{alert['severity']}] {alert['symbol']} {alert['rule']}: {alert['message']}")
+
+
+class FileSink:
+    """Append alerts as JSON lines."""
+
+    def __init__(self, path: str = ALERT_LOG):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def emit(self, alert: dict):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(alert) + "\n")
+
+
+class WebhookSink:
+    """
+    POST each alert as JSON from a background thread, so a slow endpoint
+    never delays evaluation. Without a URL it only logs what it would
+    send (stub for wiring up Slack/PagerDuty-style receivers).
+    """
+
+    def __init__(self, url: str = None, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, body: bytes):
+        request = urllib.request.Request(self.url, data=body, method="POST",
+                                         headers={"Content-Type": "application/json"})
+        try:
+            urllib.request.urlopen(request, timeout=self.timeout).close()
+        except OSError as e:
+            print(f"Webhook {self.url} failed: {e}")
+
+    def emit(self, alert: dict):
+        body = json.dumps(alert).encode()
+        if self.url is None:
+            print(f"[webhook stub] would POST {len(body)} bytes: {alert['rule']} {alert['state']}")
+            return
+        threading.Thread(target=self._post, args=(body,), daemon=True).start()
+
+
+SINKS = {"log": LogSink, "file": FileSink, "webhook": WebhookSink}
+
+
+def build_sinks(config: dict) -> dict:
+    """{name: {"type": ..., **options}} → {name: sink}; default is one log sink."""
+    if not config:
+        return {"log": LogSink()}
+    sinks = {}
+    for name, spec in config.items():
+        spec = dict(spec or {})
+        kind = spec.pop("type", name)
+        if kind not in SINKS:
+            raise ValueError(f"Unknown alert sink type: {kind!r}")
+        sinks[name] = SINKS[kind](**spec)
+    return sinks
+
+
+# ============================================================
+#                 RULE ENGINE
+# ============================================================
+def load_rules(path: str = ALERT_RULES) -> dict:
+    """Parse a YAML or JSON rules file: {"rules": [...], "sinks": {...}}."""
+    with open(path) as f:
+        text = f.read()
+    if path.endswith(".json"):
+        return json.loads(text)
+    try:
+        import yaml
+    except ImportError as e:
+        raise ImportError("YAML alert rules require PyYAML: pip install pyyaml") from e
+    return yaml.safe_load(text) or {}
+
+
+def validate_rule(rule: dict) -> dict:
+    rule = dict(rule)
+    name = rule.get("name")
+    if not name:
+        raise ValueError(f"Alert rule without a name: {rule}")
+    rule.setdefault("kind", "threshold")
+    rule.setdefault("symbol", "*")
+    rule.setdefault("severity", "warning")
+    if rule["kind"] not in KINDS:
+        raise ValueError(f"Rule {name}: unknown kind {rule['kind']!r} (expected one of {KINDS})")
+    if "threshold" not in rule:
+        raise ValueError(f"Rule {name}: missing threshold")
+    if rule["kind"] == "stale" and "feed" not in rule:
+        raise ValueError(f"Rule {name}: stale rules need a feed")
+    if rule["kind"] != "stale" and "metric" not in rule:
+        raise ValueError(f"Rule {name}: missing metric")
+    if rule.get("op", ">") not in (">", ">=", "<", "<="):
+        raise ValueError(f"Rule {name}: unsupported op {rule['op']!r}")
+    return rule
+
+
+class AlertEngine:
+    """
+    Incremental evaluator over a stream of metric updates:
+
+        engine.update(symbol, ts_ms, {"spread_bps": 1.3, ...}, feed="depth")
+        engine.check_stale(now_ms)      # on a clock, for stalled feeds
+
+    Rules with symbol "*" are compiled for each symbol the first time it
+    is seen. Alerts go to the rule's sinks (all sinks by default) and the
+    most recent ones are kept in `recent`.
+    """
+
+    def __init__(self, rules: list, sinks: dict = None):
+        self.rules = [validate_rule(r) for r in rules]
+        self.sinks = sinks if sinks is not None else {"log": LogSink()}
+        self.recent = []
+        self._groups = {}       # symbol → {metric: [group, ...]}
+        self._stale = {}        # symbol → [[rule, active], ...]
+        self._last_seen = {}    # (symbol, feed) → ts_ms
+        self.updates = 0
+        self.events = 0
+        self.max_update_us = 0.0
+
+    @classmethod
+    def from_file(cls, path: str = ALERT_RULES):
+        config = load_rules(path)
+        sinks = build_sinks(config.get("sinks"))
+        for rule in config.get("rules", []):
+            unknown = set(rule.get("sinks", ())) - set(sinks)
+            if unknown:
+                raise ValueError(f"Rule {rule.get('name')}: unknown sinks {sorted(unknown)}")
+        return cls(config.get("rules", []), sinks)
+
+    def _compile(self, symbol: str) -> dict:
+        matching = [r for r in self.rules if r["symbol"] in ("*", symbol)]
+        by_key = {}
+        for r in matching:
+            if r["kind"] != "stale":
+                by_key.setdefault((r["metric"], r["kind"]), []).append(r)
+
+        groups = {}
+        for (metric, kind), rules in by_key.items():
+            groups.setdefault(metric, []).append(GROUPS[kind](rules))
+        self._groups[symbol] = groups
+        self._stale[symbol] = [[r, False] for r in matching if r["kind"] == "stale"]
+        return groups
+
+    def update(self, symbol: str, ts_ms: int, metrics: dict, feed: str = None) -> list:
+        """Evaluate every rule on the given metrics; returns the alerts sent."""
+        started = time.perf_counter()
+        groups = self._groups.get(symbol)
+        if groups is None:
+            groups = self._compile(symbol)
+
+        raised = []
+        for metric, value in metrics.items():
+            if value is None or value != value:   # None / NaN: no observation
+                continue
+            for group in groups.get(metric, ()):
+                raised += group.update(ts_ms, value)
+
+        if feed is not None and ts_ms > self._last_seen.get((symbol, feed), -1):
+            self._last_seen[(symbol, feed)] = ts_ms
+            for entry in self._stale[symbol]:
+                if entry[1] and entry[0]["feed"] == feed:
+                    entry[1] = False
+                    raised.append((entry[0], "resolved", 0.0))
+
+        self.updates += 1
+        self.max_update_us = max(self.max_update_us, (time.perf_counter() - started) * 1e6)
+        return self._dispatch(symbol, ts_ms, raised)
+
+    def last_seen(self, symbol: str, feed: str):
+        """Timestamp of the last update from `feed` for `symbol` (None if never)."""
+        return self._last_seen.get((symbol, feed))
+
+    def check_stale(self, now_ms: int) -> list:
+        """Fire stale-feed rules whose feed has been silent past the threshold."""
+        sent = []
+        for symbol, entries in self._stale.items():
+            raised = []
+            for entry in entries:
+                rule, active = entry
+                last = self._last_seen.get((symbol, rule["feed"]))
+                if last is None or active:
+                    continue
+                silent = (now_ms - last) / 1000
+                if silent > rule["threshold"]:
+                    entry[1] = True
+                    raised.append((rule, "firing", silent))
+            sent += self._dispatch(symbol, now_ms, raised)
+        return sent
+
+    def _dispatch(self, symbol: str, ts_ms: int, raised: list) -> list:
+        alerts = []
+        for rule, state, value in raised:
+            alert = {
+                "ts": ts_ms,
+                "rule": rule["name"],
+                "symbol": symbol,
+                "severity": rule["severity"],
+                "state": state,
+                "value": float(value),
+                "threshold": rule["threshold"],
+                "message": self._message(rule, state, value),
+            }
+            for name in rule.get("sinks", self.sinks):
+                if name not in self.sinks:
+                    continue
+                try:
+                    self.sinks[name].emit(alert)
+                except Exception as e:
+                    print(f"Alert sink {name} failed: {e}")
+            alerts.append(alert)
+
+        if alerts:
+            self.events += len(alerts)
+            self.recent = (self.recent + alerts)[-RECENT_ALERTS:]
+        return alerts
+
+    @staticmethod
+    def _message(rule: dict, state: str, value: float) -> str:
+        if rule["kind"] == "stale":
+            if state == "resolved":
+                return f"{rule['feed']} feed resumed"
+            what = f"{rule['feed']} feed silent for {value:.1f}s"
+        elif rule["kind"] == "flip":
+            what = f"{rule['metric']} flipped to {value:+.3f}"
+        elif rule["kind"] == "spike":
+            what = f"{rule['metric']} spiked to {value:.6g}"
+        else:
+            what = f"{rule['metric']} = {value:.6g} ({rule.get('op', '>')} {rule['threshold']})"
+        return what if state == "firing" else f"resolved: {what}"
+
+    def active(self) -> list:
+        """Names of currently active (breaching) rules per symbol."""
+        out = []
+        for symbol, groups in self._groups.items():
+            for group_list in groups.values():
+                for group in group_list:
+                    out += [(symbol, group.rules[i]["name"]) for i in np.flatnonzero(group.active)]
+            out += [(symbol, rule["name"]) for rule, active in self._stale[symbol] if active]
+        return out
+
+    def stats(self) -> dict:
+        suppressed = sum(
+            g.suppressed for groups in self._groups.values() for gl in groups.values() for g in gl
+        )
+        return {"rules": len(self.rules), "updates": self.updates, "alerts": self.events,
+                "suppressed": suppressed, "max_update_us": round(self.max_update_us, 1)}
+
+
+# ============================================================
+#                 METRIC STREAM FROM DEPTH TICKS
+# ============================================================
+def book_metrics(book_table) -> list:
+    """
+    (event_time, metrics) per row of a `features.book_features` table:
+    spread_bps, imbalance, depth_imbalance, micro_shift_bps, ofi and the
+    flow imbalance of every window in the table.
+    """
+    import polars as pl
+
+    flow = [c for c in book_table.columns if c.startswith("flow_imbalance_")]
+    mid = pl.col("mid_price")
+    table = book_table.select(
+        "event_time",
+        (pl.col("spread") / mid * 1e4).alias("spread_bps"),
+        "imbalance",
+        "depth_imbalance",
+        ((pl.col("microprice") - mid) / mid * 1e4).alias("micro_shift_bps"),
+        "ofi",
+        *flow,
+    )
+    return [(row.pop("event_time"), row) for row in table.iter_rows(named=True)]
+
+
+if __name__ == "__main__":
+    # Replay the stored depth history through the rules (backtest + throughput)
+    import argparse
+
+    from src.features import build_feature_tables
+
+    parser = argparse.ArgumentParser(description="Replay stored ticks through alert rules")
+    parser.add_argument("--rules", default=ALERT_RULES)
+    parser.add_argument("--symbols", type=int, default=1,
+                        help="replay the same ticks as this many symbols (load test)")
+    parser.add_argument("--copies", type=int, default=1,
+                        help="clone every rule this many times with spread-out thresholds")
+    args = parser.parse_args()
+
+    rules = [
+        {**r, "name": f"{r['name']}#{i}", "threshold": r["threshold"] * (1 + i / args.copies)}
+        for r in load_rules(args.rules).get("rules", []) for i in range(args.copies)
+    ] if args.copies > 1 else load_rules(args.rules).get("rules", [])
+    quiet = args.symbols > 1 or args.copies > 1
+    engine = AlertEngine(rules, {} if quiet else {"log": LogSink()})
+    tables = build_feature_tables()
+    if tables is None:
+        print("Need both trades and depth data.")
+    else:
+        ticks = book_metrics(tables[1])
+        started = time.perf_counter()
+        for ts, metrics in ticks:
+            for s in range(args.symbols):
+                engine.update(f"SYM{s}" if args.symbols > 1 else "BTCUSDT", ts, metrics, feed="depth")
+        elapsed = time.perf_counter() - started
+
+        n = len(ticks) * args.symbols
+        instances = sum(1 for r in engine.rules if r["kind"] != "stale") * args.symbols
+        print(f"{n} updates x {instances} rule instances in {elapsed:.2f}s "
+              f"({elapsed / n * 1e6:.1f} µs/update)")
+        print("Stats:", engine.stats())
@@ -0,0 +1,347 @@
+import asyncio
+import json
+import math
+import os
+import signal
+import sys
+import time
+from http import HTTPStatus
+
+from websockets.asyncio.server import broadcast, serve
+
+# Allow `python src/api.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.alerts import ALERT_RULES, AlertEngine, book_metrics
+from src.correlation import CORR_HALFLIFE, EWCrossCorrelation, observe_trades
+from src.features import book_features
+from src.live_state import CHECKPOINT_SECONDS, load_live_state, save_live_state
+from src.live_tape import LiveTape
+from src.predict import OnlinePredictor, run_ticks
+from src.process import (
+    FLOW_WINDOWS,
+    PREDICT_FLOW_WINDOW,
+    REGIME_FLOW_WINDOW,
+    build_price_series,
+    compute_volatility,
+    compute_window_flow,
+)
+from src.process_depth import build_imbalance_series, compute_orderbook_metrics
+from src.query import SYMBOLS
+from src.regime import RegimeFilter, classify_regime, regime_observations
+
+# ============================================================
+#                 SERVER SETTINGS
+# ============================================================
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", 8765))
+REFRESH_INTERVAL = 1.0      # seconds between metric recomputations
+
+# A client whose socket still holds this much unsent data skips the next
+# push (it gets the latest snapshot once it catches up) instead of
+# buffering snapshots without bound.
+CLIENT_BUFFER_LIMIT = 1024 * 1024
+
+WS_PATH = "/ws"
+SECTIONS = ("trades", "orderbook", "regime", "regime_probabilities", "prediction", "alerts", "correlation",
+            "series")
+REGIME_WARMUP_MS = 5 * 60_000   # history a fresh regime filter replays
+
+
+# ============================================================
+#                 SHARED METRIC SNAPSHOT
+# ============================================================
+def _finite(value):
+    """JSON has no NaN/inf: report them as null."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _series(df, columns):
+    """Chart frame (Polars, `ts` datetime column) → {"ts": [ms...], col: [...]}."""
+    if df is None:
+        return None
+    out = {"ts": df["ts"].dt.epoch("ms").to_list()}
+    for col in columns:
+        out[col] = [_finite(v) for v in df[col].to_list()]
+    return out
+
+
+def step_models(predictor: OnlinePredictor, regime_filter: RegimeFilter, depth, trades, vol_1m,
+                alert_engine: AlertEngine = None):
+    """Feed the depth snapshots that arrived since the last refresh, in order."""
+    if predictor is None and not regime_filter.model.fitted and alert_engine is None:
+        return
+    if regime_filter.last_ts is None:
+        regime_filter.last_ts = int(depth["event_time"].max()) - REGIME_WARMUP_MS
+    seen = [m.last_ts for m in (predictor, regime_filter) if m is not None]
+    depth = depth.filter(depth["event_time"] > min(seen)) if None not in seen else depth
+    if depth.height == 0:
+        return
+
+    windows = {w: FLOW_WINDOWS[w] for w in (PREDICT_FLOW_WINDOW, REGIME_FLOW_WINDOW)}
+    book = book_features(depth, trades, windows)
+    if predictor is not None:
+        new = book if predictor.last_ts is None else book.filter(book["event_time"] > predictor.last_ts)
+        run_ticks(predictor, new, vol_1m, PREDICT_FLOW_WINDOW)
+        predictor.maybe_checkpoint()
+    if regime_filter.model.fitted:
+        regime_filter.run(*regime_observations(book.filter(book["event_time"] > regime_filter.last_ts)))
+    if alert_engine is not None:
+        # A fresh engine starts at the latest tick instead of alerting on history
+        last = alert_engine.last_seen(SYMBOLS[0], "depth")
+        new = book.tail(1) if last is None else book.filter(book["event_time"] > last)
+        for ts, metrics in book_metrics(new):
+            alert_engine.update(SYMBOLS[0], ts, metrics, feed="depth")
+
+
+def compute_snapshot(predictor: OnlinePredictor = None, regime_filter: RegimeFilter = None,
+                     alert_engine: AlertEngine = None, correlation: EWCrossCorrelation = None,
+                     tape: LiveTape = None) -> dict:
+    """
+    Everything the dashboards show, computed once: trade metrics, top of
+    book, regime, prediction, alerts, cross-symbol correlation and the
+    chart series. With a `predictor`, new depth ticks also train the
+    online model before it predicts; the regime filter (fresh if not
+    given) and the alert rules are stepped through them, and new trades
+    through the correlation grid. A `tape` kept across calls makes each
+    call read only the files written since the previous one.
+    """
+    snapshot = {"ts": None, "trades": None, "orderbook": None,
+                "regime": None, "regime_probabilities": None, "prediction": None,
+                "alerts": None, "correlation": None, "series": {"price": None, "bars": None, "imbalance": None}}
+
+    tape = tape if tape is not None else LiveTape()
+    tape.refresh()
+
+    trades = tape.trades
+    if trades is not None and trades.height > 0:
+        buys, sells, ratio = tape.buy_sell_ratio()
+        snapshot["trades"] = {
+            "vwap": float(tape.vwap()),
+            "buys": buys,
+            "sells": sells,
+            "buy_sell_ratio": float(ratio),
+            "vol_1m": _finite(compute_volatility(trades, 60)),
+            "vol_5m": _finite(compute_volatility(trades, 300)),
+            "last_price": float(trades["price"][-1]),
+            "last_trade_time": int(trades["trade_time"][-1]),
+            "flow": compute_window_flow(trades),
+        }
+        snapshot["series"]["price"] = _series(build_price_series(trades, 300), ["price"])
+        if correlation is not None:
+            # a fresh grid warms up on recent trades only, never the whole archive
+            since = int(trades["trade_time"][-1]) - 3 * CORR_HALFLIFE * 1000
+            # one symbol until ingest is symbol-partitioned (see query.SYMBOLS)
+            observe_trades(correlation, {SYMBOLS[0]: trades}, since_ms=since)
+            snapshot["correlation"] = correlation.snapshot()
+            if snapshot["correlation"] is not None:
+                snapshot["correlation"]["features"] = correlation.features(SYMBOLS[0])
+        snapshot["series"]["bars"] = _series(tape.bar_series(), ["price", "vwap"])
+
+    depth = tape.depth
+    if depth is not None:
+        snapshot["orderbook"] = {k: _finite(v) for k, v in compute_orderbook_metrics(depth).items()}
+        snapshot["orderbook"]["event_time"] = int(depth["event_time"][-1])
+        snapshot["series"]["imbalance"] = _series(
+            build_imbalance_series(depth, 300), ["imbalance", "spread"]
+        )
+
+    t, ob = snapshot["trades"], snapshot["orderbook"]
+    if t is not None and ob is not None:
+        regime_filter = regime_filter if regime_filter is not None else RegimeFilter()
+        step_models(predictor, regime_filter, depth, trades, t["vol_1m"], alert_engine)
+        if regime_filter.model.fitted:
+            snapshot["regime"] = regime_filter.regime
+            snapshot["regime_probabilities"] = regime_filter.probabilities()
+        else:
+            snapshot["regime"] = classify_regime(
+                imbalance=ob["orderbook_imbalance"],
+                microprice=ob["microprice"],
+                mid_price=ob["mid_price"],
+                buy_sell_ratio=t["flow"][REGIME_FLOW_WINDOW]["volume_ratio"],
+                vol_1m=t["vol_1m"],
+            )
+
+        predictor = predictor if predictor is not None else OnlinePredictor()
+        flow = t["flow"][PREDICT_FLOW_WINDOW]
+        direction, confidence, source = predictor.predict(
+            microprice=ob["microprice"],
+            mid_price=ob["mid_price"],
+            imbalance=ob["orderbook_imbalance"],
+            flow_imbalance=flow["flow_imbalance"],
+            buy_sell_ratio=flow["volume_ratio"],
+            spread=ob["spread"],
+            volatility_1m=t["vol_1m"],
+        )
+        snapshot["prediction"] = {
+            "direction": direction,
+            "confidence": float(confidence),
+            "source": source,
+            **predictor.stats(),
+        }
+
+    snapshot["ts"] = int(time.time() * 1000)
+    if alert_engine is not None:
+        if t is not None:
+            alert_engine.update(SYMBOLS[0], t["last_trade_time"], {
+                "vol_1m": t["vol_1m"], "vol_5m": t["vol_5m"], "buy_sell_ratio": t["buy_sell_ratio"],
+            }, feed="trades")
+        alert_engine.check_stale(snapshot["ts"])
+        snapshot["alerts"] = {
+            "active": [{"symbol": s, "rule": r} for s, r in alert_engine.active()],
+            "recent": alert_engine.recent[-20:],
+            **alert_engine.stats(),
+        }
+    return snapshot
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"))
+
+
+class LiveMetrics:
+    """
+    Shared in-memory state behind the API. One background task recomputes
+    the snapshot every `interval` seconds (in a worker thread, so sockets
+    keep being served) and serializes each endpoint body once; every REST
+    request and WebSocket push reuses those bytes, so N clients cost one
+    computation instead of N. A `LiveTape` keeps the recent trades and
+    depth in memory, so each refresh reads only the newly written files.
+
+    The model state is restored from the last `live_state` checkpoint, so
+    a restart reads and replays only the depth ticks after its high-water
+    mark and serves the last snapshot until the first recomputation. Alert rules
+    are loaded from `ALERT_RULES` when that file exists.
+    """
+
+    def __init__(self, interval: float = REFRESH_INTERVAL):
+        self.interval = interval
+        self.version = 0
+        self.snapshot = None
+        self.bodies = {}
+        self.clients = set()
+        self.predictor = OnlinePredictor()
+        self.regime_filter = RegimeFilter()
+        self.alert_engine = AlertEngine.from_file() if os.path.exists(ALERT_RULES) else None
+        self.correlation = EWCrossCorrelation(SYMBOLS)
+        self.tape = LiveTape()
+        self._saved_at = time.monotonic()
+
+        restored = load_live_state(self.predictor, self.regime_filter, self.tape)
+        if restored is not None:
+            print(f"Restored live state up to {restored['high_water_ms']} "
+                  f"(saved {time.time() - restored['saved_at']:.0f}s ago)")
+            if restored["snapshot"] is not None:
+                self.publish(restored["snapshot"])
+
+    def checkpoint(self, force: bool = False):
+        if force or time.monotonic() - self._saved_at >= CHECKPOINT_SECONDS:
+            save_live_state(self.predictor, self.regime_filter, self.snapshot, self.tape)
+            self._saved_at = time.monotonic()
+
+    def publish(self, snapshot: dict):
+        self.version += 1
+        self.snapshot = snapshot
+        self.bodies = {"/api/snapshot": _dumps(snapshot)}
+        for section in SECTIONS:
+            self.bodies[f"/api/{section}"] = _dumps(snapshot.get(section))
+
+        ready = [
+            c for c in self.clients
+            if c.transport is not None
+            and c.transport.get_write_buffer_size() < CLIENT_BUFFER_LIMIT
+        ]
+        broadcast(ready, self.bodies["/api/snapshot"])
+
+    async def run(self, stop: asyncio.Event):
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                self.publish(await asyncio.to_thread(compute_snapshot, self.predictor,
+                                                     self.regime_filter, self.alert_engine,
+                                                     self.correlation, self.tape))
+                self.checkpoint()
+            except Exception as e:
+                print(f"Metric refresh failed: {e}")
+
+            elapsed = time.monotonic() - started
+            try:
+                await asyncio.wait_for(stop.wait(), max(self.interval - elapsed, 0))
+            except asyncio.TimeoutError:
+                pass
+        self.predictor.maybe_checkpoint(force=True)
+        self.checkpoint(force=True)
+
+
+# ============================================================
+#                 HTTP (REST) + WEBSOCKET HANDLERS
+# ============================================================
+def _json_response(connection, status: HTTPStatus, body: str):
+    response = connection.respond(status, body)
+    del response.headers["Content-Type"]
+    response.headers["Content-Type"] = "application/json"
+    response.headers["Cache-Control"] = "no-store"
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    return response
+
+
+def make_handlers(metrics: LiveMetrics):
+    def process_request(connection, request):
+        """Answer REST GETs directly; let `/ws` upgrades through."""
+        path = request.path.split("?", 1)[0].rstrip("/")
+        if path == WS_PATH:
+            return None
+
+        if path == "/api/health":
+            return _json_response(connection, HTTPStatus.OK, _dumps({
+                "status": "ok",
+                "version": metrics.version,
+                "clients": len(metrics.clients),
+                "ts": metrics.snapshot["ts"] if metrics.snapshot else None,
+            }))
+        if path in metrics.bodies:
+            return _json_response(connection, HTTPStatus.OK, metrics.bodies[path])
+        if path == "/api/snapshot" or path.removeprefix("/api/") in SECTIONS:
+            return _json_response(connection, HTTPStatus.SERVICE_UNAVAILABLE,
+                                  _dumps({"error": "no snapshot computed yet"}))
+        return _json_response(connection, HTTPStatus.NOT_FOUND,
+                              _dumps({"error": f"unknown endpoint {path}"}))
+
+    async def handler(connection):
+        """WebSocket push: latest snapshot on connect, then every update."""
+        metrics.clients.add(connection)
+        try:
+            if "/api/snapshot" in metrics.bodies:
+                await connection.send(metrics.bodies["/api/snapshot"])
+            async for _ in connection:
+                pass  # clients only listen
+        finally:
+            metrics.clients.discard(connection)
+
+    return process_request, handler
+
+
+async def serve_api(host: str = API_HOST, port: int = API_PORT,
+                    interval: float = REFRESH_INTERVAL):
+    metrics = LiveMetrics(interval)
+    process_request, handler = make_handlers(metrics)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    async with serve(handler, host, port, process_request=process_request,
+                     compression=None):
+        print(f"API listening on http://{host}:{port} (WebSocket at {WS_PATH})")
+        await metrics.run(stop)
+    print("API server stopped.")
+
+
+if __name__ == "__main__":
+    asyncio.run(serve_api())
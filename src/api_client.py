@@ -0,0 +1,35 @@
+import json
+import os
+import urllib.error
+import urllib.request
+
+# ============================================================
+#                 THIN CLIENT FOR THE METRICS API
+# ============================================================
+API_URL = os.environ.get(
+    "API_URL",
+    f"http://{os.environ.get('API_HOST', '127.0.0.1')}:{os.environ.get('API_PORT', 8765)}",
+)
+
+
+def fetch(endpoint: str = "snapshot", base_url: str = API_URL, timeout: float = 2.0):
+    """
+    GET `/api/<endpoint>` and decode it. Returns None while the server is
+    down or has not computed its first snapshot.
+    """
+    try:
+        with urllib.request.urlopen(f"{base_url}/api/{endpoint}", timeout=timeout) as resp:
+            return json.load(resp)
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+
+def series_frame(series: dict):
+    """API chart series → pandas frame indexed by timestamp (for st.line_chart)."""
+    import pandas as pd
+
+    if not series:
+        return None
+    df = pd.DataFrame(series)
+    df["ts"] = pd.to_datetime(df["ts"], unit="ms")
+    return df.set_index("ts")
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+from websockets.asyncio.client import connect
+
+# Allow `python src/api_loadtest.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api_client import API_URL
+
+
+# ============================================================
+#                 LOAD-TEST CLIENTS
+# ============================================================
+async def ws_client(url: str, deadline: float, stats: dict):
+    """Listen to pushes; latency = receipt time - snapshot compute time."""
+    try:
+        async with connect(url, compression=None, open_timeout=10) as ws:
+            while time.time() < deadline:
+                try:
+                    msg = await asyncio.wait_for(ws.recv(), deadline - time.time())
+                except asyncio.TimeoutError:
+                    break
+                snapshot = json.loads(msg)
+                stats["ws_messages"] += 1
+                stats["ws_bytes"] += len(msg)
+                if snapshot.get("ts"):
+                    stats["ws_latency"].append(time.time() * 1000 - snapshot["ts"])
+    except Exception as e:
+        stats["errors"].append(f"ws: {e}")
+
+
+async def rest_client(host: str, port: int, path: str, deadline: float, stats: dict):
+    """Poll one endpoint back-to-back (one connection per request)."""
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+            await writer.drain()
+            data = await reader.read()
+            writer.close()
+        except OSError as e:
+            stats["errors"].append(f"rest: {e}")
+            await asyncio.sleep(0.1)
+            continue
+
+        status = data.split(b" ", 2)[1] if data else b"?"
+        if status != b"200":
+            stats["errors"].append(f"rest: HTTP {status.decode()}")
+        stats["rest_requests"] += 1
+        stats["rest_latency"].append((time.perf_counter() - started) * 1000)
+
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def run_load_test(base_url: str, ws_clients: int, rest_clients: int,
+                        duration: float, path: str):
+    parsed = urlparse(base_url)
+    ws_url = f"ws://{parsed.hostname}:{parsed.port}/ws"
+    stats = {"ws_messages": 0, "ws_bytes": 0, "ws_latency": [],
+             "rest_requests": 0, "rest_latency": [], "errors": []}
+
+    deadline = time.time() + duration
+    tasks = [ws_client(ws_url, deadline, stats) for _ in range(ws_clients)]
+    tasks += [rest_client(parsed.hostname, parsed.port, path, deadline, stats)
+              for _ in range(rest_clients)]
+    await asyncio.gather(*tasks)
+
+    print(f"\n=== API LOAD TEST ({ws_clients} ws + {rest_clients} rest, {duration:.0f}s) ===")
+    print(f"WebSocket pushes : {stats['ws_messages']} "
+          f"({stats['ws_messages'] / duration:.1f}/s, {stats['ws_bytes'] / duration / 1e6:.2f} MB/s)")
+    for q in (0.5, 0.95, 0.99):
+        lat = percentile(stats["ws_latency"], q)
+        print(f"  push latency p{int(q * 100):<3}: {'n/a' if lat is None else f'{lat:.1f} ms'}")
+    print(f"REST requests    : {stats['rest_requests']} ({stats['rest_requests'] / duration:.1f}/s)")
+    for q in (0.5, 0.95, 0.99):
+        lat = percentile(stats["rest_latency"], q)
+        print(f"  request p{int(q * 100):<3}    : {'n/a' if lat is None else f'{lat:.1f} ms'}")
+    print(f"Errors           : {len(stats['errors'])}"
+          + (f" (first: {stats['errors'][0]})" if stats["errors"] else ""))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the metrics API with local clients.")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--ws", type=int, default=100, help="concurrent WebSocket listeners")
+    parser.add_argument("--rest", type=int, default=10, help="concurrent REST pollers")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--path", default="/api/snapshot", help="REST endpoint to poll")
+    args = parser.parse_args()
+
+    asyncio.run(run_load_test(args.url, args.ws, args.rest, args.duration, args.path))
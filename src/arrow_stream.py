@@ -0,0 +1,150 @@
+import os
+import sys
+import threading
+import time
+
+import polars as pl
+import pyarrow as pa
+
+# Allow ingest scripts (run from src/) to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.storage import IPC_SUFFIX, LocalBackend
+
+# One IPC stream file per stream per hour; compaction turns closed hours
+# into Parquet.
+IPC_BUCKET_SECONDS = 3600
+
+
+# ============================================================
+#          WRITER: APPEND RECORD BATCHES TO AN OPEN STREAM
+# ============================================================
+class HourlyIpcWriter:
+    """
+    Append each flush as one record batch to `<prefix>_<hour>_<writer>-<part>.arrows`.
+
+    No compression and no footer: a flush is a single sequential write and
+    readers see the batch as soon as it is flushed. The file is sealed
+    (end-of-stream marker) when the hour rolls over or on `close()`.
+    """
+
+    def __init__(self, storage, prefix: str, writer_id: str):
+        if not isinstance(storage, LocalBackend):
+            raise ValueError("Arrow IPC streaming needs a local/tmpfs storage backend")
+        self.storage = storage
+        self.prefix = prefix
+        self.writer_id = writer_id
+        self._hour = None
+        self._part = 0
+        self._sink = None
+        self._writer = None
+        self._schema = None
+
+    def _open(self, hour: int, schema: pa.Schema):
+        # A restart within the hour (same pinned writer ID) continues in the
+        # next free part instead of truncating the file written before it.
+        while os.path.exists(self.storage.uri(self._key(hour))):
+            self._part += 1
+        key = self._key(hour)
+        self._sink = pa.OSFile(self.storage.uri(key), "wb")
+        self._writer = pa.ipc.new_stream(self._sink, schema)
+        self._schema = schema
+        self._hour = hour
+        print(f"Opened stream file → {self.storage.uri(key)}")
+
+    def _key(self, hour: int) -> str:
+        return f"{self.prefix}_{hour}_{self.writer_id}-{self._part}{IPC_SUFFIX}"
+
+    def write(self, df: pl.DataFrame):
+        table = df.to_arrow()
+        hour = int(time.time()) // IPC_BUCKET_SECONDS * IPC_BUCKET_SECONDS
+
+        if self._writer is not None and hour != self._hour:
+            self.close()
+            self._part = 0
+        if self._writer is not None and table.schema != self._schema:
+            try:
+                table = table.cast(self._schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError):
+                # schema changed (e.g. new column): continue in a new part
+                self.close()
+                self._part += 1
+        if self._writer is None:
+            self._open(hour, table.schema)
+
+        self._writer.write_table(table)
+        self._sink.flush()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+        self._writer = self._sink = None
+
+
+# ============================================================
+#          READER: MEMORY-MAPPED TAIL OF A GROWING STREAM
+# ============================================================
+class IpcStreamTail:
+    """
+    Incremental reader for a stream file that may still be written.
+
+    The file is memory-mapped and record batches are decoded in place
+    (zero-copy). The byte offset after the last complete batch is kept, so
+    each `poll()` only decodes batches appended since the previous one; a
+    half-written trailing message is left for the next poll.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.schema = None
+        self.offset = 0
+        self.batches = []
+
+    def poll(self) -> int:
+        source = pa.memory_map(self.path)
+        if self.schema is None:
+            try:
+                self.schema = pa.ipc.read_schema(pa.ipc.read_message(source))
+            except (EOFError, OSError, pa.ArrowInvalid):
+                return 0  # schema not fully written yet
+            self.offset = source.tell()
+
+        source.seek(self.offset)
+        new = 0
+        while True:
+            try:
+                message = pa.ipc.read_message(source)
+            except (EOFError, OSError, pa.ArrowInvalid):
+                break  # end of data so far, EOS marker, or partial message
+            self.batches.append(pa.ipc.read_record_batch(message, self.schema))
+            self.offset = source.tell()
+            new += 1
+        return new
+
+    def table(self) -> pa.Table:
+        return pa.Table.from_batches(self.batches, schema=self.schema)
+
+
+_TAILS = {}
+_TAILS_LOCK = threading.Lock()
+
+
+def read_ipc_stream(path: str):
+    """
+    Current contents of a stream file as a Polars frame. Tails are cached
+    per path, so repeated reads only decode newly appended batches.
+    """
+    with _TAILS_LOCK:
+        tail = _TAILS.get(path)
+        if tail is None:
+            tail = _TAILS[path] = IpcStreamTail(path)
+        tail.poll()
+
+        # forget tails whose files were compacted away
+        for gone in [p for p in _TAILS if not os.path.exists(p)]:
+            del _TAILS[gone]
+
+        if tail.schema is None:
+            return None
+        return pl.from_arrow(tail.table())
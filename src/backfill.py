@@ -0,0 +1,61 @@
+import json
+import urllib.parse
+import urllib.request
+
+# Binance REST endpoint that serves older trades by trade ID
+HISTORICAL_TRADES_URL = "https://api.binance.com/api/v3/historicalTrades"
+
+PAGE_LIMIT = 1000              # max trades per request allowed by Binance
+MAX_BACKFILL_TRADES = 50_000   # don't stall ingestion on huge outages
+REQUEST_TIMEOUT = 10           # seconds
+
+
+# ============================================================
+#                 TRADE GAP BACKFILL (REST)
+# ============================================================
+def fetch_trades(symbol: str, from_id: int, limit: int = PAGE_LIMIT):
+    """Fetch up to `limit` trades starting at trade ID `from_id`."""
+    query = urllib.parse.urlencode({
+        "symbol": symbol.upper(),
+        "fromId": from_id,
+        "limit": limit,
+    })
+    with urllib.request.urlopen(f"{HISTORICAL_TRADES_URL}?{query}",
+                                timeout=REQUEST_TIMEOUT) as resp:
+        return json.loads(resp.read())
+
+
+def backfill_trades(symbol: str, first_id: int, last_id: int):
+    """
+    Return missing trades [first_id, last_id] in the ingest row format.
+    May return fewer rows than requested if the REST API fails or the
+    gap exceeds MAX_BACKFILL_TRADES.
+    """
+    rows = []
+    next_id = first_id
+    last_id = min(last_id, first_id + MAX_BACKFILL_TRADES - 1)
+
+    while next_id <= last_id:
+        limit = min(PAGE_LIMIT, last_id - next_id + 1)
+        try:
+            page = fetch_trades(symbol, next_id, limit)
+        except (OSError, ValueError) as e:
+            print(f"Backfill {symbol} from {next_id} failed: {e}")
+            break
+        if not page:
+            break
+
+        for t in page:
+            if t["id"] > last_id:
+                break
+            rows.append({
+                "trade_id": t["id"],
+                "event_time": t["time"],
+                "trade_time": t["time"],
+                "price": float(t["price"]),
+                "qty": float(t["qty"]),
+                "is_buyer_maker": t["isBuyerMaker"],
+            })
+        next_id = page[-1]["id"] + 1
+
+    return rows
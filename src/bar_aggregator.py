@@ -0,0 +1,133 @@
+# Bar resolutions, finest first (bar length in ms). Each coarser bar is
+# rolled up from closed bars of the resolution before it.
+RESOLUTIONS = {
+    "1s": 1_000,
+    "1m": 60_000,
+    "5m": 300_000,
+    "1h": 3_600_000,
+}
+
+BAR_COLUMNS = [
+    "bar_time", "open", "high", "low", "close",
+    "volume", "quote_volume", "buy_volume", "sell_volume", "trades", "vwap",
+    "first_trade_time", "last_trade_time",
+]
+
+
+def bar_prefix(resolution: str) -> str:
+    """File prefix of a bar dataset, e.g. `bars-1m_<ts>_....parquet`."""
+    return f"bars-{resolution}"
+
+
+# ============================================================
+#                 INCREMENTAL BAR AGGREGATION
+# ============================================================
+def _new_bar(bar_time, trade_time, price, qty, quote, buy_qty, trades=1):
+    return {
+        "bar_time": bar_time,
+        "open": price,
+        "high": price,
+        "low": price,
+        "close": price,
+        "volume": qty,
+        "quote_volume": quote,
+        "buy_volume": buy_qty,
+        "sell_volume": qty - buy_qty,
+        "trades": trades,
+        "first_trade_time": trade_time,
+        "last_trade_time": trade_time,
+    }
+
+
+def _fold(bar, other):
+    """
+    Merge a bar (or trade-as-bar) of the same bucket into `bar` in place.
+    Open and close follow trade time, not arrival order, so a late trade
+    never replaces the close of a bar that already saw later trades.
+    """
+    bar["high"] = max(bar["high"], other["high"])
+    bar["low"] = min(bar["low"], other["low"])
+    if other["first_trade_time"] < bar["first_trade_time"]:
+        bar["open"], bar["first_trade_time"] = other["open"], other["first_trade_time"]
+    if other["last_trade_time"] >= bar["last_trade_time"]:
+        bar["close"], bar["last_trade_time"] = other["close"], other["last_trade_time"]
+    bar["volume"] += other["volume"]
+    bar["quote_volume"] += other["quote_volume"]
+    bar["buy_volume"] += other["buy_volume"]
+    bar["sell_volume"] += other["sell_volume"]
+    bar["trades"] += other["trades"]
+
+
+def _finish(bar):
+    bar["vwap"] = bar["quote_volume"] / bar["volume"] if bar["volume"] else bar["close"]
+    return bar
+
+
+class BarAggregator:
+    """
+    Build OHLCV + VWAP + buy/sell volume bars as trades arrive.
+
+    Trades update the finest (1s) bar; when it closes it is folded into
+    the 1m bar, which folds into 5m, and so on. Trades older than the open
+    1s bar (e.g. backfills) become standalone correction bars that
+    `load_bars` merges with the bar of the same bucket.
+    """
+
+    def __init__(self, resolutions: dict = RESOLUTIONS):
+        self.resolutions = list(resolutions.items())
+        self._open = {res: None for res, _ in self.resolutions}
+        self._closed = {res: [] for res, _ in self.resolutions}
+
+    def add_trade(self, trade_time: int, price: float, qty: float, is_buyer_maker: bool):
+        res, length = self.resolutions[0]
+        bar_time = trade_time - trade_time % length
+        buy_qty = 0.0 if is_buyer_maker else qty
+        trade = _new_bar(bar_time, trade_time, price, qty, price * qty, buy_qty)
+
+        current = self._open[res]
+        if current is not None and bar_time < current["bar_time"]:
+            self._close(0, trade)  # late trade → correction bar
+            return
+        if current is not None and bar_time == current["bar_time"]:
+            _fold(current, trade)
+            return
+
+        if current is not None:
+            self._close(0, current)
+        self._open[res] = trade
+
+    def _close(self, level: int, bar: dict):
+        """Emit a closed bar and roll it up into the next resolution."""
+        res, _ = self.resolutions[level]
+        self._closed[res].append(_finish(bar))
+
+        if level + 1 >= len(self.resolutions):
+            return
+        up_res, up_length = self.resolutions[level + 1]
+        up_time = bar["bar_time"] - bar["bar_time"] % up_length
+        rolled = dict(bar, bar_time=up_time)
+
+        current = self._open[up_res]
+        if current is not None and up_time < current["bar_time"]:
+            self._close(level + 1, rolled)
+        elif current is not None and up_time == current["bar_time"]:
+            _fold(current, rolled)
+        else:
+            if current is not None:
+                self._close(level + 1, current)
+            self._open[up_res] = rolled
+
+    def drain(self, include_open: bool = False) -> dict:
+        """
+        Return and clear closed bars per resolution. With `include_open`
+        (shutdown), also emit the partial open bars.
+        """
+        if include_open:
+            for level, (res, _) in enumerate(self.resolutions):
+                bar, self._open[res] = self._open[res], None
+                if bar is not None:
+                    self._close(level, bar)
+
+        out = {res: bars for res, bars in self._closed.items() if bars}
+        self._closed = {res: [] for res, _ in self.resolutions}
+        return out
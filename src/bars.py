@@ -0,0 +1,168 @@
+import os
+import sys
+
+import polars as pl
+
+# Allow `python src/bars.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.storage import get_storage
+from src.store import WRITER_ID, list_batches, write_parquet_batch
+
+# Incremental aggregation is pure Python and lives in `bar_aggregator`
+# so ingest workers can build bars without importing Polars.
+from src.bar_aggregator import BAR_COLUMNS, RESOLUTIONS, bar_prefix
+
+
+BAR_PREFIXES = tuple(bar_prefix(res) for res in RESOLUTIONS)
+
+
+def write_bars(bars_by_res: dict):
+    """Persist drained bars, one dataset per resolution, tagged with this writer."""
+    for res, bars in bars_by_res.items():
+        df = pl.DataFrame(bars).select(BAR_COLUMNS)
+        write_parquet_batch(df.with_columns(pl.lit(WRITER_ID).alias("writer")), prefix=bar_prefix(res))
+
+
+# ============================================================
+#                 BATCH BARS (REBUILD FROM RAW TRADES)
+# ============================================================
+def build_bars(trades: pl.DataFrame, resolution: str) -> pl.DataFrame:
+    """Vectorized bars from a trade frame (same schema as the live bars)."""
+    length = RESOLUTIONS[resolution]
+    buy_qty = pl.when(pl.col("is_buyer_maker")).then(0.0).otherwise(pl.col("qty"))
+
+    return (
+        trades.sort("trade_time")
+        .with_columns(
+            (pl.col("trade_time") - pl.col("trade_time") % length).alias("bar_time"),
+            (pl.col("price") * pl.col("qty")).alias("quote"),
+            buy_qty.alias("buy_qty"),
+        )
+        .group_by("bar_time", maintain_order=True)
+        .agg(
+            pl.col("price").first().alias("open"),
+            pl.col("price").max().alias("high"),
+            pl.col("price").min().alias("low"),
+            pl.col("price").last().alias("close"),
+            pl.col("qty").sum().alias("volume"),
+            pl.col("quote").sum().alias("quote_volume"),
+            pl.col("buy_qty").sum().alias("buy_volume"),
+            (pl.col("qty").sum() - pl.col("buy_qty").sum()).alias("sell_volume"),
+            pl.len().cast(pl.Int64).alias("trades"),
+            pl.col("trade_time").min().alias("first_trade_time"),
+            pl.col("trade_time").max().alias("last_trade_time"),
+        )
+        .with_columns((pl.col("quote_volume") / pl.col("volume")).alias("vwap"))
+        .select(BAR_COLUMNS)
+    )
+
+
+# ============================================================
+#                 MERGE PARTIAL BARS
+# ============================================================
+# One writer can emit several parts for a bucket: the closed bar, correction
+# bars from late trades and partial bars flushed on shutdown. They hold
+# disjoint trades and add up. Redundant ingesters each write the full bar
+# for the same trades, so across writers one bar is kept, never summed.
+def _with_bar_columns(lf):
+    """Fill columns older bar files lack: no trade times (count as bar_time), no writer."""
+    names = lf.collect_schema().names()
+    missing = [
+        pl.lit(None, pl.Int64).alias(c) for c in ("first_trade_time", "last_trade_time") if c not in names
+    ]
+    if "writer" not in names:
+        missing.append(pl.lit(None, pl.String).alias("writer"))
+    return lf.with_columns(missing).with_columns(
+        pl.coalesce("first_trade_time", "bar_time").alias("first_trade_time"),
+        pl.coalesce("last_trade_time", "bar_time").alias("last_trade_time"),
+        pl.col("writer").fill_null(""),
+    )
+
+
+def merge_bar_parts(lf):
+    """
+    One bar per (bucket, writer): parts summed, open/close from the parts
+    with the earliest/latest trade (not file order). Used by `load_bars`
+    and by compaction, which keeps the writers apart.
+    """
+    return (
+        _with_bar_columns(lf)
+        .group_by("bar_time", "writer", maintain_order=True)
+        .agg(
+            pl.col("open").sort_by("first_trade_time", maintain_order=True).first(),
+            pl.col("high").max(),
+            pl.col("low").min(),
+            pl.col("close").sort_by("last_trade_time", maintain_order=True).last(),
+            pl.col("volume").sum(),
+            pl.col("quote_volume").sum(),
+            pl.col("buy_volume").sum(),
+            pl.col("sell_volume").sum(),
+            pl.col("trades").sum(),
+            pl.col("first_trade_time").min(),
+            pl.col("last_trade_time").max(),
+        )
+        .with_columns((pl.col("quote_volume") / pl.col("volume")).alias("vwap"))
+        .select(*BAR_COLUMNS, "writer")
+    )
+
+
+def pick_bars(lf):
+    """One bar per bucket: the most complete writer's (most trades, then latest trade)."""
+    return (
+        lf.sort("bar_time", "trades", "last_trade_time", maintain_order=True)
+        .group_by("bar_time", maintain_order=True)
+        .last()
+        .select(BAR_COLUMNS)
+    )
+
+
+# ============================================================
+#                 LOAD BARS
+# ============================================================
+def load_bars(resolution: str, since_ms: int = None):
+    """
+    Load one bar dataset: partial/correction bars of one writer are merged
+    (see `merge_bar_parts`), and one writer's bar is kept per bucket. Bars
+    written before trade times were recorded count as trading at their bar
+    time; bars without a writer tag count as one writer.
+    """
+    keys = list_batches(bar_prefix(resolution), since_ms)
+    if not keys:
+        return None
+
+    storage = get_storage()
+    lf = pl.concat([storage.scan_parquet(k) for k in keys], how="diagonal_relaxed")
+    if since_ms is not None:
+        lf = lf.filter(pl.col("bar_time") >= since_ms)
+
+    df = pick_bars(merge_bar_parts(lf)).collect()
+    return df if df.height else None
+
+
+def pick_resolution(window_seconds: int, max_bars: int = 2000) -> str:
+    """Finest resolution that covers the window in at most `max_bars` bars."""
+    for res, length in RESOLUTIONS.items():
+        if window_seconds * 1000 / length <= max_bars:
+            return res
+    return list(RESOLUTIONS)[-1]
+
+
+def rebuild_bars(trades: pl.DataFrame):
+    """One-off: write bar datasets for trades ingested before bars existed."""
+    for res in RESOLUTIONS:
+        df = build_bars(trades, res).with_columns(pl.lit(WRITER_ID).alias("writer"))
+        write_parquet_batch(df, prefix=bar_prefix(res))
+
+
+# ============================================================
+#                      DEBUG / TERMINAL MODE
+# ============================================================
+if __name__ == "__main__":
+    from src.process import load_all_trades
+
+    trades = load_all_trades()
+    if trades is None:
+        print("No trade data found.")
+    else:
+        rebuild_bars(trades)
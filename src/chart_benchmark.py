@@ -0,0 +1,110 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import polars as pl
+import pyarrow as pa
+
+# Allow `python src/chart_benchmark.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.process import build_price_series, load_all_trades
+from src.process_depth import build_imbalance_series, build_orderbook_heatmap, load_depth
+
+# ============================================================
+#                 PER-REFRESH CHART PATHS
+# ============================================================
+# Both paths start from the same Polars computation and end where
+# Streamlit does: an Arrow table to serialize to the browser.
+#   pandas  the previous path: ns datetimes, `.to_pandas()`, `set_index`
+#           in the dashboard, and (heatmap) a Styler gradient, then
+#           Streamlit's `pa.Table.from_pandas`
+#   arrow   the chart functions' Polars frames handed over as Arrow
+#           (`to_arrow` shares the Polars buffers)
+
+
+def pandas_series(df: pl.DataFrame, columns: list) -> pa.Table:
+    frame = df.with_columns(pl.col("ts").cast(pl.Datetime("ns"))).to_pandas()
+    return pa.Table.from_pandas(frame.set_index("ts")[columns])
+
+
+def pandas_heatmap(df: pl.DataFrame) -> pa.Table:
+    """Previous heatmap path: per-level Python records, pandas, Styler gradients."""
+    latest = df.tail(1).to_dicts()[0]
+    bids, asks = latest["bids"][:5], latest["asks"][:5]
+    max_bid = max(float(s) for _, s in bids)
+    max_ask = max(float(s) for _, s in asks)
+    records = (
+        [{"price": float(p), "bid_size": float(s), "ask_size": 0.0,
+          "bid_norm": float(s) / max_bid, "ask_norm": 0.0} for p, s in bids]
+        + [{"price": float(p), "bid_size": 0.0, "ask_size": float(s),
+            "bid_norm": 0.0, "ask_norm": float(s) / max_ask} for p, s in asks]
+    )
+    frame = pl.DataFrame(records).sort("price").to_pandas()
+    try:
+        import matplotlib  # noqa: F401  (Styler gradients need it)
+        frame.style.background_gradient(subset=["bid_norm"], cmap="Greens") \
+            .background_gradient(subset=["ask_norm"], cmap="Reds")._compute()
+    except ImportError:
+        pass
+    return pa.Table.from_pandas(frame)
+
+
+def measure(fn, repeat: int) -> dict:
+    """Median wall time and Python/NumPy heap peak (tracemalloc) of one refresh."""
+    fn()  # warm-up
+    times, peaks = [], []
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        table = fn()
+        times.append((time.perf_counter() - started) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+    return {"ms": statistics.median(times), "heap_kb": statistics.median(peaks),
+            "arrow_kb": table.nbytes / 1024}
+
+
+# ============================================================
+#                 REPORT
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="Chart data path: pandas vs Arrow")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--window", type=int, default=300, help="chart window (seconds)")
+    parser.add_argument("--points", type=int, default=None,
+                        help="max chart points (default: LTTB default; 0 = every row)")
+    args = parser.parse_args()
+
+    trades, depth = load_all_trades(), load_depth()
+    if trades is None or depth is None:
+        print("Need both trades and depth data.")
+        return
+
+    kw = {} if args.points is None else {"max_points": args.points or None}
+    price = build_price_series(trades, args.window, **kw)
+    imbalance = build_imbalance_series(depth, args.window, **kw)
+
+    cases = {
+        "price": (lambda: pandas_series(price, ["price"]), lambda: price.to_arrow()),
+        "imbalance": (lambda: pandas_series(imbalance, ["imbalance", "spread"]),
+                      lambda: imbalance.to_arrow()),
+        "heatmap": (lambda: pandas_heatmap(depth), lambda: build_orderbook_heatmap(depth).to_arrow()),
+    }
+
+    print(f"{'chart':<10} {'path':<7} {'rows':>6} {'ms':>8} {'heap peak':>11} {'arrow out':>11}")
+    for name, (old, new) in cases.items():
+        for path, fn in (("pandas", old), ("arrow", new)):
+            m = measure(fn, args.repeat)
+            rows = fn().num_rows
+            print(f"{name:<10} {path:<7} {rows:>6} {m['ms']:>8.3f} "
+                  f"{m['heap_kb']:>9.1f}KB {m['arrow_kb']:>9.1f}KB")
+    print(f"(medians of {args.repeat} refreshes; heap = Python/NumPy allocations, "
+          "Polars/Arrow buffers are reported as output size)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+from collections import defaultdict
+
+import polars as pl
+
+# Allow `python src/compact.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bars import BAR_PREFIXES, merge_bar_parts
+from src.process import dedup_trades
+from src.process_depth import dedup_depth
+from src.storage import get_storage
+from src.store import COMPACT_BUCKET_SECONDS, file_timestamp, list_batches, read_key, time_range_metadata
+
+DEDUP = {
+    "trades": dedup_trades,
+    "depth": dedup_depth,
+    **{prefix: merge_bar_parts for prefix in BAR_PREFIXES},
+}
+TIME_COLUMN = {
+    "trades": "trade_time",
+    "depth": "event_time",
+    **{prefix: "bar_time" for prefix in BAR_PREFIXES},
+}
+
+
+# ============================================================
+#                 FILE BUCKETING
+# ============================================================
+def closed_buckets(prefix: str, now: float = None):
+    """Group files into hourly buckets, skipping the still-open hour."""
+    now = time.time() if now is None else now
+    current = int(now) // COMPACT_BUCKET_SECONDS * COMPACT_BUCKET_SECONDS
+
+    buckets = defaultdict(list)
+    for f in list_batches(prefix):
+        bucket = file_timestamp(f) // COMPACT_BUCKET_SECONDS * COMPACT_BUCKET_SECONDS
+        if bucket < current:
+            buckets[bucket].append(f)
+    return buckets
+
+
+# ============================================================
+#                 COMPACTION (MERGE + DEDUP)
+# ============================================================
+def compact_bucket(prefix: str, bucket: int, files: list):
+    """Merge one hour of small files into a single deduplicated file."""
+    target = f"{prefix}_{bucket}_compacted.parquet"
+    if files == [target]:
+        return 0
+
+    storage = get_storage()
+    df = pl.concat([read_key(storage, f) for f in files], how="diagonal_relaxed")
+    before = df.height
+    df = DEDUP[prefix](df)
+
+    storage.write_parquet(target, df, metadata=time_range_metadata(df, TIME_COLUMN[prefix]))
+    for f in files:
+        if f != target:
+            storage.delete(f)
+
+    print(f"Compacted {len(files)} {prefix} files → {target} "
+          f"({before - df.height} duplicates dropped)")
+    return len(files)
+
+
+def run_compaction(prefixes=("trades", "depth", *BAR_PREFIXES)):
+    for prefix in prefixes:
+        for bucket, files in sorted(closed_buckets(prefix).items()):
+            compact_bucket(prefix, bucket, sorted(files))
+
+
+# ============================================================
+#                      DEBUG / TERMINAL MODE
+# ============================================================
+if __name__ == "__main__":
+    run_compaction()
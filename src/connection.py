@@ -0,0 +1,131 @@
+import asyncio
+import json
+import random
+import signal
+import time
+
+import websockets
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+# ============================================================
+#                 CONNECTION SETTINGS
+# ============================================================
+PING_INTERVAL = 20          # seconds between client pings
+PING_TIMEOUT = 20           # no pong within this → connection is dead
+RECV_TIMEOUT = 30           # no message within this → connection is dead
+BACKOFF_INITIAL = 1         # seconds
+BACKOFF_MAX = 60            # seconds
+
+# Binance drops every connection after 24h. Rotate a bit earlier so the
+# new socket is already streaming when the old one goes away.
+MAX_CONNECTION_AGE = 23 * 3600 + 50 * 60
+
+
+# ============================================================
+#                 RESILIENT STREAM CONNECTION
+# ============================================================
+class StreamConnection:
+    """
+    Keep a Binance websocket stream alive and yield decoded messages.
+
+    - reconnects with exponential backoff (+ jitter) on any failure
+    - ping/pong liveness via websockets, plus a receive timeout
+    - rotates the connection before Binance's 24h forced disconnect,
+      opening the new socket before closing the old one
+    - `stop()` ends the message loop cleanly (used on SIGTERM)
+
+    Gap detection is left to the caller, which knows the ID fields.
+    """
+
+    def __init__(self, url: str, name: str = "stream"):
+        self.url = url
+        self.name = name
+        self._ws = None
+        self._stopped = asyncio.Event()
+        self._connected_at = 0.0
+        self.last_message_bytes = 0  # raw size of the latest message
+
+    def stop(self):
+        self._stopped.set()
+        if self._ws is not None:
+            asyncio.ensure_future(self._ws.close())
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    async def _connect(self):
+        """Open a connection, retrying with exponential backoff."""
+        delay = BACKOFF_INITIAL
+        while not self.stopped:
+            try:
+                ws = await websockets.connect(
+                    self.url,
+                    ping_interval=PING_INTERVAL,
+                    ping_timeout=PING_TIMEOUT,
+                )
+                print(f"[{self.name}] Connected to {self.url}")
+                return ws
+            except (OSError, asyncio.TimeoutError, InvalidHandshake) as e:
+                wait = min(delay, BACKOFF_MAX) * (0.5 + random.random() / 2)
+                print(f"[{self.name}] Connect failed ({e}); retrying in {wait:.1f}s")
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                delay *= 2
+        return None
+
+    async def _rotate(self):
+        """Swap in a fresh connection before closing the aging one."""
+        new_ws = await self._connect()
+        old_ws, self._ws = self._ws, new_ws
+        self._connected_at = time.time()
+        if old_ws is not None:
+            await old_ws.close()
+        print(f"[{self.name}] Rotated connection (24h limit)")
+
+    async def messages(self):
+        """Async generator of decoded JSON messages, across reconnects."""
+        while not self.stopped:
+            if self._ws is None:
+                self._ws = await self._connect()
+                self._connected_at = time.time()
+                if self._ws is None:
+                    break
+
+            if time.time() - self._connected_at >= MAX_CONNECTION_AGE:
+                await self._rotate()
+                continue
+
+            try:
+                msg = await asyncio.wait_for(self._ws.recv(), timeout=RECV_TIMEOUT)
+            except (ConnectionClosed, asyncio.TimeoutError, OSError) as e:
+                if not self.stopped:
+                    print(f"[{self.name}] Connection lost ({type(e).__name__}); reconnecting")
+                await self._close_quietly()
+                continue
+
+            self.last_message_bytes = len(msg)
+            yield json.loads(msg)
+
+        await self._close_quietly()
+
+    async def _close_quietly(self):
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            try:
+                await ws.close()
+            except Exception:
+                pass
+
+
+def install_shutdown_handlers(conn: StreamConnection):
+    """Stop the stream on SIGTERM/SIGINT so callers can flush buffers."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, conn.stop)
+        except (NotImplementedError, RuntimeError):
+            # Windows event loops do not support signal handlers
+            pass
@@ -0,0 +1,99 @@
+import numpy as np
+import polars as pl
+
+# Default point budget for dashboard charts: far more than a chart can
+# show at typical widths, far less than a busy 5-minute trade window.
+MAX_CHART_POINTS = 1500
+
+
+# ============================================================
+#          LARGEST-TRIANGLE-THREE-BUCKETS (LTTB)
+# ============================================================
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the `n_out` points LTTB keeps. First and last points are
+    always kept; every bucket in between keeps the point forming the
+    largest triangle with the previously kept point and the average of
+    the next bucket. Work per bucket is vectorized in NumPy.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+
+    return out
+
+
+# ============================================================
+#                 MIN/MAX BUCKETING
+# ============================================================
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the min and max of each of `n_out // 2` equal-count buckets
+    (plus the endpoints). Cheaper than LTTB and preserves every spike.
+    """
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    size = -(-n // n_buckets)  # ceil
+    pad = n_buckets * size - n
+    padded = np.pad(y.astype(np.float64), (0, pad), mode="edge").reshape(n_buckets, size)
+
+    base = np.arange(n_buckets) * size
+    lo = np.minimum(base + padded.argmin(axis=1), n - 1)
+    hi = np.minimum(base + padded.argmax(axis=1), n - 1)
+
+    return np.unique(np.concatenate(([0, n - 1], lo, hi)))
+
+
+# ============================================================
+#                 FRAME-LEVEL HELPER
+# ============================================================
+def downsample_frame(df: pl.DataFrame, x_col: str, y_cols: list,
+                     max_points: int = MAX_CHART_POINTS,
+                     method: str = "lttb") -> pl.DataFrame:
+    """
+    Reduce a time-sorted frame to about `max_points` rows for charting.
+    With several y columns the point budget is split between them and the
+    selected rows are unioned, so each series keeps its own shape.
+    """
+    if max_points is None or df.height <= max_points:
+        return df
+
+    x = df[x_col].to_physical().to_numpy()
+    per_col = max(max_points // len(y_cols), 3)
+
+    keep = []
+    for col in y_cols:
+        y = df[col].to_numpy()
+        if method == "minmax":
+            keep.append(minmax_indices(y, per_col))
+        else:
+            keep.append(lttb_indices(x, y, per_col))
+
+    idx = np.unique(np.concatenate(keep))
+    return df[idx]
@@ -0,0 +1,188 @@
+import os
+import sys
+import polars as pl
+
+# Allow `python src/features.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.process import FLOW_WINDOWS
+from src.process_depth import compute_book_features, level_expr, load_depth
+from src.query import trades as query_trades
+
+# ============================================================
+#                 FEATURE SETTINGS
+# ============================================================
+# A trade is matched to the prevailing book only if that snapshot is at
+# most this old (depth arrives every 100ms; older means a depth gap).
+QUOTE_TOLERANCE_MS = 2_000
+
+
+# ============================================================
+#                 TOP OF BOOK (AS-OF JOIN SIDE)
+# ============================================================
+def top_of_book_frame(depth: pl.DataFrame) -> pl.DataFrame:
+    """Best bid/ask/mid per snapshot, keyed by `book_time`, sorted."""
+    return (
+        depth.select(
+            pl.col("event_time").alias("book_time"),
+            level_expr("bids", 0, 0).alias("bid_price"),
+            level_expr("bids", 0, 1).alias("bid_size"),
+            level_expr("asks", 0, 0).alias("ask_price"),
+            level_expr("asks", 0, 1).alias("ask_size"),
+        )
+        .drop_nulls()
+        .with_columns(((pl.col("bid_price") + pl.col("ask_price")) / 2).alias("mid_price"))
+        .sort("book_time")
+    )
+
+
+# ============================================================
+#                 TRADE-LEVEL FEATURES
+# ============================================================
+def trade_features(trades: pl.DataFrame, depth: pl.DataFrame,
+                   windows: dict = FLOW_WINDOWS) -> pl.DataFrame:
+    """
+    Each trade joined (as-of, backward) to the book prevailing when it
+    printed, in one vectorized pass:
+
+      side                  +1 buyer-initiated / -1 seller-initiated (exchange flag)
+      lee_ready_side        quote rule vs mid, tick rule at the mid (for
+                            data without the exchange flag, and as a check)
+      effective_spread_bps  2 * side * (price - mid) / mid
+      quote_age_ms          trade time - book snapshot time
+      signed_qty_<w>        trailing net aggressor volume, (t - w, t]
+      volume_<w>, trades_<w>
+    """
+    tob = top_of_book_frame(depth)
+
+    t = (
+        trades.sort("trade_time")
+        .with_columns(
+            pl.when(pl.col("is_buyer_maker")).then(-1).otherwise(1).cast(pl.Int8).alias("side")
+        )
+        .join_asof(tob, left_on="trade_time", right_on="book_time",
+                   strategy="backward", tolerance=QUOTE_TOLERANCE_MS)
+    )
+
+    quote_side = (pl.col("price") - pl.col("mid_price")).sign()
+    tick_side = pl.col("price").diff().sign().replace(0, None).forward_fill()
+
+    t = t.with_columns(
+        pl.when(quote_side != 0).then(quote_side).otherwise(tick_side)
+        .cast(pl.Int8).alias("lee_ready_side"),
+        (2 * pl.col("side") * (pl.col("price") - pl.col("mid_price"))
+         / pl.col("mid_price") * 1e4).alias("effective_spread_bps"),
+        (pl.col("trade_time") - pl.col("book_time")).alias("quote_age_ms"),
+        (pl.col("side") * pl.col("qty")).alias("signed_qty"),
+    )
+
+    rolling = []
+    for name, ms in windows.items():
+        by = dict(by="trade_time", window_size=f"{ms}i")
+        rolling += [
+            pl.col("signed_qty").rolling_sum_by(**by).alias(f"signed_qty_{name}"),
+            pl.col("qty").rolling_sum_by(**by).alias(f"volume_{name}"),
+            pl.col("qty").is_not_null().cast(pl.Int64).rolling_sum_by(**by).alias(f"trades_{name}"),
+        ]
+    return t.with_columns(rolling)
+
+
+# ============================================================
+#                 SNAPSHOT-LEVEL FEATURES
+# ============================================================
+def _cumulative_flow(trades: pl.DataFrame) -> pl.DataFrame:
+    """Running totals per trade; a window sum is the difference of two as-of lookups."""
+    buy = ~pl.col("is_buyer_maker")
+    return (
+        trades.sort("trade_time")
+        .select(
+            "trade_time",
+            pl.col("qty").cum_sum().alias("cum_volume"),
+            pl.when(buy).then(pl.col("qty")).otherwise(0.0).cum_sum().alias("cum_buy_volume"),
+            buy.cast(pl.Int64).cum_sum().alias("cum_buys"),
+            (~buy).cast(pl.Int64).cum_sum().alias("cum_sells"),
+        )
+    )
+
+
+def book_features(depth: pl.DataFrame, trades: pl.DataFrame,
+                  windows: dict = FLOW_WINDOWS) -> pl.DataFrame:
+    """
+    Multi-level book features per depth snapshot plus the trade flow of
+    the trailing windows (t - w, t] before it:
+
+      buy_volume_<w>, sell_volume_<w>, net_flow_<w> (buy - sell volume)
+      flow_imbalance_<w>   net flow / volume, in [-1, 1]
+      buy_sell_ratio_<w>   buy / sell trade counts (as compute_buy_sell_ratio)
+      trades_<w>
+    """
+    book = compute_book_features(depth.sort("event_time"))
+    cum = _cumulative_flow(trades)
+    cum_cols = [c for c in cum.columns if c != "trade_time"]
+
+    def flow_at(offset_ms: int, suffix: str) -> pl.DataFrame:
+        """Running totals as of `event_time - offset_ms` (0 before the first trade)."""
+        return (
+            book.select("event_time", (pl.col("event_time") - offset_ms).alias("_at"))
+            .join_asof(cum, left_on="_at", right_on="trade_time", strategy="backward")
+            .select(pl.col(cum_cols).fill_null(0).name.suffix(suffix))
+        )
+
+    now = flow_at(0, "")
+    out = [book, now]
+    for name, ms in windows.items():
+        start = flow_at(ms, "_start")
+        w = pl.concat([now, start], how="horizontal")
+
+        volume = pl.col("cum_volume") - pl.col("cum_volume_start")
+        buy_volume = pl.col("cum_buy_volume") - pl.col("cum_buy_volume_start")
+        buys = pl.col("cum_buys") - pl.col("cum_buys_start")
+        sells = pl.col("cum_sells") - pl.col("cum_sells_start")
+
+        out.append(w.select(
+            buy_volume.alias(f"buy_volume_{name}"),
+            (volume - buy_volume).alias(f"sell_volume_{name}"),
+            (2 * buy_volume - volume).alias(f"net_flow_{name}"),
+            ((2 * buy_volume - volume) / volume).fill_nan(None).alias(f"flow_imbalance_{name}"),
+            (buys / pl.max_horizontal(sells, 1)).alias(f"buy_sell_ratio_{name}"),
+            (buys + sells).alias(f"trades_{name}"),
+        ))
+
+    return pl.concat(out, how="horizontal").drop(cum_cols)
+
+
+# ============================================================
+#                 LOADERS (LIVE / OFFLINE)
+# ============================================================
+def build_feature_tables(since_ms: int = None, until_ms: int = None,
+                         windows: dict = FLOW_WINDOWS):
+    """
+    (trade table, book table) for [since_ms, until_ms). Trades start early
+    enough to fill the longest trailing window. None when either stream
+    has no data.
+    """
+    lookback = max(windows.values())
+    trades = query_trades(
+        start=None if since_ms is None else since_ms - lookback, end=until_ms,
+        columns=["trade_time", "price", "qty", "is_buyer_maker"],
+    )
+    depth = load_depth(since_ms)
+    if trades is None or depth is None:
+        return None
+    if until_ms is not None:
+        depth = depth.filter(pl.col("event_time") < until_ms)
+
+    trade_table = trade_features(trades, depth, windows)
+    if since_ms is not None:
+        trade_table = trade_table.filter(pl.col("trade_time") >= since_ms)
+    return trade_table, book_features(depth, trades, windows)
+
+
+if __name__ == "__main__":
+    tables = build_feature_tables()
+    if tables is None:
+        print("Need both trades and depth data.")
+    else:
+        trade_table, book_table = tables
+        print(trade_table.tail())
+        print(book_table.tail())
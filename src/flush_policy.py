@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+
+# ============================================================
+#          SIZE- AND TIME-BASED ADAPTIVE FLUSH POLICY
+# ============================================================
+class FlushPolicy:
+    """
+    Decide when an ingest buffer should be written: whichever comes first
+    of a row limit, a byte limit, or the age of the oldest buffered message.
+
+    The row limit adapts to the message rate: it tracks an EWMA of rows per
+    second times `max_age`, clamped to [min_rows, max_rows]. In steady
+    markets that flushes about every `max_age` seconds; a burst hits the row
+    limit early, so frames stay bounded instead of growing with the burst.
+    `run_timer` checks the policy on a clock, so quiet markets still flush
+    on age even when no message arrives; its `on_tick` hook runs other
+    clock-driven work (sealing rolled-over files) under the same lock.
+    """
+
+    def __init__(self, max_age: float = 5.0, max_rows: int = 50_000,
+                 max_bytes: int = 8 * 1024 * 1024, min_rows: int = 100,
+                 rate_alpha: float = 0.3):
+        self.max_age = max_age
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.min_rows = min_rows
+        self.rate_alpha = rate_alpha
+
+        self.row_limit = max_rows
+        self.rate = None             # EWMA rows/second
+        self.rows = 0
+        self.bytes = 0
+        self.oldest = None           # arrival time of oldest buffered row
+        self._window_start = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def record(self, n_bytes: int = 0, rows: int = 1):
+        if self.oldest is None:
+            self.oldest = time.monotonic()
+        self.rows += rows
+        self.bytes += n_bytes
+
+    def should_flush(self, now: float = None) -> bool:
+        if self.rows == 0:
+            return False
+        now = time.monotonic() if now is None else now
+        return (
+            self.rows >= self.row_limit
+            or self.bytes >= self.max_bytes
+            or now - self.oldest >= self.max_age
+        )
+
+    def flushed(self, now: float = None):
+        """Reset counters and re-fit the row limit to the observed rate."""
+        now = time.monotonic() if now is None else now
+        elapsed = max(now - self._window_start, 1e-3)
+        rate = self.rows / elapsed
+        self.rate = rate if self.rate is None else (
+            self.rate_alpha * rate + (1 - self.rate_alpha) * self.rate
+        )
+        self.row_limit = int(min(max(self.rate * self.max_age, self.min_rows), self.max_rows))
+
+        self.rows = self.bytes = 0
+        self.oldest = None
+        self._window_start = now
+
+    async def maybe_flush(self, flush, force: bool = False):
+        """Run `flush()` (sync or async) if due; serialized between callers."""
+        async with self._lock:
+            if force or self.should_flush():
+                result = flush()
+                if asyncio.iscoroutine(result):
+                    await result
+                self.flushed()
+
+    async def run_timer(self, flush, tick: float = 0.25, on_tick=None):
+        """Flush on age independently of message arrival; then run `on_tick()`, if given."""
+        while True:
+            await asyncio.sleep(tick)
+            await self.maybe_flush(flush)
+            if on_tick is not None:
+                async with self._lock:
+                    on_tick()
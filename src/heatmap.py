@@ -0,0 +1,176 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import polars as pl
+
+# Allow `python src/heatmap.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.process_depth import load_depth
+
+
+# ============================================================
+#          EXPLODE DEPTH SNAPSHOTS INTO (TIME, PRICE, SIZE)
+# ============================================================
+def explode_levels(df: pl.DataFrame, side: str, levels: int = 5):
+    """Flatten the top `levels` of one book side into NumPy columns."""
+    flat = (
+        df.select("event_time", pl.col(side).list.head(levels))
+        .explode(side)
+        .drop_nulls(side)
+        .select(
+            "event_time",
+            pl.col(side).list.get(0).cast(pl.Float64).alias("price"),
+            pl.col(side).list.get(1).cast(pl.Float64).alias("size"),
+        )
+    )
+    return (
+        flat["event_time"].to_numpy(),
+        flat["price"].to_numpy(),
+        flat["size"].to_numpy(),
+    )
+
+
+# ============================================================
+#          INCREMENTAL TIME × PRICE LIQUIDITY GRID
+# ============================================================
+class LiquidityHeatmap:
+    """
+    Bookmap-style liquidity grid over the last `window_seconds`.
+
+    Rows are price bins of width `price_bin`, columns are time buckets of
+    `time_bucket_ms`. Resting size is accumulated per cell with `np.add.at`
+    (sums + snapshot counts, so a partially-filled last column can keep
+    receiving snapshots). Each `update` only bins the new snapshots,
+    appends columns and drops columns that left the window.
+    """
+
+    def __init__(self, window_seconds: int = 600, time_bucket_ms: int = 1000,
+                 price_bin: float = 0.5, levels: int = 5):
+        self.window_cols = window_seconds * 1000 // time_bucket_ms
+        self.time_bucket_ms = time_bucket_ms
+        self.price_bin = price_bin
+        self.levels = levels
+
+        self.col0 = None            # absolute time-bucket index of column 0
+        self.row0 = None            # absolute price-bin index of row 0
+        self.bid = np.zeros((0, 0))
+        self.ask = np.zeros((0, 0))
+        self.counts = np.zeros(0)   # snapshots per column
+        self.last_event_time = None
+
+    def _grow(self, row_lo, row_hi, col_lo, col_hi):
+        """Pad the grid so it covers rows [row_lo, row_hi) and cols < col_hi."""
+        if self.col0 is None:
+            self.col0, self.row0 = col_lo, row_lo
+            self.bid = np.zeros((row_hi - row_lo, 1))
+            self.ask = np.zeros_like(self.bid)
+            self.counts = np.zeros(1)
+
+        n_rows, n_cols = self.bid.shape
+        top = max(self.row0 - row_lo, 0)
+        bottom = max(row_hi - (self.row0 + n_rows), 0)
+        right = max(col_hi - (self.col0 + n_cols), 0)
+
+        if top or bottom or right:
+            pad = ((top, bottom), (0, right))
+            self.bid = np.pad(self.bid, pad)
+            self.ask = np.pad(self.ask, pad)
+            self.counts = np.pad(self.counts, (0, right))
+            self.row0 -= top
+
+    def _trim(self):
+        """Drop columns outside the window and price rows left empty."""
+        extra = self.bid.shape[1] - self.window_cols
+        if extra > 0:
+            self.bid = self.bid[:, extra:]
+            self.ask = self.ask[:, extra:]
+            self.counts = self.counts[extra:]
+            self.col0 += extra
+
+        used = np.flatnonzero((self.bid > 0).any(axis=1) | (self.ask > 0).any(axis=1))
+        if used.size:
+            lo, hi = used[0], used[-1] + 1
+            self.bid = self.bid[lo:hi]
+            self.ask = self.ask[lo:hi]
+            self.row0 += lo
+
+    def update(self, depth: pl.DataFrame):
+        """Bin snapshots newer than the last update into the grid."""
+        if depth is None or depth.height == 0:
+            return
+        if self.last_event_time is not None:
+            depth = depth.filter(pl.col("event_time") > self.last_event_time)
+            if depth.height == 0:
+                return
+
+        # a first (or very late) update may span more than the window
+        first_col = int(depth["event_time"].max()) // self.time_bucket_ms - self.window_cols + 1
+        depth = depth.filter(pl.col("event_time") >= first_col * self.time_bucket_ms)
+        if self.col0 is not None and first_col >= self.col0 + self.bid.shape[1]:
+            self.col0 = None  # after a long gap nothing binned so far is in the window
+
+        bid_t, bid_p, bid_s = explode_levels(depth, "bids", self.levels)
+        ask_t, ask_p, ask_s = explode_levels(depth, "asks", self.levels)
+        snap_cols = depth["event_time"].to_numpy() // self.time_bucket_ms
+
+        bid_rows = np.floor(bid_p / self.price_bin).astype(np.int64)
+        ask_rows = np.floor(ask_p / self.price_bin).astype(np.int64)
+        all_rows = np.concatenate((bid_rows, ask_rows))
+        self._grow(int(all_rows.min()), int(all_rows.max()) + 1,
+                   int(snap_cols.min()), int(snap_cols.max()) + 1)
+
+        np.add.at(self.bid, (bid_rows - self.row0, bid_t // self.time_bucket_ms - self.col0), bid_s)
+        np.add.at(self.ask, (ask_rows - self.row0, ask_t // self.time_bucket_ms - self.col0), ask_s)
+        np.add.at(self.counts, snap_cols - self.col0, 1)
+
+        self.last_event_time = int(depth["event_time"].max())
+        self._trim()
+
+    def grid(self):
+        """
+        Mean resting size per cell.
+        Returns dict(times=ms per column, prices=bin floor per row, bid, ask,
+        price_bin=row height).
+        """
+        n_rows, n_cols = self.bid.shape
+        counts = np.where(self.counts > 0, self.counts, 1)
+        return {
+            "times": (self.col0 + np.arange(n_cols)) * self.time_bucket_ms if n_cols else np.zeros(0),
+            "prices": (self.row0 + np.arange(n_rows)) * self.price_bin if n_rows else np.zeros(0),
+            "bid": self.bid / counts,
+            "ask": self.ask / counts,
+            "price_bin": self.price_bin,
+        }
+
+
+# ============================================================
+#          SHARED, INCREMENTALLY REFRESHED INSTANCES
+# ============================================================
+_HEATMAPS = {}
+_LOCK = threading.Lock()
+
+
+def refresh_liquidity_heatmap(window_seconds: int = 600, time_bucket_ms: int = 1000,
+                              price_bin: float = 0.5, levels: int = 5):
+    """
+    Process-wide heatmap for these parameters (shared by all dashboard
+    sessions). Each call reads only depth files newer than the last
+    snapshot already binned.
+    """
+    key = (window_seconds, time_bucket_ms, price_bin, levels)
+    with _LOCK:
+        hm = _HEATMAPS.get(key)
+        if hm is None:
+            hm = _HEATMAPS[key] = LiquidityHeatmap(*key)
+
+        if hm.last_event_time is None:
+            since_ms = int(time.time() * 1000) - window_seconds * 1000
+        else:
+            since_ms = hm.last_event_time + 1
+
+        hm.update(load_depth(since_ms=since_ms))
+        return hm.grid()
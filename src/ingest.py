@@ -1,42 +1,141 @@
 import asyncio
-import websockets
-import json
-import polars as pl
-import time
-from store import write_parquet_batch
+import os
+import sys
 
-STREAM_URL = "wss://stream.binance.com:9443/ws/btcusdt@trade"
+# Allow `python src/ingest.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.backfill import backfill_trades
+from src.bar_aggregator import BarAggregator
+from src.connection import StreamConnection, install_shutdown_handlers
+from src.flush_policy import FlushPolicy
+from src.ingest_writer import close_writers, preload, seal_due_writers, write_bars, write_gaps, write_rows
+
+SYMBOL = "BTCUSDT"
+STREAM_URL = f"wss://stream.binance.com:9443/ws/{SYMBOL.lower()}@trade"
 
 BUFFER = []
-FLUSH_INTERVAL = 5  # seconds
+FLUSH_INTERVAL = 5  # seconds: max age of buffered trades
+FLUSH_POLICY = FlushPolicy(max_age=FLUSH_INTERVAL, max_rows=50_000, max_bytes=8 * 1024 * 1024)
+BARS = BarAggregator()
 
+# Gap detection (Binance trade IDs are consecutive per symbol)
+LAST_TRADE_ID = None
+LAST_TRADE_TIME = None
+PENDING_GAPS = []       # detected, backfill not started yet
+BACKFILLED_GAPS = []    # backfill done, gap record written with the next flush
+BACKFILL_TASKS = set()
+
+
+def check_trade_sequence(trade_id: int, trade_time: int) -> bool:
+    """
+    Track trade IDs and queue a gap whenever IDs skip ahead.
+    Returns False for already-seen trades (e.g. overlap after rotation).
+    """
+    global LAST_TRADE_ID, LAST_TRADE_TIME
+
+    if LAST_TRADE_ID is not None:
+        if trade_id <= LAST_TRADE_ID:
+            return False
+        if trade_id > LAST_TRADE_ID + 1:
+            PENDING_GAPS.append({
+                "stream": "trades",
+                "start_time": LAST_TRADE_TIME,
+                "end_time": trade_time,
+                "first_missing_id": LAST_TRADE_ID + 1,
+                "last_missing_id": trade_id - 1,
+                "missing": trade_id - LAST_TRADE_ID - 1,
+                "backfilled": 0,
+            })
+
+    LAST_TRADE_ID = trade_id
+    LAST_TRADE_TIME = trade_time
+    return True
+
+
+def add_trade(row: dict):
+    BUFFER.append(row)
+    BARS.add_trade(row["trade_time"], row["price"], row["qty"], row["is_buyer_maker"])
 
-async def read_stream():
-    global BUFFER
-    last_flush = time.time()
 
-    async with websockets.connect(STREAM_URL) as ws:
-        print("Connected to Binance stream...")
+# ============================================================
+#          GAP BACKFILL (OFF THE FLUSH PATH)
+# ============================================================
+def schedule_backfill():
+    """
+    Backfill queued gaps in background tasks. The REST calls run outside
+    the flush lock, so flushes (and the socket loop waiting on them) never
+    stall behind them; the recovered trades join the buffer when they arrive.
+    """
+    global PENDING_GAPS
+
+    gaps, PENDING_GAPS = PENDING_GAPS, []
+    for gap in gaps:
+        task = asyncio.create_task(backfill_gap(gap))
+        BACKFILL_TASKS.add(task)
+        task.add_done_callback(BACKFILL_TASKS.discard)
+
+
+async def backfill_gap(gap: dict):
+    rows = await asyncio.to_thread(
+        backfill_trades, SYMBOL, gap["first_missing_id"], gap["last_missing_id"]
+    )
+    gap["backfilled"] = len(rows)
+    for row in rows:
+        add_trade(row)
+    if rows:
+        FLUSH_POLICY.record(rows=len(rows))
+    BACKFILLED_GAPS.append(gap)
+    print(f"Gap of {gap['missing']} trades, backfilled {len(rows)}")
+
+
+async def flush(final: bool = False):
+    """Write the buffer, bars and the records of backfilled gaps."""
+    global BUFFER, BACKFILLED_GAPS
+
+    gaps, BACKFILLED_GAPS = BACKFILLED_GAPS, []
+    if len(BUFFER) > 0:
+        write_rows(BUFFER)
+        BUFFER = []
+    write_bars(BARS.drain(include_open=final))
+    write_gaps(gaps)
+
+
+async def read_stream():
+    conn = StreamConnection(STREAM_URL, name="trades")
+    install_shutdown_handlers(conn)
+    preload()  # writer modules load while the socket connects
+    timer = asyncio.create_task(FLUSH_POLICY.run_timer(flush, on_tick=seal_due_writers))
 
-        while True:
-            msg = await ws.recv()
-            data = json.loads(msg)
+    try:
+        async for data in conn.messages():
+            if not check_trade_sequence(data["t"], data["T"]):
+                continue
 
-            BUFFER.append({
+            add_trade({
+                "trade_id": data["t"],
                 "event_time": data["E"],
                 "trade_time": data["T"],
                 "price": float(data["p"]),
                 "qty": float(data["q"]),
                 "is_buyer_maker": data["m"]
             })
+            FLUSH_POLICY.record(conn.last_message_bytes)
+            if PENDING_GAPS:
+                schedule_backfill()
 
-            # time to flush
-            if time.time() - last_flush >= FLUSH_INTERVAL:
-                if len(BUFFER) > 0:
-                    df = pl.DataFrame(BUFFER)
-                    write_parquet_batch(df)
-                    BUFFER = []
-                last_flush = time.time()
+            # size limits are checked per message; age is checked by the timer
+            if FLUSH_POLICY.should_flush():
+                await FLUSH_POLICY.maybe_flush(flush)
+    finally:
+        timer.cancel()
+        schedule_backfill()
+        await asyncio.gather(*BACKFILL_TASKS, return_exceptions=True)
+        # never lose the in-flight buffer on shutdown / crash
+        await FLUSH_POLICY.maybe_flush(lambda: flush(final=True), force=True)
+        close_writers()
+        print("Trade stream stopped, buffer flushed.")
 
 
-asyncio.run(read_stream())
+if __name__ == "__main__":
+    asyncio.run(read_stream())
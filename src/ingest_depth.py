@@ -1,38 +1,95 @@
 import asyncio
-import websockets
-import json
-import polars as pl
+import os
+import sys
 import time
-from store import write_parquet_batch
+
+# Allow `python src/ingest_depth.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.connection import StreamConnection, install_shutdown_handlers
+from src.flush_policy import FlushPolicy
+from src.ingest_writer import close_writers, preload, seal_due_writers, write_gaps, write_rows
 
 STREAM_URL = "wss://stream.binance.com:9443/ws/btcusdt@depth5@100ms"
 
 BUFFER = []
-FLUSH_INTERVAL = 5  # seconds
+FLUSH_INTERVAL = 5  # seconds: max age of buffered snapshots
+FLUSH_POLICY = FlushPolicy(max_age=FLUSH_INTERVAL, max_rows=5_000, max_bytes=8 * 1024 * 1024)
 
-async def read_depth_stream():
-    global BUFFER
-    last_flush = time.time()
+# Snapshots arrive every 100ms; anything much longer is missing data.
+# (Partial-book update IDs are not consecutive, so time is the gap signal
+# and the update IDs bound the missing interval.)
+GAP_THRESHOLD_MS = 1000
+LAST_UPDATE_ID = None
+LAST_EVENT_TIME = None
+PENDING_GAPS = []
+
+
+def check_depth_sequence(update_id: int, event_time: int) -> bool:
+    """
+    Queue a gap when snapshots stop arriving for longer than the threshold.
+    Returns False for stale/duplicate snapshots (update ID not advancing).
+    """
+    global LAST_UPDATE_ID, LAST_EVENT_TIME
+
+    if LAST_UPDATE_ID is not None:
+        if update_id <= LAST_UPDATE_ID:
+            return False
+        if event_time - LAST_EVENT_TIME > GAP_THRESHOLD_MS:
+            PENDING_GAPS.append({
+                "stream": "depth",
+                "start_time": LAST_EVENT_TIME,
+                "end_time": event_time,
+                "first_missing_id": LAST_UPDATE_ID + 1,
+                "last_missing_id": update_id - 1,
+                "missing": (event_time - LAST_EVENT_TIME) // 100 - 1,
+                "backfilled": 0,
+            })
 
-    async with websockets.connect(STREAM_URL) as ws:
-        print("Connected to Binance DEPTH stream...")
+    LAST_UPDATE_ID = update_id
+    LAST_EVENT_TIME = event_time
+    return True
+
+
+def flush():
+    global BUFFER, PENDING_GAPS
+
+    if len(BUFFER) > 0:
+        write_rows(BUFFER, prefix="depth")
+        BUFFER = []
+
+    gaps, PENDING_GAPS = PENDING_GAPS, []
+    write_gaps(gaps)
+
+
+async def read_depth_stream():
+    conn = StreamConnection(STREAM_URL, name="depth")
+    install_shutdown_handlers(conn)
+    preload()  # writer modules load while the socket connects
+    timer = asyncio.create_task(FLUSH_POLICY.run_timer(flush, on_tick=seal_due_writers))
 
-        while True:
-            msg = await ws.recv()
-            data = json.loads(msg)
+    try:
+        async for data in conn.messages():
+            event_time = int(time.time() * 1000)
+            if not check_depth_sequence(data["lastUpdateId"], event_time):
+                continue
 
             BUFFER.append({
-                "event_time": int(time.time() * 1000),
+                "event_time": event_time,
+                "last_update_id": data["lastUpdateId"],
                 "bids": data["bids"],
                 "asks": data["asks"]
             })
+            FLUSH_POLICY.record(conn.last_message_bytes)
 
-            if time.time() - last_flush >= FLUSH_INTERVAL:
-                if len(BUFFER) > 0:
-                    df = pl.DataFrame(BUFFER)
-                    write_parquet_batch(df, prefix="depth")
-                    BUFFER = []
-                last_flush = time.time()
+            if FLUSH_POLICY.should_flush():
+                await FLUSH_POLICY.maybe_flush(flush)
+    finally:
+        timer.cancel()
+        await FLUSH_POLICY.maybe_flush(flush, force=True)
+        close_writers()
+        print("Depth stream stopped, buffer flushed.")
 
 
-asyncio.run(read_depth_stream())
+if __name__ == "__main__":
+    asyncio.run(read_depth_stream())
@@ -0,0 +1,64 @@
+import sys
+import threading
+
+# ============================================================
+#          LEAN WRITER RUNTIME FOR INGEST WORKERS
+# ============================================================
+# An ingest worker only needs Polars (and `store`, which imports it) to
+# turn a flushed buffer into a file. Importing them at startup costs a few
+# hundred ms and tens of MB per process before the first message is read,
+# and the launcher starts one worker per stream. Workers import this
+# module instead: buffers stay plain lists of dicts, and the heavy modules
+# load on the first flush, or earlier in a background thread via
+# `preload()` while the socket is already streaming. PyArrow is only
+# loaded in the `arrow` and `rolling` writer modes (see store.WRITER_MODE).
+HEAVY_MODULES = ("polars", "src.store", "src.bars")
+
+_preload_thread = None
+
+
+def _load():
+    import polars  # noqa: F401
+    import src.bars  # noqa: F401  (also imports src.store)
+
+
+def preload():
+    """Start importing the writer modules in a daemon thread (idempotent)."""
+    global _preload_thread
+    if _preload_thread is None:
+        _preload_thread = threading.Thread(target=_load, name="writer-preload", daemon=True)
+        _preload_thread.start()
+
+
+def write_rows(rows: list, prefix: str = "trades"):
+    """Persist buffered rows (list of dicts) as one micro-batch."""
+    import polars as pl
+    from src.store import write_batch
+
+    write_batch(pl.DataFrame(rows), prefix)
+
+
+def write_bars(bars_by_res: dict):
+    if bars_by_res:
+        from src.bars import write_bars as _write_bars
+        _write_bars(bars_by_res)
+
+
+def write_gaps(gaps: list):
+    if gaps:
+        from src.store import record_gaps
+        record_gaps(gaps)
+
+
+def seal_due_writers():
+    """Publish rolled-over stream files between flushes (no-op until `store` is loaded)."""
+    store = sys.modules.get("src.store")
+    if store is not None:
+        store.seal_due_writers()
+
+
+def close_writers():
+    """Seal open stream files; nothing can be open if `store` was never loaded."""
+    store = sys.modules.get("src.store")
+    if store is not None:
+        store.close_writers()
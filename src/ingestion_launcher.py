@@ -6,7 +6,8 @@ processes = {}
 
 def start_ingestion():
     """
-    Launch ingest.py and ingest_depth.py in background subprocesses.
+    Launch ingest.py, ingest_depth.py, the maintenance worker
+    (compaction + retention) and the metrics API in background subprocesses.
     Prevents duplicate launches.
     """
     global processes
@@ -17,6 +18,8 @@ def start_ingestion():
     scripts = {
         "trades": os.path.join(base_dir, "src", "ingest.py"),
         "depth": os.path.join(base_dir, "src", "ingest_depth.py"),
+        "maintenance": os.path.join(base_dir, "src", "retention.py"),
+        "api": os.path.join(base_dir, "src", "api.py"),
     }
 
     for key, script in scripts.items():
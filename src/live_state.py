@@ -0,0 +1,82 @@
+import json
+import os
+import time
+
+import numpy as np
+
+# ============================================================
+#          WARM-RESTART STATE SNAPSHOT
+# ============================================================
+# The API's live analytics state is checkpointed as one .npz file:
+#   - the online predictor (weights, standardization, grading queue),
+#   - the regime filter position (probabilities, imbalance EWM),
+#   - the last published snapshot, so clients get data immediately,
+#   - the live tape's running trade totals and trade/depth marks,
+#   - the data high-water mark: event_time of the last depth tick the
+#     models consumed.
+# On restart the models resume from the snapshot. Only depth ticks after
+# the mark are replayed, instead of retraining on the whole archive, and
+# only files that can hold rows after it are read.
+STATE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "models", "live_state.npz"
+)
+STATE_VERSION = 5           # bump whenever the models' state or the snapshot schema changes
+CHECKPOINT_SECONDS = 30
+
+
+def high_water_mark(predictor, regime_filter):
+    """Latest depth event_time every stateful model has consumed (None if any is fresh)."""
+    marks = [m.last_ts for m in (predictor, regime_filter)]
+    return None if None in marks else min(marks)
+
+
+def save_live_state(predictor, regime_filter, snapshot: dict = None, tape=None, path: str = STATE_PATH):
+    """Atomic checkpoint (write temp file, then rename)."""
+    mark = high_water_mark(predictor, regime_filter)
+    arrays = {
+        "version": STATE_VERSION,
+        "saved_at": time.time(),
+        "high_water_ms": -1 if mark is None else mark,
+        "snapshot": np.array(json.dumps(snapshot)),
+    }
+    arrays.update({f"predictor.{k}": v for k, v in predictor.state().items()})
+    arrays.update({f"regime.{k}": v for k, v in regime_filter.state().items()})
+    if tape is not None:
+        arrays.update({f"tape.{k}": v for k, v in tape.state().items()})
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def load_live_state(predictor, regime_filter, tape=None, path: str = STATE_PATH):
+    """
+    Restore `predictor`, `regime_filter` and `tape` in place. Returns
+    {"high_water_ms", "saved_at", "snapshot"}, or None when there is no
+    usable state file (the models then start from their own checkpoints).
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as npz:
+            state = dict(npz)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable live state {path}: {e}")
+        return None
+    if int(state["version"]) != STATE_VERSION:
+        return None
+
+    def section(prefix):
+        return {k.removeprefix(prefix): v for k, v in state.items() if k.startswith(prefix)}
+
+    predictor.restore(section("predictor."))
+    regime_filter.restore(section("regime."))
+    mark = int(state["high_water_ms"])
+    if tape is not None:
+        tape.restore(section("tape."), None if mark < 0 else mark)
+    return {
+        "high_water_ms": None if mark < 0 else mark,
+        "saved_at": float(state["saved_at"]),
+        "snapshot": json.loads(str(state["snapshot"])),
+    }
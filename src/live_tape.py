@@ -0,0 +1,242 @@
+import os
+import sys
+import time
+
+import numpy as np
+import polars as pl
+
+# Allow `python src/live_tape.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bars import bar_prefix, merge_bar_parts, pick_bars, pick_resolution
+from src.process import dedup_trades
+from src.process_depth import dedup_depth
+from src.storage import get_storage
+from src.store import file_end_time, list_batches, read_batches, read_key
+
+# ============================================================
+#          INCREMENTAL TRADE / DEPTH WINDOWS FOR THE API
+# ============================================================
+# Every refresh reads only files that can hold rows after the last row
+# already seen (the high-water pattern of the liquidity heatmap and the
+# wall detector) and appends them to in-memory windows:
+#   trades  the last TRADE_WINDOW_MS (flow windows, 1m/5m volatility,
+#           price chart, trailing flow of new depth ticks)
+#   depth   the last DEPTH_WINDOW_MS (top of book, imbalance chart)
+#   bars    the last BAR_WINDOW_SECONDS of bars (long-horizon price chart);
+#           bar files are immutable, so only files not read yet are read,
+#           and the chart frame is rebuilt only when one arrives
+# All-history trade metrics (VWAP, buy/sell counts) are running totals
+# over the new rows, so a refresh costs the same at any archive size.
+# Trades already counted are remembered as runs of consecutive trade IDs
+# (Binance IDs have no holes), so a backfill of IDs below the newest one
+# still counts, and a re-read or duplicated trade never counts twice.
+TRADE_WINDOW_MS = 10 * 60_000
+DEPTH_WINDOW_MS = 6 * 60_000
+BAR_WINDOW_SECONDS = 24 * 3600
+BAR_RESOLUTION = pick_resolution(BAR_WINDOW_SECONDS)
+TOTALS = ("notional", "volume", "buys", "sells")
+
+
+def id_ranges(ids) -> np.ndarray:
+    """Trade IDs → (n, 2) array of inclusive runs of consecutive IDs, sorted."""
+    ids = np.unique(np.asarray(ids, dtype=np.int64))
+    if ids.size == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(ids) > 1)
+    return np.column_stack([np.r_[ids[0], ids[breaks + 1]], np.r_[ids[breaks], ids[-1]]])
+
+
+def merge_ranges(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Union of two run arrays, with touching runs joined."""
+    runs = np.concatenate([a, b])
+    if len(runs) == 0:
+        return runs
+    runs = runs[np.argsort(runs[:, 0], kind="stable")]
+    merged = [runs[0].tolist()]
+    for lo, hi in runs[1:].tolist():
+        if lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return np.array(merged, dtype=np.int64)
+
+
+def in_ranges(ids: np.ndarray, runs: np.ndarray) -> np.ndarray:
+    """Boolean mask: which IDs fall inside one of the runs."""
+    if len(runs) == 0:
+        return np.zeros(len(ids), dtype=bool)
+    i = np.searchsorted(runs[:, 0], ids, side="right") - 1
+    return (i >= 0) & (ids <= runs[np.maximum(i, 0), 1])
+
+
+def latest_file_end_ms(prefix: str):
+    """Upper bound on the newest row of a dataset, from file names only."""
+    keys = list_batches(prefix)
+    return max(file_end_time(k) for k in keys) * 1000 if keys else None
+
+
+class LiveTape:
+    """
+    Rolling trade and depth windows plus all-history trade totals,
+    advanced by `refresh()`. Trades count once per trade_id, whenever they
+    arrive (late and backfilled ones included); legacy rows without an ID
+    by trade_time. Depth advances on event_time and last_update_id.
+    """
+
+    def __init__(self):
+        self.trades = None
+        self.depth = None
+        self.totals = dict.fromkeys(TOTALS, 0.0)
+        self.trade_mark = None      # trade_time of the newest trade seen
+        self.trade_ids = id_ranges([])  # runs of trade IDs already counted
+        self.depth_mark = None      # event_time of the newest snapshot seen
+        self.depth_id = None        # highest last_update_id seen
+        self.replay_from = None     # restored high-water mark the first windows reach back to
+        self.bars = None            # per-writer merged bars of the window
+        self.bar_keys = set()       # bar files already read
+        self._bar_series = None
+
+    def state(self) -> dict:
+        """Running totals and marks (the windows are re-read on restore)."""
+        marks = {"trade_mark": self.trade_mark, "depth_id": self.depth_id}
+        return {**{k: np.float64(v) for k, v in self.totals.items()},
+                **{k: np.int64(-1 if v is None else v) for k, v in marks.items()},
+                "trade_ids": self.trade_ids}
+
+    def restore(self, state: dict, high_water_ms: int = None):
+        """
+        Resume the totals and marks; the first refresh then re-reads only
+        the recent windows, reaching back to `high_water_ms` (the last
+        depth tick the models consumed) so the models replay the gap.
+        """
+        if not state:
+            return
+        self.totals = {k: float(state[k]) for k in TOTALS}
+        for k in ("trade_mark", "depth_id"):
+            v = int(state[k])
+            setattr(self, k, None if v < 0 else v)
+        self.trade_ids = np.asarray(state["trade_ids"], dtype=np.int64).reshape(-1, 2)
+        self.replay_from = high_water_ms
+
+    def refresh(self):
+        self._refresh_trades()
+        self._refresh_depth()
+        self._refresh_bars()
+        if self.depth is not None:
+            self.replay_from = None
+
+    def _window_start(self, mark: int, window_ms: int) -> int:
+        return min(mark, self.replay_from if self.replay_from is not None else mark) - window_ms
+
+    # ---------- trades ----------
+    def _refresh_trades(self):
+        if self.trades is not None:
+            df = read_batches("trades", self.trade_mark)
+        elif self.trade_mark is None:
+            df = read_batches("trades")   # all-history totals need one full pass
+        else:
+            df = read_batches("trades", self._window_start(self.trade_mark, TRADE_WINDOW_MS))
+        if df is None:
+            return
+
+        df = dedup_trades(df)
+        new = self._new_trades(df)
+        self._add_totals(new)
+        self._set_trade_marks(new)
+
+        if self.trades is None:
+            self.trades = df.filter(pl.col("trade_time") >= self._window_start(self.trade_mark, TRADE_WINDOW_MS))
+        else:
+            rows = pl.concat([self.trades, new], how="diagonal_relaxed")
+            self.trades = rows.filter(pl.col("trade_time") >= self.trade_mark - TRADE_WINDOW_MS) \
+                .sort("trade_time")
+
+    def _new_trades(self, df: pl.DataFrame) -> pl.DataFrame:
+        """Rows not counted yet: IDs outside the counted runs, legacy rows after the mark."""
+        legacy = pl.lit(True) if self.trade_mark is None else pl.col("trade_time") > self.trade_mark
+        if "trade_id" not in df.columns:
+            return df.filter(legacy)
+        ids = df["trade_id"].fill_null(-1).to_numpy()
+        counted = pl.Series(in_ranges(ids, self.trade_ids))
+        return df.filter(pl.when(pl.col("trade_id").is_null()).then(legacy).otherwise(~counted))
+
+    def _add_totals(self, df: pl.DataFrame):
+        sells = int(df["is_buyer_maker"].sum())
+        self.totals["notional"] += float((df["price"] * df["qty"]).sum())
+        self.totals["volume"] += float(df["qty"].sum())
+        self.totals["buys"] += df.height - sells
+        self.totals["sells"] += sells
+
+    def _set_trade_marks(self, df: pl.DataFrame):
+        if df.height == 0:
+            return
+        mark = int(df["trade_time"].max())
+        self.trade_mark = mark if self.trade_mark is None else max(self.trade_mark, mark)
+        if "trade_id" in df.columns:
+            self.trade_ids = merge_ranges(self.trade_ids, id_ranges(df["trade_id"].drop_nulls().to_numpy()))
+
+    # ---------- depth ----------
+    def _refresh_depth(self):
+        if self.depth is None:
+            newest = latest_file_end_ms("depth")
+            if newest is None:
+                return
+            since = newest - DEPTH_WINDOW_MS
+            if self.replay_from is not None:
+                since = min(since, self.replay_from + 1)
+        else:
+            since = self.depth_mark + 1
+        df = read_batches("depth", since)
+        if df is None:
+            return
+
+        new = dedup_depth(df.filter(pl.col("event_time") >= since))
+        if self.depth_id is not None and "last_update_id" in new.columns:
+            # a redundant ingester's later receipt of a snapshot already seen
+            new = new.filter(pl.col("last_update_id").is_null() | (pl.col("last_update_id") > self.depth_id))
+        if new.height == 0:
+            return
+        self.depth_mark = int(new["event_time"].max())
+        if "last_update_id" in new.columns and new["last_update_id"].max() is not None:
+            self.depth_id = max(self.depth_id or 0, int(new["last_update_id"].max()))
+        rows = new if self.depth is None else pl.concat([self.depth, new], how="diagonal_relaxed")
+        self.depth = rows.filter(pl.col("event_time") >= self.depth_mark - DEPTH_WINDOW_MS)
+
+    # ---------- bars ----------
+    def _refresh_bars(self):
+        since = int((time.time() - BAR_WINDOW_SECONDS) * 1000)
+        keys = list_batches(bar_prefix(BAR_RESOLUTION), since)
+        # once running, a compacted file only holds parts already read from the files it replaced
+        new = [k for k in keys if k not in self.bar_keys
+               and (self.bars is None or not k.endswith("_compacted.parquet"))]
+        self.bar_keys = set(keys)
+        if not new:
+            return
+
+        storage = get_storage()
+        parts = [read_key(storage, k) for k in new]
+        if self.bars is not None:
+            parts.insert(0, self.bars)
+        bars = merge_bar_parts(pl.concat(parts, how="diagonal_relaxed"))
+        self.bars = bars.filter(pl.col("bar_time") >= since)
+        self._bar_series = None
+
+    def bar_series(self):
+        """Chart frame (ts, price, vwap) of the bar window; cached until a bar file arrives."""
+        if self._bar_series is None and self.bars is not None and self.bars.height:
+            self._bar_series = pick_bars(self.bars).select(
+                pl.col("bar_time").cast(pl.Datetime("ms")).alias("ts"),
+                pl.col("close").alias("price"),
+                "vwap",
+            )
+        return self._bar_series
+
+    # ---------- all-history metrics ----------
+    def vwap(self) -> float:
+        return self.totals["notional"] / self.totals["volume"] if self.totals["volume"] else float("nan")
+
+    def buy_sell_ratio(self):
+        """(buys, sells, ratio) as process.compute_buy_sell_ratio over every trade."""
+        buys, sells = int(self.totals["buys"]), int(self.totals["sells"])
+        return buys, sells, buys / max(sells, 1)
@@ -0,0 +1,149 @@
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Allow ingest scripts (run from src/) to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.storage import LocalBackend
+
+# One open Parquet file per stream per roll period; every flush becomes a
+# row group. Readers only see a file once it is sealed (footer written)
+# and published, so the roll period is also the worst-case visibility
+# delay. Rows in a file that was never sealed (killed process) are lost.
+PARQUET_ROLL_SECONDS = int(os.environ.get("PARQUET_ROLL_SECONDS", 300))
+STAGING_DIR = ".rolling"    # in-progress files, inside a local root (same filesystem)
+
+
+class RollingParquetWriter:
+    """
+    Append each flush as one row group to an open `pq.ParquetWriter`.
+
+    The file is written in a staging directory and sealed when the roll
+    period (aligned to the clock) ends, the schema changes, or on
+    `close()`. Ingesters call `seal_if_due()` from their flush timer, so a
+    quiet stream still publishes on time. It is then published as `<prefix>_<sealed_at>_<writer>-r<n>.parquet`.
+    Like a per-flush batch file it is named by its write time, so time
+    pruning and compaction treat both the same way.
+    """
+
+    def __init__(self, storage, prefix: str, writer_id: str,
+                 roll_seconds: int = PARQUET_ROLL_SECONDS):
+        self.storage = storage
+        self.prefix = prefix
+        self.writer_id = writer_id
+        self.roll_seconds = roll_seconds
+        if isinstance(storage, LocalBackend):
+            self.staging = os.path.join(storage.root, STAGING_DIR)
+        else:
+            self.staging = os.path.join(tempfile.gettempdir(), "crypto-rolling")
+        os.makedirs(self.staging, exist_ok=True)
+
+        self._seq = itertools.count()
+        self._period = None
+        self._path = None
+        self._writer = None
+        self._schema = None
+        self.row_groups = 0
+
+    def _open(self, period: int, schema: pa.Schema):
+        self._path = os.path.join(self.staging, f"{self.prefix}_{period}_{self.writer_id}.parquet.open")
+        self._writer = pq.ParquetWriter(self._path, schema, compression="zstd")
+        self._schema = schema
+        self._period = period
+        self.row_groups = 0
+
+    def _current_period(self) -> int:
+        return int(time.time()) // self.roll_seconds * self.roll_seconds
+
+    def seal_if_due(self):
+        """Seal the open file once its roll period has ended, even if no write follows."""
+        if self._writer is not None and self._current_period() != self._period:
+            self.close()
+
+    def write(self, df: pl.DataFrame):
+        table = df.to_arrow()
+        period = self._current_period()
+
+        self.seal_if_due()
+        if self._writer is not None and table.schema != self._schema:
+            try:
+                table = table.cast(self._schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError):
+                self.close()  # schema changed (e.g. new column): seal and start a new file
+        if self._writer is None:
+            self._open(period, table.schema)
+
+        self._writer.write_table(table, row_group_size=max(table.num_rows, 1))
+        self.row_groups += 1
+
+    def close(self):
+        """Seal the open file (write the footer) and publish it to readers."""
+        if self._writer is None:
+            return
+        self._writer.close()
+        key = f"{self.prefix}_{int(time.time())}_{self.writer_id}-r{next(self._seq)}.parquet"
+        self.storage.publish(key, self._path)
+        print(f"Sealed {self.row_groups} row groups → {self.storage.uri(key)}")
+        self._writer = self._path = None
+
+
+if __name__ == "__main__":
+    # Same flushes written both ways: file count, bytes and full-read time
+    import argparse
+    import contextlib
+    import io
+    import shutil
+
+    from src.storage import set_storage
+    from src.store import read_batches, write_parquet_batch
+
+    parser = argparse.ArgumentParser(description="Per-flush files vs rolling row-group appends")
+    parser.add_argument("--flushes", type=int, default=720, help="flushes (720 = 1h at 5s)")
+    parser.add_argument("--rows", type=int, default=200, help="rows per flush")
+    args = parser.parse_args()
+
+    def flush_frame(i):
+        base = 1_700_000_000_000 + i * 5_000
+        return pl.DataFrame({
+            "trade_id": range(i * args.rows, (i + 1) * args.rows),
+            "trade_time": [base + k * 25 for k in range(args.rows)],
+            "price": [100_000.0 + (k % 50) * 0.01 for k in range(args.rows)],
+            "qty": [0.001 * (1 + k % 7) for k in range(args.rows)],
+            "is_buyer_maker": [k % 2 == 0 for k in range(args.rows)],
+        })
+
+    root = tempfile.mkdtemp(prefix="rolling-bench-")
+    try:
+        for mode in ("per-flush", "rolling"):
+            storage = LocalBackend(os.path.join(root, mode))
+            set_storage(storage)
+            started = time.perf_counter()
+            writer = RollingParquetWriter(storage, "trades", "bench", roll_seconds=10**9)
+            with contextlib.redirect_stdout(io.StringIO()):  # per-file log lines
+                for i in range(args.flushes):
+                    if mode == "rolling":
+                        writer.write(flush_frame(i))
+                    else:
+                        write_parquet_batch(flush_frame(i), "trades")
+                writer.close()
+            write_s = time.perf_counter() - started
+
+            keys = storage.list("trades_")
+            paths = [storage.uri(k) for k in keys]
+            total = sum(os.path.getsize(p) for p in paths)
+            footers = sum(pq.ParquetFile(p).metadata.serialized_size for p in paths)
+            started = time.perf_counter()
+            rows = read_batches("trades").height
+            read_s = time.perf_counter() - started
+            print(f"{mode:<9} files={len(keys):>4} bytes={total / 1024:>8.1f}KB "
+                  f"footers={footers / 1024:>7.1f}KB write={write_s:.2f}s "
+                  f"read={read_s * 1000:.0f}ms rows={rows}")
+    finally:
+        shutil.rmtree(root)
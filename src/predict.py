@@ -1,3 +1,11 @@
+import math
+import os
+import time
+from collections import deque
+
+import numpy as np
+import polars as pl
+
 # def predict_short_term(
 #     microprice: float,
 #     mid_price: float,
@@ -73,8 +81,10 @@ def predict_short_term_confidence(
     flow = buy_sell_ratio - 1
     vol = volatility_1m if volatility_1m is not None else 0
 
-    # Normalize volatility to avoid huge values
-    vol_factor = min(vol * 5000, 1.5)
+    # Normalize volatility to avoid huge values. vol is 1-minute realized
+    # vol of 1s log returns (~5e-4–1e-3), so a typical market contributes
+    # ~0.02 here: a small confidence haircut, never a directional call.
+    vol_factor = min(vol * 25, 1.5)
 
     # --- Weighted score ---------------------------
     score = (
@@ -86,14 +96,15 @@ def predict_short_term_confidence(
     )
 
     # --- Convert score → probability using logistic ---
-    import math
     prob_up = 1 / (1 + math.exp(-score))
+    return direction_from_probability(prob_up)
+
 
-    # Confidence between 50–100%
+def direction_from_probability(prob_up):
+    """P(up) → ("UP" | "DOWN" | "NEUTRAL", confidence 0–100 %)."""
     confidence = abs(prob_up - 0.5) * 200
     confidence = max(0, min(confidence, 100))
 
-    # --- Direction -------------------------------
     if prob_up > 0.55:
         direction = "UP"
     elif prob_up < 0.45:
@@ -102,3 +113,237 @@ def predict_short_term_confidence(
         direction = "NEUTRAL"
 
     return direction, confidence
+
+
+# ============================================================
+#            ONLINE LOGISTIC MODEL (TRAINED FROM OUTCOMES)
+# ============================================================
+FEATURES = ("micro_shift_bps", "imbalance", "flow_imbalance", "spread_bps", "vol_bps")
+
+PREDICTION_HORIZON_MS = 5_000   # label = mid direction this long after the prediction
+MIN_UPDATES = 500               # below this many graded samples, use the heuristic
+MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "models", "online_logit.npz"
+)
+
+
+def model_features(microprice, mid_price, imbalance, flow_imbalance, spread, volatility_1m):
+    """Raw feature vector in FEATURES order (prices expressed in bps of mid)."""
+    return np.array([
+        (microprice - mid_price) / mid_price * 1e4,
+        imbalance,
+        flow_imbalance,
+        spread / mid_price * 1e4,
+        0.0 if volatility_1m is None else volatility_1m * 1e4,
+    ])
+
+
+class OnlineLogisticModel:
+    """
+    Logistic regression fitted by SGD one sample at a time.
+
+    Features are standardized with exponentially weighted mean/variance
+    (updated while learning), so the raw scales of bps, ratios and
+    imbalances do not matter. State is four small NumPy arrays: inference
+    is a dot product (microseconds) and a checkpoint is one .npz file.
+    """
+
+    def __init__(self, n_features: int = len(FEATURES), lr: float = 0.01,
+                 l2: float = 1e-4, stats_alpha: float = 1e-3):
+        self.lr = lr
+        self.l2 = l2
+        self.stats_alpha = stats_alpha
+        self.w = np.zeros(n_features)
+        self.b = 0.0
+        self.mean = np.zeros(n_features)
+        self.var = np.ones(n_features)
+        self.updates = 0
+
+    def _z(self, x):
+        return (x - self.mean) / np.sqrt(self.var + 1e-12)
+
+    def predict_proba(self, x) -> float:
+        """P(up | x)."""
+        score = self.b + float(self._z(x) @ self.w)
+        return 1 / (1 + math.exp(-max(min(score, 30.0), -30.0)))
+
+    def learn(self, x, y: int):
+        """One SGD step on (x, y), y = 1 for up, 0 for down."""
+        if self.updates == 0:
+            self.mean = x.astype(float).copy()
+        else:
+            a = self.stats_alpha
+            delta = x - self.mean
+            self.mean += a * delta
+            self.var = (1 - a) * (self.var + a * delta * delta)
+
+        z = self._z(x)
+        err = self.predict_proba(x) - y
+        self.w -= self.lr * (err * z + self.l2 * self.w)
+        self.b -= self.lr * err
+        self.updates += 1
+
+    def state(self) -> dict:
+        return {"w": self.w, "b": self.b, "mean": self.mean, "var": self.var,
+                "updates": self.updates, "hyper": np.array([self.lr, self.l2, self.stats_alpha])}
+
+    @classmethod
+    def from_state(cls, state):
+        lr, l2, stats_alpha = state["hyper"]
+        model = cls(len(state["w"]), lr, l2, stats_alpha)
+        model.w, model.b = np.array(state["w"]), float(state["b"])
+        model.mean, model.var = np.array(state["mean"]), np.array(state["var"])
+        model.updates = int(state["updates"])
+        return model
+
+    def save(self, path: str = MODEL_PATH):
+        """Atomic checkpoint (write temp file, then rename)."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **self.state())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH):
+        """Restore a checkpoint, or a fresh model if there is none."""
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as state:
+            return cls.from_state(state)
+
+
+class OnlinePredictor:
+    """
+    Predict at every depth tick and grade each prediction once its horizon
+    has passed: the mid move (up/down; unchanged mids are skipped) becomes
+    the label the model learns from. Until the model has seen MIN_UPDATES
+    graded samples, predictions come from `predict_short_term_confidence`.
+    """
+
+    def __init__(self, model: OnlineLogisticModel = None, horizon_ms: int = PREDICTION_HORIZON_MS,
+                 path: str = MODEL_PATH, checkpoint_seconds: float = 60):
+        self.model = model if model is not None else OnlineLogisticModel.load(path)
+        self.horizon_ms = horizon_ms
+        self.path = path
+        self.checkpoint_seconds = checkpoint_seconds
+        self.pending = deque()      # (ts_ms, mid, x) awaiting their outcome
+        self.last_ts = None
+        self.hits = 0
+        self.graded = 0
+        self._saved_at = time.monotonic()
+
+    def _grade(self, ts_ms: int, mid: float):
+        while self.pending and self.pending[0][0] + self.horizon_ms <= ts_ms:
+            t0, mid0, x0 = self.pending.popleft()
+            if mid == mid0:
+                continue
+            y = int(mid > mid0)
+            self.hits += int((self.model.predict_proba(x0) > 0.5) == bool(y))
+            self.graded += 1
+            self.model.learn(x0, y)
+
+    def step(self, ts_ms: int, x, mid: float):
+        """Grade matured predictions with this tick's mid, then predict P(up) for x."""
+        self._grade(ts_ms, mid)
+        self.pending.append((ts_ms, mid, x))
+        self.last_ts = ts_ms
+        return self.model.predict_proba(x)
+
+    def predict(self, microprice, mid_price, imbalance, flow_imbalance, buy_sell_ratio,
+                spread, volatility_1m):
+        """(direction, confidence, source) for the current state, without learning."""
+        if self.model.updates < MIN_UPDATES:
+            direction, confidence = predict_short_term_confidence(
+                microprice, mid_price, imbalance, buy_sell_ratio, spread, volatility_1m
+            )
+            return direction, confidence, "heuristic"
+        x = model_features(microprice, mid_price, imbalance, flow_imbalance, spread, volatility_1m)
+        direction, confidence = direction_from_probability(self.model.predict_proba(x))
+        return direction, confidence, "online"
+
+    def maybe_checkpoint(self, force: bool = False):
+        if force or time.monotonic() - self._saved_at >= self.checkpoint_seconds:
+            self.model.save(self.path)
+            self._saved_at = time.monotonic()
+
+    def state(self) -> dict:
+        """Model, grading queue and counters as arrays (see `live_state`)."""
+        ts, mid, x = zip(*self.pending) if self.pending else ((), (), ())
+        return {
+            **{f"model.{k}": v for k, v in self.model.state().items()},
+            "pending_ts": np.array(ts, dtype=np.int64),
+            "pending_mid": np.array(mid, dtype=np.float64),
+            "pending_x": np.array(x, dtype=np.float64).reshape(len(ts), len(self.model.w)),
+            "last_ts": -1 if self.last_ts is None else self.last_ts,
+            "hits": self.hits,
+            "graded": self.graded,
+        }
+
+    def restore(self, state: dict):
+        self.model = OnlineLogisticModel.from_state(
+            {k.removeprefix("model."): v for k, v in state.items() if k.startswith("model.")}
+        )
+        self.pending = deque(zip(state["pending_ts"].tolist(), state["pending_mid"].tolist(),
+                                 state["pending_x"]))
+        self.last_ts = None if int(state["last_ts"]) < 0 else int(state["last_ts"])
+        self.hits, self.graded = int(state["hits"]), int(state["graded"])
+
+    def stats(self) -> dict:
+        return {
+            "updates": self.model.updates,
+            "live_accuracy": self.hits / self.graded if self.graded else None,
+            "pending": len(self.pending),
+        }
+
+
+def run_ticks(predictor: OnlinePredictor, book_table, volatility_1m=None, flow_window: str = "30s"):
+    """
+    Feed per-snapshot rows of `features.book_features` (event_time order)
+    through the predictor; a `vol_1m` column, if present, overrides the
+    scalar `volatility_1m`. Returns the last P(up), or None.
+    """
+    has_vol = "vol_1m" in book_table.columns
+    cols = ["event_time", "microprice", "mid_price", "imbalance",
+            f"flow_imbalance_{flow_window}", "spread"] + (["vol_1m"] if has_vol else [])
+
+    prob = None
+    for row in book_table.select(cols).iter_rows():
+        ts, micro, mid, imb, flow, spread = row[:6]
+        if micro is None or mid is None:
+            continue
+        vol = row[6] if has_vol else volatility_1m
+        x = model_features(micro, mid, imb, 0.0 if flow is None else flow, spread, vol)
+        prob = predictor.step(ts, x, mid)
+    return prob
+
+
+if __name__ == "__main__":
+    # Warm-start the online model by replaying the stored depth history
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from src.features import build_feature_tables
+    from src.process import load_all_trades
+    from src.volatility import volatility_series
+
+    tables = build_feature_tables()
+    if tables is None:
+        print("Need both trades and depth data.")
+    else:
+        _, book = tables
+        vol = volatility_series(load_all_trades(), window_seconds=60).select(
+            pl.col("ts").alias("event_time"), pl.col("realized_vol").alias("vol_1m")
+        )
+        book = book.join_asof(vol, on="event_time", strategy="backward")
+
+        predictor = OnlinePredictor(OnlineLogisticModel())
+        started = time.perf_counter()
+        run_ticks(predictor, book)
+        elapsed = time.perf_counter() - started
+
+        print(f"Replayed {book.height} ticks in {elapsed:.2f}s "
+              f"({elapsed / book.height * 1e6:.1f} µs/tick)")
+        print("Stats:", predictor.stats())
+        print("Weights:", dict(zip(FEATURES, predictor.model.w.round(4))), "bias", round(predictor.model.b, 4))
+        predictor.maybe_checkpoint(force=True)
+        print(f"Checkpoint → {predictor.path}")
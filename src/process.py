@@ -1,22 +1,47 @@
 import polars as pl
-import glob
+import os
+import sys
+import time
 
-# Folder where trade parquet files are stored
-DATA_DIR = "/Users/adibnoushad/Pycharm/crypto-realtime/data/raw"
+# Allow `python src/process.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bars import load_bars, pick_resolution
+from src.downsample import MAX_CHART_POINTS, downsample_frame
+from src.store import read_batches
+from src.volatility import realized_volatility
 
 
 # ============================================================
 #                 LOAD RAW TRADE DATA
 # ============================================================
 def load_all_trades():
-    """Load and merge all trade parquet files."""
-    files = glob.glob(f"{DATA_DIR}/trades_*.parquet")
-    if not files:
+    """Load and merge all trade parquet files from the configured storage."""
+    df = read_batches("trades")
+    if df is None:
         return None
+    return dedup_trades(df)
+
+
+def dedup_trades(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Exactly-once view of trades ingested at-least-once (reconnect overlap,
+    backfills, redundant ingesters writing the same trades).
+
+    Sorted-merge dedup: sort by trade_id, drop rows equal to their
+    predecessor. Legacy rows without a trade_id cannot be matched and are
+    kept as-is.
+    """
+    if "trade_id" not in df.collect_schema().names():
+        return df.sort("trade_time")
+
+    with_id = df.filter(pl.col("trade_id").is_not_null()).sort("trade_id")
+    with_id = with_id.filter(
+        pl.col("trade_id") != pl.col("trade_id").shift(1).fill_null(-1)
+    )
+    legacy = df.filter(pl.col("trade_id").is_null())
 
-    df = pl.concat([pl.read_parquet(f) for f in files])
-    df = df.sort("trade_time")
-    return df
+    return pl.concat([legacy, with_id]).sort("trade_time", maintain_order=True)
 
 
 # ============================================================
@@ -28,12 +53,9 @@ def compute_vwap(df):
 
 
 def compute_buy_sell_ratio(df):
-    """Buy-side volume vs sell-side volume."""
-    buys_df = df.filter(pl.col("is_buyer_maker") == False)
-    sells_df = df.filter(pl.col("is_buyer_maker") == True)
-
-    buys = len(buys_df)
-    sells = len(sells_df)
+    """Buyer- vs seller-initiated trade counts over the whole frame (one pass)."""
+    sells = int(df["is_buyer_maker"].sum())
+    buys = df.height - sells
 
     ratio = buys / max(sells, 1)
     return buys, sells, ratio
@@ -41,21 +63,67 @@ def compute_buy_sell_ratio(df):
 
 def compute_volatility(df, window_seconds=60):
     """
-    Rolling realized volatility over last X seconds.
-    Volatility = std of absolute returns.
+    Realized volatility over the last X seconds: sqrt of the summed squared
+    1s log returns in the window (see src/volatility.py). Only the window's
+    trades are touched, so the cost does not grow with history.
     """
-    df = df.with_columns([
-        (pl.col("price").pct_change().abs()).alias("returns")
-    ])
+    return realized_volatility(df, window_seconds)
 
-    recent = df.filter(
-        pl.col("trade_time") > (df["trade_time"].max() - window_seconds * 1000)
-    )
 
-    if recent.height == 0:
-        return None
+# ============================================================
+#                  WINDOWED TRADE FLOW
+# ============================================================
+# Signals should see recent aggression, not the whole loaded history.
+FLOW_WINDOWS = {"5s": 5_000, "30s": 30_000, "1m": 60_000, "5m": 300_000}
+REGIME_FLOW_WINDOW = "1m"
+PREDICT_FLOW_WINDOW = "30s"
+FLOW_RATIO_CAP = 10.0        # buy/sell volume ratio when a window has no sells
+
+
+def _flow_metrics(buy_volume, sell_volume, buys, sells) -> dict:
+    volume = buy_volume + sell_volume
+    if volume == 0:
+        volume_ratio = 1.0   # no trades: neutral
+    elif sell_volume == 0:
+        volume_ratio = FLOW_RATIO_CAP
+    else:
+        volume_ratio = min(buy_volume / sell_volume, FLOW_RATIO_CAP)
+
+    return {
+        "buy_volume": float(buy_volume),
+        "sell_volume": float(sell_volume),
+        "buys": int(buys),
+        "sells": int(sells),
+        "volume_ratio": float(volume_ratio),
+        "count_ratio": buys / max(sells, 1),
+        "flow_imbalance": 0.0 if volume == 0 else float((buy_volume - sell_volume) / volume),
+    }
 
-    return float(recent["returns"].std())
+
+def compute_window_flow(df: pl.DataFrame, windows: dict = FLOW_WINDOWS, now_ms: int = None) -> dict:
+    """
+    Volume- and count-based buy/sell flow over trailing windows ending at
+    `now_ms` (default: latest trade). One pass over the longest window only.
+    """
+    now_ms = df["trade_time"].max() if now_ms is None else now_ms
+    recent = df.filter(pl.col("trade_time") > now_ms - max(windows.values()))
+
+    buy = ~pl.col("is_buyer_maker")
+    aggs = []
+    for name, ms in windows.items():
+        inside = pl.col("trade_time") > now_ms - ms
+        aggs += [
+            pl.col("qty").filter(inside & buy).sum().alias(f"{name}|buy_volume"),
+            pl.col("qty").filter(inside & ~buy).sum().alias(f"{name}|sell_volume"),
+            (inside & buy).sum().alias(f"{name}|buys"),
+            (inside & ~buy).sum().alias(f"{name}|sells"),
+        ]
+    row = recent.select(aggs).row(0, named=True)
+
+    return {
+        name: _flow_metrics(*(row[f"{name}|{k}"] for k in ("buy_volume", "sell_volume", "buys", "sells")))
+        for name in windows
+    }
 
 
 # ============================================================
@@ -102,20 +170,42 @@ def get_recent_trades(df: pl.DataFrame, window_seconds: int = 300) -> pl.DataFra
     return df.filter(pl.col("trade_time") >= cutoff)
 
 
-def build_price_series(df: pl.DataFrame, window_seconds: int = 300):
-    """Return pandas dataframe with timestamp + price for Streamlit charts."""
+def build_price_series(df: pl.DataFrame, window_seconds: int = 300,
+                       max_points: int = MAX_CHART_POINTS):
+    """
+    Polars frame (ts datetime, price) for Streamlit charts, LTTB-downsampled
+    to at most `max_points` rows (None = every trade). Charts take it as
+    Arrow without a pandas copy.
+    """
     recent = get_recent_trades(df, window_seconds)
     if recent.height == 0:
         return None
 
-    # Convert ms → ns → datetime
-    recent = recent.with_columns(
-        (pl.col("trade_time") * 1_000_000)
-        .cast(pl.Datetime("ns"))
-        .alias("ts")
-    ).select(["ts", "price"]).sort("ts")
+    recent = downsample_frame(
+        recent.sort("trade_time"), "trade_time", ["price"], max_points
+    )
+
+    # ms epoch → datetime[ms] is a reinterpretation, not a conversion
+    return recent.select(pl.col("trade_time").cast(pl.Datetime("ms")).alias("ts"), "price")
 
-    return recent.to_pandas()
+
+def build_bar_price_series(window_seconds: int = 3600, max_bars: int = 2000):
+    """
+    Long-horizon price chart from the persisted OHLCV bars instead of raw
+    trades: picks the finest resolution that fits in `max_bars` bars.
+    """
+    resolution = pick_resolution(window_seconds, max_bars)
+    since_ms = int((time.time() - window_seconds) * 1000)
+
+    bars = load_bars(resolution, since_ms=since_ms)
+    if bars is None:
+        return None
+
+    return bars.select(
+        pl.col("bar_time").cast(pl.Datetime("ms")).alias("ts"),
+        pl.col("close").alias("price"),
+        "vwap",
+    )
 
 
 # ============================================================
@@ -1,26 +1,66 @@
-import glob
+import os
+import sys
 import polars as pl
 
-DATA_DIR = "/Users/adibnoushad/Pycharm/crypto-realtime/data/raw"
+# Allow `python src/process_depth.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.downsample import MAX_CHART_POINTS, downsample_frame
+from src.store import read_batches
 
 
 # ============================================================
 #                 LOAD RAW DEPTH DATA
 # ============================================================
-def load_depth():
-    """Load and merge all depth parquet files."""
-    files = glob.glob(f"{DATA_DIR}/depth_*.parquet")
-    if not files:
+def load_depth(since_ms: int = None):
+    """
+    Load and merge all depth parquet files, or only snapshots at/after
+    `since_ms` (files are skipped by their name timestamp, unread).
+    """
+    df = read_batches("depth", since_ms)
+    if df is None:
         return None
 
-    df = pl.concat([pl.read_parquet(f) for f in files])
-    df = df.sort("event_time")
-    return df
+    if since_ms is not None:
+        df = df.filter(pl.col("event_time") >= since_ms)
+    return dedup_depth(df)
+
+
+def dedup_depth(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Drop repeated snapshots (same lastUpdateId) written by redundant
+    ingesters; keeps the earliest receipt. Legacy rows have no update ID.
+    """
+    if "last_update_id" not in df.collect_schema().names():
+        return df.sort("event_time")
+
+    with_id = (
+        df.filter(pl.col("last_update_id").is_not_null())
+        .sort(["last_update_id", "event_time"])
+    )
+    with_id = with_id.filter(
+        pl.col("last_update_id") != pl.col("last_update_id").shift(1).fill_null(-1)
+    )
+    legacy = df.filter(pl.col("last_update_id").is_null())
+
+    return pl.concat([legacy, with_id]).sort("event_time", maintain_order=True)
 
 
 # ============================================================
 #            PARSE BEST BID / ASK (TOP OF BOOK)
 # ============================================================
+def level_expr(side: str, level: int, field: int) -> pl.Expr:
+    """
+    Vectorized access to one book level: price (field 0) or size (field 1)
+    of `bids`/`asks` as Float64, null when the level is missing.
+    """
+    return (
+        pl.col(side).list.get(level, null_on_oob=True)
+        .list.get(field, null_on_oob=True)
+        .cast(pl.Float64)
+    )
+
+
 def parse_top_of_book(row):
     bids = row["bids"]
     asks = row["asks"]
@@ -32,6 +72,106 @@ def parse_top_of_book(row):
     return bid_price, bid_size, ask_price, ask_size
 
 
+# ============================================================
+#       1s TOP-OF-BOOK SUMMARY (COLD TIER / LONG HORIZONS)
+# ============================================================
+TOB_PREFIX = "tob-1s"  # cold-tier dataset written by the retention manager
+
+
+def summarize_top_of_book(df: pl.DataFrame, every_ms: int = 1000) -> pl.DataFrame:
+    """
+    Downsample depth snapshots to one top-of-book row per `every_ms`:
+    last best bid/ask in the interval, mean imbalance, snapshot count.
+    Works eagerly or lazily (the "last" book does not rely on row order).
+    """
+    return (
+        df.select(
+            "event_time",
+            level_expr("bids", 0, 0).alias("bid_price"),
+            level_expr("bids", 0, 1).alias("bid_size"),
+            level_expr("asks", 0, 0).alias("ask_price"),
+            level_expr("asks", 0, 1).alias("ask_size"),
+        )
+        .drop_nulls()
+        .with_columns(
+            ((pl.col("bid_size") - pl.col("ask_size"))
+             / (pl.col("bid_size") + pl.col("ask_size"))).alias("imbalance")
+        )
+        .group_by((pl.col("event_time") - pl.col("event_time") % every_ms).alias("bucket"))
+        .agg(
+            pl.col("bid_price", "bid_size", "ask_price", "ask_size")
+            .sort_by("event_time").last(),
+            pl.col("imbalance").mean(),
+            pl.len().cast(pl.Int64).alias("snapshots"),
+        )
+        .rename({"bucket": "event_time"})
+        .sort("event_time")
+        .with_columns(
+            ((pl.col("bid_price") + pl.col("ask_price")) / 2).alias("mid_price"),
+            (pl.col("ask_price") - pl.col("bid_price")).alias("spread"),
+        )
+    )
+
+
+def merge_top_of_book(df: pl.DataFrame) -> pl.DataFrame:
+    """
+    Combine summary rows sharing a second (a second split across two files,
+    or present in both tiers): latest book, snapshot-weighted imbalance.
+    """
+    return (
+        df.sort("event_time", maintain_order=True)
+        .group_by("event_time", maintain_order=True)
+        .agg(
+            pl.col("bid_price", "bid_size", "ask_price", "ask_size").last(),
+            ((pl.col("imbalance") * pl.col("snapshots")).sum()
+             / pl.col("snapshots").sum()).alias("imbalance"),
+            pl.col("snapshots").sum(),
+            pl.col("mid_price", "spread").last(),
+        )
+    )
+
+
+def resample_top_of_book(df: pl.DataFrame, every_ms: int) -> pl.DataFrame:
+    """Coarsen 1s summaries to `every_ms` buckets (same aggregation rules)."""
+    return (
+        df.group_by((pl.col("event_time") - pl.col("event_time") % every_ms).alias("bucket"))
+        .agg(
+            pl.col("bid_price", "bid_size", "ask_price", "ask_size", "mid_price", "spread")
+            .sort_by("event_time").last(),
+            ((pl.col("imbalance") * pl.col("snapshots")).sum()
+             / pl.col("snapshots").sum()).alias("imbalance"),
+            pl.col("snapshots").sum(),
+        )
+        .rename({"bucket": "event_time"})
+        .select("event_time", "bid_price", "bid_size", "ask_price", "ask_size",
+                "imbalance", "snapshots", "mid_price", "spread")
+    )
+
+
+def load_top_of_book(since_ms: int = None):
+    """
+    1s top-of-book history across tiers: cold-tier summaries for aged data
+    plus hot full-resolution depth summarized on the fly.
+    """
+    parts = []
+
+    cold = read_batches(TOB_PREFIX, since_ms, tier="cold")
+    if cold is not None:
+        parts.append(cold)
+
+    hot = load_depth(since_ms)
+    if hot is not None:
+        parts.append(summarize_top_of_book(hot))
+
+    if not parts:
+        return None
+
+    df = merge_top_of_book(pl.concat(parts, how="diagonal_relaxed"))
+    if since_ms is not None:
+        df = df.filter(pl.col("event_time") >= since_ms)
+    return df
+
+
 # ============================================================
 #           ORDER BOOK METRICS (SPREAD, MICROPRICE, IMB)
 # ============================================================
@@ -52,8 +192,142 @@ def compute_orderbook_metrics(df):
         "spread": float(spread),
         "mid_price": float(mid),
         "microprice": float(microprice),
-        "orderbook_imbalance": float(imbalance)
+        "orderbook_imbalance": float(imbalance),
+        **latest_book_features(df),
+    }
+
+
+# ============================================================
+#           MULTI-LEVEL BOOK FEATURES (ALL DEPTH LEVELS)
+# ============================================================
+DEPTH_LEVELS = 5                # depth5 stream
+DEPTH_BPS = (1, 2, 5)           # cumulative depth bands around mid (bps)
+LEVEL_DECAY = 0.5               # weight of level i in depth_imbalance = decay**i
+
+
+def _side_sum(side: str, field: str, levels: int, weights=None) -> pl.Expr:
+    """Sum of one per-level column over all levels (missing levels count as 0)."""
+    terms = [
+        pl.col(f"{side}_{field}_{i}").fill_null(0.0) * (1.0 if weights is None else weights[i])
+        for i in range(levels)
+    ]
+    return pl.sum_horizontal(terms)
+
+
+def _queue_change(side: str, i: int) -> pl.Expr:
+    """
+    Cont–Kukanov–Stoikov order-flow contribution of one level: a better
+    price adds its whole queue, the same price adds the size change, a
+    worse price removes the previous queue.
+    """
+    px, sz = pl.col(f"{side}_price_{i}"), pl.col(f"{side}_size_{i}")
+    prev_px, prev_sz = px.shift(1), sz.shift(1)
+    improved = px > prev_px if side == "bid" else px < prev_px
+    return (
+        pl.when(improved).then(sz)
+        .when(px == prev_px).then(sz - prev_sz)
+        .otherwise(-prev_sz)
+    )
+
+
+def compute_book_features(df: pl.DataFrame, levels: int = DEPTH_LEVELS,
+                          bps: tuple = DEPTH_BPS, decay: float = LEVEL_DECAY):
+    """
+    Per-snapshot multi-level features, column-wise over the whole history
+    (eager or lazy; rows must be in event_time order):
+
+      spread, microprice, imbalance   level-0 book
+      weighted_mid        size-weighted microprice across all levels
+      depth_imbalance     imbalance with level weights decay**i
+      bid/ask_depth_Nbps  cumulative size within N bps of mid
+      depth_imbalance_Nbps
+      bid/ask_slope       cumulative size per bp of distance to the deepest level
+      ofi_i, ofi          order-flow imbalance per level and summed (size units)
+    """
+    weights = [decay ** i for i in range(levels)]
+
+    per_level = []
+    for side, col in (("bid", "bids"), ("ask", "asks")):
+        for i in range(levels):
+            per_level.append(level_expr(col, i, 0).alias(f"{side}_price_{i}"))
+            per_level.append(level_expr(col, i, 1).alias(f"{side}_size_{i}"))
+
+    book = df.select("event_time", *per_level).with_columns(
+        ((pl.col("bid_price_0") + pl.col("ask_price_0")) / 2).alias("mid_price"),
+        _side_sum("bid", "size", levels).alias("bid_depth"),
+        _side_sum("ask", "size", levels).alias("ask_depth"),
+    )
+
+    bid_vwap = pl.sum_horizontal(
+        [(pl.col(f"bid_price_{i}") * pl.col(f"bid_size_{i}")).fill_null(0.0) for i in range(levels)]
+    ) / pl.col("bid_depth")
+    ask_vwap = pl.sum_horizontal(
+        [(pl.col(f"ask_price_{i}") * pl.col(f"ask_size_{i}")).fill_null(0.0) for i in range(levels)]
+    ) / pl.col("ask_depth")
+    bid_w = _side_sum("bid", "size", levels, weights)
+    ask_w = _side_sum("ask", "size", levels, weights)
+
+    # distance (bps) from mid to the deepest quoted level on each side
+    deepest = {
+        side: pl.coalesce([pl.col(f"{side}_price_{i}") for i in reversed(range(levels))])
+        for side in ("bid", "ask")
     }
+    bid_dist = (pl.col("mid_price") - deepest["bid"]) / pl.col("mid_price") * 1e4
+    ask_dist = (deepest["ask"] - pl.col("mid_price")) / pl.col("mid_price") * 1e4
+
+    bid_0, ask_0 = pl.col("bid_size_0"), pl.col("ask_size_0")
+    features = [
+        (pl.col("ask_price_0") - pl.col("bid_price_0")).alias("spread"),
+        ((pl.col("ask_price_0") * bid_0 + pl.col("bid_price_0") * ask_0) / (bid_0 + ask_0)).alias("microprice"),
+        ((bid_0 - ask_0) / (bid_0 + ask_0)).alias("imbalance"),
+        ((ask_vwap * pl.col("bid_depth") + bid_vwap * pl.col("ask_depth"))
+         / (pl.col("bid_depth") + pl.col("ask_depth"))).alias("weighted_mid"),
+        ((bid_w - ask_w) / (bid_w + ask_w)).alias("depth_imbalance"),
+        (pl.col("bid_depth") / bid_dist).alias("bid_slope"),
+        (pl.col("ask_depth") / ask_dist).alias("ask_slope"),
+    ]
+
+    for n in bps:
+        bid_band = pl.sum_horizontal([
+            pl.when(pl.col(f"bid_price_{i}") >= pl.col("mid_price") * (1 - n / 1e4))
+            .then(pl.col(f"bid_size_{i}")).otherwise(0.0)
+            for i in range(levels)
+        ])
+        ask_band = pl.sum_horizontal([
+            pl.when(pl.col(f"ask_price_{i}") <= pl.col("mid_price") * (1 + n / 1e4))
+            .then(pl.col(f"ask_size_{i}")).otherwise(0.0)
+            for i in range(levels)
+        ])
+        features += [bid_band.alias(f"bid_depth_{n}bps"), ask_band.alias(f"ask_depth_{n}bps")]
+
+    ofi = [(_queue_change("bid", i) - _queue_change("ask", i)).alias(f"ofi_{i}") for i in range(levels)]
+
+    out = book.with_columns(features + ofi)
+    out = out.with_columns(
+        [
+            ((pl.col(f"bid_depth_{n}bps") - pl.col(f"ask_depth_{n}bps"))
+             / (pl.col(f"bid_depth_{n}bps") + pl.col(f"ask_depth_{n}bps"))).alias(f"depth_imbalance_{n}bps")
+            for n in bps
+        ]
+        + [pl.sum_horizontal([pl.col(f"ofi_{i}") for i in range(levels)]).alias("ofi")]
+    )
+
+    return out.select(
+        "event_time", "mid_price", "spread", "microprice", "imbalance",
+        "weighted_mid", "depth_imbalance",
+        "bid_depth", "ask_depth", "bid_slope", "ask_slope",
+        *[f"{side}_depth_{n}bps" for n in bps for side in ("bid", "ask")],
+        *[f"depth_imbalance_{n}bps" for n in bps],
+        *[f"ofi_{i}" for i in range(levels)], "ofi",
+    )
+
+
+def latest_book_features(df: pl.DataFrame) -> dict:
+    """Multi-level features of the latest snapshot (OFI vs the one before)."""
+    row = compute_book_features(df.tail(2)).tail(1).to_dicts()[0]
+    for level_0 in ("event_time", "mid_price", "spread", "microprice", "imbalance"):
+        row.pop(level_0)  # already in compute_orderbook_metrics
+    return {k: None if v is None else float(v) for k, v in row.items()}
 
 
 def run_depth_analysis(return_dict=False):
@@ -77,10 +351,12 @@ def run_depth_analysis(return_dict=False):
 # ============================================================
 #           TIME-SERIES (IMBALANCE + SPREAD HISTORY)
 # ============================================================
-def build_imbalance_series(df: pl.DataFrame, window_seconds: int = 300):
+def build_imbalance_series(df: pl.DataFrame, window_seconds: int = 300,
+                           max_points: int = MAX_CHART_POINTS):
     """
-    Build pandas DataFrame of imbalance + spread over time.
-    Streamlit uses pandas, so convert at end.
+    Polars frame (ts, imbalance, spread) over time, computed column-wise
+    and LTTB-downsampled to at most `max_points` rows (None = every
+    snapshot). Charts take it as Arrow without a pandas copy.
     """
     max_t = df["event_time"].max()
     cutoff = max_t - window_seconds * 1000
@@ -89,41 +365,31 @@ def build_imbalance_series(df: pl.DataFrame, window_seconds: int = 300):
     if recent.height == 0:
         return None
 
-    records = []
-    for row in recent.to_dicts():
-        bids = row["bids"]
-        asks = row["asks"]
-        if not bids or not asks:
-            continue
-
-        bid_price = float(bids[0][0])
-        bid_size = float(bids[0][1])
-        ask_price = float(asks[0][0])
-        ask_size = float(asks[0][1])
-
-        total_size = bid_size + ask_size
-        if total_size == 0:
-            continue
-
-        imbalance = (bid_size - ask_size) / total_size
-
-        records.append({
-            "event_time": row["event_time"],
-            "imbalance": imbalance,
-            "spread": ask_price - bid_price
-        })
-
-    if not records:
+    series = (
+        recent.select(
+            "event_time",
+            level_expr("bids", 0, 0).alias("bid_price"),
+            level_expr("bids", 0, 1).alias("bid_size"),
+            level_expr("asks", 0, 0).alias("ask_price"),
+            level_expr("asks", 0, 1).alias("ask_size"),
+        )
+        .drop_nulls()
+        .filter((pl.col("bid_size") + pl.col("ask_size")) > 0)
+        .select(
+            "event_time",
+            ((pl.col("bid_size") - pl.col("ask_size"))
+             / (pl.col("bid_size") + pl.col("ask_size"))).alias("imbalance"),
+            (pl.col("ask_price") - pl.col("bid_price")).alias("spread"),
+        )
+    )
+    if series.height == 0:
         return None
 
-    # Convert event_time (ms) → timestamp ns → datetime
-    df_out = pl.DataFrame(records).with_columns(
-        (pl.col("event_time") * 1_000_000)
-        .cast(pl.Datetime("ns"))
-        .alias("ts")
-    ).select(["ts", "imbalance", "spread"]).sort("ts")
+    series = downsample_frame(series, "event_time", ["imbalance", "spread"], max_points)
 
-    return df_out.to_pandas()
+    return series.select(
+        pl.col("event_time").cast(pl.Datetime("ms")).alias("ts"), "imbalance", "spread"
+    )
 
 
 # def build_orderbook_heatmap(df: pl.DataFrame, levels: int = 5):
@@ -163,49 +429,35 @@ def build_imbalance_series(df: pl.DataFrame, window_seconds: int = 300):
 #     return df_out.to_pandas()
 def build_orderbook_heatmap(df: pl.DataFrame, levels: int = 5):
     """
-    Build heatmap-friendly bid/ask table with normalized size columns.
+    Heatmap-friendly bid/ask table of the latest snapshot, sorted by price,
+    with size columns normalized to the largest level of each side (0-1,
+    used for coloring). Built with Polars expressions; returns Polars.
     Format:
         price | bid_size | ask_size | bid_norm | ask_norm
     """
     if df is None or df.height == 0:
         return None
 
-    latest = df.tail(1).to_dicts()[0]
-
-    bids = latest["bids"][:levels]
-    asks = latest["asks"][:levels]
-
-    records = []
-    bid_sizes = [float(s) for _, s in bids]
-    ask_sizes = [float(s) for _, s in asks]
-
-    max_bid = max(bid_sizes) if bid_sizes else 1
-    max_ask = max(ask_sizes) if ask_sizes else 1
-
-    # Bids (descending)
-    for p, s in bids:
-        s = float(s)
-        records.append({
-            "price": float(p),
-            "bid_size": s,
-            "ask_size": 0.0,
-            "bid_norm": s / max_bid,
-            "ask_norm": 0.0
-        })
-
-    # Asks (ascending)
-    for p, s in asks:
-        s = float(s)
-        records.append({
-            "price": float(p),
-            "bid_size": 0.0,
-            "ask_size": s,
-            "bid_norm": 0.0,
-            "ask_norm": s / max_ask
-        })
-
-    df_out = pl.DataFrame(records).sort("price")
-    return df_out.to_pandas()
+    latest = df.tail(1)
+
+    def side(name: str, size_col: str, other_col: str) -> pl.DataFrame:
+        return (
+            latest.select(pl.col(name).list.head(levels)).explode(name).drop_nulls()
+            .select(
+                pl.col(name).list.get(0).cast(pl.Float64).alias("price"),
+                pl.col(name).list.get(1).cast(pl.Float64).alias(size_col),
+                pl.lit(0.0).alias(other_col),
+            )
+        )
+
+    book = pl.concat([
+        side("bids", "bid_size", "ask_size"),
+        side("asks", "ask_size", "bid_size").select("price", "bid_size", "ask_size"),
+    ])
+    return book.sort("price").with_columns(
+        (pl.col("bid_size") / pl.col("bid_size").max()).fill_nan(0.0).alias("bid_norm"),
+        (pl.col("ask_size") / pl.col("ask_size").max()).fill_nan(0.0).alias("ask_norm"),
+    )
 
 
 
@@ -0,0 +1,166 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+import polars as pl
+
+# Allow `python src/query.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bars import RESOLUTIONS
+from src.process import dedup_trades
+from src.process_depth import (
+    TOB_PREFIX,
+    dedup_depth,
+    merge_top_of_book,
+    resample_top_of_book,
+    summarize_top_of_book,
+)
+from src.store import list_batches, scan_keys
+
+# Symbols with an archive in storage (datasets are not symbol-partitioned yet)
+SYMBOLS = ("BTCUSDT",)
+
+# Copies of one record from redundant ingesters carry receipt times (depth
+# event_time) at most this far apart; the pre-dedup time filter keeps them all.
+DEDUP_SLACK_MS = 10_000
+
+
+# ============================================================
+#                 ARGUMENT NORMALIZATION
+# ============================================================
+def to_ms(t):
+    """Epoch milliseconds from int/float ms, a datetime or an ISO string (naive = UTC)."""
+    if t is None or isinstance(t, (int, float)):
+        return None if t is None else int(t)
+    if isinstance(t, str):
+        t = datetime.fromisoformat(t)
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    return int(t.timestamp() * 1000)
+
+
+def freq_ms(freq) -> int:
+    """Bucket width in ms from a bar resolution name ("1s", "1m", ...) or ms."""
+    if isinstance(freq, str):
+        if freq not in RESOLUTIONS:
+            raise ValueError(f"Unknown frequency {freq!r}; use one of {list(RESOLUTIONS)} or ms")
+        return RESOLUTIONS[freq]
+    return int(freq)
+
+
+def check_symbol(symbol: str):
+    if symbol.upper() not in SYMBOLS:
+        raise ValueError(f"No archive for {symbol!r}; available: {', '.join(SYMBOLS)}")
+
+
+# ============================================================
+#                 LAZY DATASET SCANS
+# ============================================================
+def scan_dataset(prefix: str, dedup, time_col: str, start_ms=None, end_ms=None, tier: str = "hot"):
+    """
+    Lazy, exactly-once plan over one dataset in [start_ms, end_ms).
+
+    Compaction dedups within an hour only, and a backfill can land a trade
+    in a later hour's file than its first copy, so the sorted-merge dedup
+    runs over every scanned file (compacted or not). The time range is
+    applied before it, widened by DEDUP_SLACK_MS, so it is pushed down into
+    the Parquet scans and the sort only sees rows near the window.
+    """
+    keys = list_batches(prefix, start_ms, tier, until_ms=end_ms)
+    if not keys:
+        return None
+    lf = between(
+        scan_keys(keys, tier), time_col,
+        None if start_ms is None else start_ms - DEDUP_SLACK_MS,
+        None if end_ms is None else end_ms + DEDUP_SLACK_MS,
+    )
+    return between(dedup(lf), time_col, start_ms, end_ms)
+
+
+def between(lf: pl.LazyFrame, time_col: str, start_ms=None, end_ms=None) -> pl.LazyFrame:
+    """Half-open [start, end) time filter (pushed down to the Parquet scans)."""
+    if start_ms is not None:
+        lf = lf.filter(pl.col(time_col) >= start_ms)
+    if end_ms is not None:
+        lf = lf.filter(pl.col(time_col) < end_ms)
+    return lf
+
+
+def scan_trades(symbol: str = "BTCUSDT", start=None, end=None, columns: list = None):
+    """
+    Lazy trades plan for [start, end): compose further filters/aggregations
+    on it, then `.collect(engine="streaming")`.
+    """
+    check_symbol(symbol)
+    start_ms, end_ms = to_ms(start), to_ms(end)
+
+    lf = scan_dataset("trades", dedup_trades, "trade_time", start_ms, end_ms)
+    if lf is None:
+        return None
+
+    if columns is not None:
+        available = lf.collect_schema().names()
+        lf = lf.select([c for c in columns if c in available])
+    return lf
+
+
+def scan_top_of_book(symbol: str = "BTCUSDT", start=None, end=None, freq="1s"):
+    """
+    Lazy top-of-book plan at `freq`: cold-tier 1s summaries plus hot depth
+    summarized on the fly, merged per second, then coarsened to `freq`
+    (last book, snapshot-weighted imbalance). Only `event_time`/`bids`/`asks`
+    (and `last_update_id` for recent files) are read from depth files.
+    """
+    check_symbol(symbol)
+    start_ms, end_ms = to_ms(start), to_ms(end)
+    every = freq_ms(freq)
+    if every < RESOLUTIONS["1s"] or every % RESOLUTIONS["1s"]:
+        raise ValueError("top_of_book frequency must be a whole number of seconds")
+
+    parts = []
+
+    cold = scan_dataset(TOB_PREFIX, merge_top_of_book, "event_time", start_ms, end_ms, tier="cold")
+    if cold is not None:
+        parts.append(cold)
+
+    hot = scan_dataset("depth", dedup_depth, "event_time", start_ms, end_ms)
+    if hot is not None:
+        parts.append(summarize_top_of_book(hot))
+
+    if not parts:
+        return None
+
+    lf = merge_top_of_book(pl.concat(parts, how="diagonal_relaxed"))
+    if every > RESOLUTIONS["1s"]:
+        lf = resample_top_of_book(lf, every)
+    return lf
+
+
+# ============================================================
+#                 QUERIES (STREAMING EXECUTION)
+# ============================================================
+def trades(symbol: str = "BTCUSDT", start=None, end=None, columns: list = None):
+    """
+    Trades in [start, end) with only the requested columns, executed by the
+    streaming engine so multi-day ranges run in bounded memory.
+    """
+    lf = scan_trades(symbol, start, end, columns)
+    if lf is None:
+        return None
+    return lf.collect(engine="streaming")
+
+
+def top_of_book(symbol: str = "BTCUSDT", start=None, end=None, freq="1s"):
+    """Best bid/ask, mid, spread and imbalance per `freq` bucket in [start, end)."""
+    lf = scan_top_of_book(symbol, start, end, freq)
+    if lf is None:
+        return None
+    return lf.sort("event_time").collect(engine="streaming")
+
+
+if __name__ == "__main__":
+    df = trades(columns=["trade_time", "price", "qty"])
+    print(df.tail() if df is not None else "No trades archived")
+    tob = top_of_book(freq="1m")
+    print(tob.tail() if tob is not None else "No depth archived")
@@ -1,3 +1,15 @@
+import os
+import sys
+
+import numpy as np
+import polars as pl
+
+# Allow `python src/regime.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.process import FLOW_WINDOWS, REGIME_FLOW_WINDOW
+
+
 def classify_regime(
     imbalance: float,
     microprice: float,
@@ -34,10 +46,12 @@ def classify_regime(
         score -= 1
 
     # 4. Volatility regime (high vol reduces confidence)
+    #    vol_1m is 1-minute realized vol of 1s log returns (src/volatility.py),
+    #    typically 3e-4 (5th pct) to 1e-3 (95th pct) for BTCUSDT
     if vol_1m is not None:
-        if vol_1m > 0.0008:  # very high short-term vol
+        if vol_1m > 0.0012:  # very high short-term vol
             score *= 0.5
-        elif vol_1m < 0.0002:  # calm market strengthens signals
+        elif vol_1m < 0.0004:  # calm market strengthens signals
             score *= 1.2
 
     # Final classification
@@ -51,3 +65,275 @@ def classify_regime(
         return "BEARISH"
     else:
         return "NEUTRAL"
+
+
+# ============================================================
+#            HIDDEN MARKOV REGIME MODEL (FILTERED)
+# ============================================================
+# `classify_regime` has no memory, so its label flickers between
+# snapshots. The model below treats the regime as a hidden Markov state:
+# each depth tick is a noisy observation, and the forward filter blends
+# it with the previous regime probabilities through a sticky transition
+# matrix. States are ordered bearish → bullish after fitting and named
+# with the same five labels. Fit with `python src/regime.py`.
+REGIMES = ("STRONGLY BEARISH", "BEARISH", "NEUTRAL", "BULLISH", "STRONGLY BULLISH")
+REGIME_FEATURES = ("imbalance_ew", "flow_imbalance")
+
+# Level-0 imbalance flips sign many times a second; the model observes its
+# per-tick EWM instead so a state reflects seconds of book pressure.
+# (Microprice shift is spread/2 x imbalance, so it adds only spread noise.)
+IMBALANCE_HALFLIFE_TICKS = 20   # ~2s at 100ms depth
+STAY_PROB = 0.98        # initial self-transition probability per tick
+MIN_VARIANCE = 1e-3     # variance floor, in standardized units
+CLIP_Z = 4.0            # standardized features are clipped so rare outliers
+                        # cannot claim a state of their own
+REGIME_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "models", "regime_hmm.npz"
+)
+_EW_ALPHA = 1 - 0.5 ** (1 / IMBALANCE_HALFLIFE_TICKS)
+
+
+def regime_observations(book_table: pl.DataFrame, flow_window: str = REGIME_FLOW_WINDOW):
+    """
+    (event_time, raw observations) from a `features.book_features` table:
+    one (imbalance, flow_imbalance) row per depth tick, incomplete ticks
+    dropped. `smooth_observations` turns them into model inputs.
+    """
+    obs = (
+        book_table.select(
+            "event_time",
+            "imbalance",
+            pl.col(f"flow_imbalance_{flow_window}").fill_null(0.0).alias("flow_imbalance"),
+        )
+        .fill_nan(None)
+        .drop_nulls()
+    )
+    return obs["event_time"].to_numpy(), obs.select("imbalance", "flow_imbalance").to_numpy()
+
+
+def smooth_observations(raw: np.ndarray) -> np.ndarray:
+    """Raw observations → REGIME_FEATURES (vectorized; same recursion as `RegimeFilter`)."""
+    imbalance_ew = pl.Series(raw[:, 0]).ewm_mean(alpha=_EW_ALPHA, adjust=False).to_numpy()
+    return np.column_stack([imbalance_ew, raw[:, 1]])
+
+
+class GaussianHMM:
+    """
+    Hidden Markov model with diagonal-Gaussian emissions on standardized
+    features. `fit` runs Baum-Welch over a whole history (emissions and
+    expected transitions are computed as matrix products; only the
+    recursions step through time), and `filter` gives P(state | past)
+    for every tick.
+    """
+
+    def __init__(self, n_states: int = len(REGIMES), n_features: int = len(REGIME_FEATURES)):
+        self.start = np.full(n_states, 1 / n_states)
+        self.trans = np.full((n_states, n_states), (1 - STAY_PROB) / (n_states - 1))
+        np.fill_diagonal(self.trans, STAY_PROB)
+        self.means = np.zeros((n_states, n_features))
+        self.vars = np.ones((n_states, n_features))
+        self.feature_mean = np.zeros(n_features)
+        self.feature_std = np.ones(n_features)
+        self.fitted = False
+        self._cache()
+
+    def _cache(self):
+        """Precompute per-state emission constants (call after changing parameters)."""
+        self._inv_var = 1 / self.vars
+        self._log_norm = -0.5 * np.log(2 * np.pi * self.vars).sum(axis=1)
+
+    @property
+    def n_states(self) -> int:
+        return len(self.start)
+
+    def standardize(self, obs: np.ndarray) -> np.ndarray:
+        z = (obs - self.feature_mean) / self.feature_std
+        return np.minimum(np.maximum(z, -CLIP_Z), CLIP_Z)  # np.clip costs more per tick
+
+    def log_emissions(self, z: np.ndarray) -> np.ndarray:
+        """log N(z | state) for standardized z of shape (T, D) or (D,) → (T, K) or (K,)."""
+        diff = z[..., None, :] - self.means
+        return self._log_norm - 0.5 * (diff * diff * self._inv_var).sum(axis=-1)
+
+    def _forward(self, log_b: np.ndarray):
+        """Scaled forward pass → (filtered probabilities, per-tick scales, row maxima)."""
+        shift = log_b.max(axis=1, keepdims=True)
+        b = np.exp(log_b - shift)
+        alpha = np.empty_like(b)
+        scale = np.empty(len(b))
+
+        p = self.start * b[0]
+        for t in range(len(b)):
+            if t:
+                p = (p @ self.trans) * b[t]
+            scale[t] = p.sum()
+            p = p / scale[t]
+            alpha[t] = p
+        return alpha, scale, b, shift
+
+    def filter(self, obs: np.ndarray) -> np.ndarray:
+        """P(state_t | obs_1..t) for every tick, shape (T, K)."""
+        alpha, _, _, _ = self._forward(self.log_emissions(self.standardize(obs)))
+        return alpha
+
+    def fit(self, obs: np.ndarray, n_iter: int = 25, tol: float = 1e-4):
+        """Baum-Welch on raw observations (T, D); returns the per-tick log-likelihood."""
+        self.feature_mean = obs.mean(axis=0)
+        self.feature_std = obs.std(axis=0) + 1e-12
+        z = self.standardize(obs)
+        self._init_states(z)
+
+        prev = -np.inf
+        for _ in range(n_iter):
+            alpha, scale, b, shift = self._forward(self.log_emissions(z))
+
+            beta = np.empty_like(alpha)
+            beta[-1] = 1.0
+            for t in range(len(z) - 2, -1, -1):
+                beta[t] = self.trans @ (b[t + 1] * beta[t + 1]) / scale[t + 1]
+
+            gamma = alpha * beta
+            gamma /= gamma.sum(axis=1, keepdims=True)
+            xi = self.trans * (alpha[:-1].T @ (b[1:] * beta[1:] / scale[1:, None]))
+
+            weight = gamma.sum(axis=0)[:, None] + 1e-12
+            self.start = gamma[0]
+            self.trans = xi / xi.sum(axis=1, keepdims=True)
+            self.means = gamma.T @ z / weight
+            self.vars = np.maximum(gamma.T @ (z * z) / weight - self.means ** 2, MIN_VARIANCE)
+            self._cache()
+
+            ll = float((np.log(scale) + shift[:, 0]).sum()) / len(z)
+            if ll - prev < tol:
+                break
+            prev = ll
+
+        self._order_states()
+        self.fitted = True
+        return ll
+
+    def _init_states(self, z: np.ndarray):
+        """Seed states from quantiles of the combined direction score."""
+        score = z.sum(axis=1)
+        edges = np.quantile(score, np.linspace(0, 1, self.n_states + 1)[1:-1])
+        labels = np.searchsorted(edges, score)
+        for k in range(self.n_states):
+            zk = z[labels == k] if (labels == k).any() else z
+            self.means[k] = zk.mean(axis=0)
+            self.vars[k] = np.maximum(zk.var(axis=0), MIN_VARIANCE)
+        self._cache()
+
+    def _order_states(self):
+        """Sort states by mean direction score so index 0 is most bearish."""
+        order = np.argsort(self.means.sum(axis=1))
+        self.start = self.start[order]
+        self.trans = self.trans[np.ix_(order, order)]
+        self.means, self.vars = self.means[order], self.vars[order]
+        self._cache()
+
+    def save(self, path: str = REGIME_MODEL_PATH):
+        """Atomic checkpoint (write temp file, then rename)."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, start=self.start, trans=self.trans, means=self.means, vars=self.vars,
+                 feature_mean=self.feature_mean, feature_std=self.feature_std)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = REGIME_MODEL_PATH):
+        """Restore a fitted model, or an unfitted one if there is none."""
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as state:
+            model = cls(*state["means"].shape)
+            for name in ("start", "trans", "means", "vars", "feature_mean", "feature_std"):
+                setattr(model, name, state[name])
+        model._cache()
+        model.fitted = True
+        return model
+
+
+class RegimeFilter:
+    """
+    Live forward filter fed raw observations tick by tick. Each `update`
+    costs one K x K matrix-vector product plus K x D emission terms and
+    keeps only the current probability vector and the imbalance EWM, so
+    it matches `GaussianHMM.filter(smooth_observations(raw))` exactly.
+    """
+
+    def __init__(self, model: GaussianHMM = None):
+        self.model = model if model is not None else GaussianHMM.load()
+        self.probs = self.model.start.copy()
+        self.imbalance_ew = None
+        self.last_ts = None
+
+    def update(self, imbalance: float, flow_imbalance: float, ts_ms: int = None) -> np.ndarray:
+        first = self.imbalance_ew is None
+        self.imbalance_ew = imbalance if first else (
+            _EW_ALPHA * imbalance + (1 - _EW_ALPHA) * self.imbalance_ew
+        )
+        m = self.model
+        log_b = m.log_emissions(m.standardize(np.array([self.imbalance_ew, flow_imbalance])))
+        prior = m.start if first else self.probs @ m.trans   # t = 0 starts from π, no transition
+        p = prior * np.exp(log_b - log_b.max())
+        self.probs = p / p.sum()
+        if ts_ms is not None:
+            self.last_ts = ts_ms
+        return self.probs
+
+    def run(self, times: np.ndarray, raw: np.ndarray) -> np.ndarray:
+        """Feed a batch of ticks in order; returns the latest probabilities."""
+        for ts, (imbalance, flow_imbalance) in zip(times.tolist(), raw.tolist()):
+            self.update(imbalance, flow_imbalance, ts)
+        return self.probs
+
+    def state(self) -> dict:
+        """Filter position as arrays (see `live_state`); the model is saved separately."""
+        return {
+            "probs": self.probs,
+            "imbalance_ew": np.nan if self.imbalance_ew is None else self.imbalance_ew,
+            "last_ts": -1 if self.last_ts is None else self.last_ts,
+        }
+
+    def restore(self, state: dict):
+        if state["probs"].shape != self.probs.shape:
+            return  # model refitted with another state count: start afresh
+        self.probs = state["probs"]
+        ew = float(state["imbalance_ew"])
+        self.imbalance_ew = None if np.isnan(ew) else ew
+        self.last_ts = None if int(state["last_ts"]) < 0 else int(state["last_ts"])
+
+    @property
+    def regime(self) -> str:
+        return REGIMES[int(self.probs.argmax())]
+
+    def probabilities(self) -> dict:
+        return {name: float(p) for name, p in zip(REGIMES, self.probs)}
+
+
+def fit_regime_model(since_ms: int = None, path: str = REGIME_MODEL_PATH):
+    """Fit the HMM on the stored depth/trade history and checkpoint it."""
+    from src.features import build_feature_tables
+
+    tables = build_feature_tables(since_ms, windows={REGIME_FLOW_WINDOW: FLOW_WINDOWS[REGIME_FLOW_WINDOW]})
+    if tables is None:
+        return None
+    _, raw = regime_observations(tables[1])
+    obs = smooth_observations(raw)
+    model = GaussianHMM()
+    ll = model.fit(obs)
+    model.save(path)
+    print(f"Fitted regime HMM on {len(obs)} ticks (log-likelihood/tick {ll:.3f}) → {path}")
+    return model
+
+
+if __name__ == "__main__":
+    model = fit_regime_model()
+    if model is None:
+        print("Need both trades and depth data.")
+    else:
+        np.set_printoptions(precision=3, suppress=True)
+        print("Transition matrix:\n", model.trans)
+        print("State means (standardized):")
+        for name, mean in zip(REGIMES, model.means):
+            print(f"  {name:<17}", dict(zip(REGIME_FEATURES, mean.round(3))))
@@ -0,0 +1,115 @@
+import os
+import signal
+import sys
+import threading
+import time
+
+import polars as pl
+
+# Allow `python src/retention.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.compact import closed_buckets, run_compaction
+from src.process_depth import (
+    TOB_PREFIX,
+    dedup_depth,
+    merge_top_of_book,
+    summarize_top_of_book,
+)
+from src.storage import get_storage
+from src.store import file_end_time, list_batches, read_key, time_range_metadata
+
+# ============================================================
+#                 RETENTION POLICY
+# ============================================================
+# Full-resolution depth stays in the hot tier for this long; older hours
+# are downsampled to 1s top-of-book summaries in the cold tier.
+HOT_DEPTH_SECONDS = int(os.environ.get("RETENTION_HOT_DEPTH_SECONDS", 6 * 3600))
+
+# Datasets deleted outright once older than this: (tier, prefix) → seconds
+PURGE_AFTER_SECONDS = {
+    ("hot", "trades"): 7 * 86400,      # OHLCV bars keep the long history
+    ("hot", "bars-1s"): 7 * 86400,
+    ("cold", TOB_PREFIX): 90 * 86400,
+}
+
+RETENTION_INTERVAL = 300  # seconds between maintenance runs
+
+
+# ============================================================
+#                 HOT → COLD (DOWNSAMPLE DEPTH)
+# ============================================================
+def tier_out_depth(now: float = None):
+    """Move whole hours of depth older than the hot window to the cold tier."""
+    now = time.time() if now is None else now
+    hot, cold = get_storage("hot"), get_storage("cold")
+
+    moved = 0
+    for bucket, keys in sorted(closed_buckets("depth", now=now - HOT_DEPTH_SECONDS).items()):
+        depth = pl.concat([read_key(hot, k) for k in keys], how="diagonal_relaxed")
+        tob = summarize_top_of_book(dedup_depth(depth))
+
+        target = f"{TOB_PREFIX}_{bucket}_compacted.parquet"
+        if cold.list(target):
+            # late depth files for an hour already tiered out
+            tob = merge_top_of_book(
+                pl.concat([cold.read_parquet(target), tob], how="diagonal_relaxed")
+            )
+        cold.write_parquet(target, tob, metadata=time_range_metadata(tob, "event_time"))
+
+        for k in keys:
+            hot.delete(k)
+        moved += len(keys)
+        print(f"Tiered out {len(keys)} depth files → cold {target} ({tob.height} rows)")
+
+    return moved
+
+
+# ============================================================
+#                 PURGE EXPIRED DATA
+# ============================================================
+def purge_expired(now: float = None):
+    now = time.time() if now is None else now
+
+    purged = 0
+    for (tier, prefix), max_age in PURGE_AFTER_SECONDS.items():
+        storage = get_storage(tier)
+        for key in list_batches(prefix, tier=tier):
+            if file_end_time(key) < now - max_age:
+                storage.delete(key)
+                purged += 1
+
+    if purged:
+        print(f"Purged {purged} expired files")
+    return purged
+
+
+def run_retention(now: float = None):
+    tier_out_depth(now)
+    purge_expired(now)
+
+
+def run_maintenance():
+    """One scheduled pass: compact closed hours, then apply retention."""
+    run_compaction()
+    run_retention()
+
+
+# ============================================================
+#                 SCHEDULING
+# ============================================================
+def main(interval: int = RETENTION_INTERVAL):
+    """Standalone maintenance worker (started by the ingestion launcher)."""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    while not stop.is_set():
+        try:
+            run_maintenance()
+        except Exception as e:
+            print(f"Maintenance failed: {e}")
+        stop.wait(interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ============================================================
+#                 PROBE (RUNS IN A FRESH INTERPRETER)
+# ============================================================
+# Imports one ingest worker module, reports time and RSS once it is ready
+# to connect, then flushes a synthetic buffer and reports again. With
+# `eager`, the writer modules (Polars, store, bars and the PyArrow stream
+# writer) are imported up front first, which is what every worker paid
+# before `ingest_writer` deferred them. In a live worker `preload()`
+# moves the lean first-flush import cost off the event loop.
+PROBE = r"""
+import asyncio, importlib, inspect, json, sys, time
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+root, module, eager, rows = sys.argv[1], sys.argv[2], sys.argv[3] == "1", int(sys.argv[4])
+sys.path.insert(0, root)
+out = {"rss_interpreter": rss_mb()}
+
+started = time.perf_counter()
+if eager:
+    import polars, src.store, src.bars, src.arrow_stream
+worker = importlib.import_module(module)
+out["import_ms"] = (time.perf_counter() - started) * 1000
+out["rss_ready"] = rss_mb()
+
+now = int(time.time() * 1000)
+if module == "src.ingest":
+    for i in range(rows):
+        worker.add_trade({"trade_id": i, "event_time": now + i, "trade_time": now + i,
+                          "price": 100000.0 + i % 7, "qty": 0.01, "is_buyer_maker": i % 2 == 0})
+else:
+    level = [["100000.00", "0.5"]] * 5
+    worker.BUFFER.extend({"event_time": now + 100 * i, "last_update_id": i,
+                          "bids": level, "asks": level} for i in range(rows))
+
+started = time.perf_counter()
+result = worker.flush(final=True) if module == "src.ingest" else worker.flush()
+if inspect.isawaitable(result):
+    asyncio.run(result)
+worker.close_writers()
+out["flush_ms"] = (time.perf_counter() - started) * 1000
+out["rss_flushed"] = rss_mb()
+print(json.dumps(out))
+"""
+
+WORKERS = {"trades": "src.ingest", "depth": "src.ingest_depth"}
+
+
+def run_probe(module: str, eager: bool, mode: str, rows: int, data_root: str) -> dict:
+    env = dict(os.environ, INGEST_WRITER_MODE=mode, CRYPTO_STORAGE="local",
+               CRYPTO_DATA_ROOT=data_root)
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE, PROJECT_ROOT, module, "1" if eager else "0", str(rows)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+    out["process_ms"] = (time.perf_counter() - started) * 1000
+    return out
+
+
+def median_of(runs: list) -> dict:
+    return {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+
+
+# ============================================================
+#                 REPORT
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="Ingest worker startup time and RSS")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per configuration (median)")
+    parser.add_argument("--rows", type=int, default=5_000, help="rows in the synthetic first flush")
+    parser.add_argument("--modes", default="parquet,arrow", help="writer modes to measure")
+    args = parser.parse_args()
+
+    print(f"{'worker':<7} {'mode':<8} {'imports':<6} {'import ms':>9} {'RSS ready':>10} "
+          f"{'flush ms':>9} {'RSS flushed':>12} {'process ms':>11}")
+    with tempfile.TemporaryDirectory() as data_root:
+        for name, module in WORKERS.items():
+            for mode in args.modes.split(","):
+                for eager in (True, False):
+                    runs = [run_probe(module, eager, mode, args.rows, data_root)
+                            for _ in range(args.repeat)]
+                    m = median_of(runs)
+                    print(f"{name:<7} {mode:<8} {'eager' if eager else 'lean':<6} "
+                          f"{m['import_ms']:>9.1f} {m['rss_ready']:>8.1f}MB "
+                          f"{m['flush_ms']:>9.1f} {m['rss_flushed']:>10.1f}MB {m['process_ms']:>11.1f}")
+        print(f"(bare interpreter RSS: {m['rss_interpreter']:.1f}MB; medians of {args.repeat} runs)")
+
+
+if __name__ == "__main__":
+    main()
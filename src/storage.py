@@ -0,0 +1,196 @@
+import io
+import os
+
+import polars as pl
+
+# ============================================================
+#                 STORAGE CONFIGURATION
+# ============================================================
+# One configured root shared by writers (ingesters) and readers
+# (dashboards, compaction). Subprocesses inherit the environment, so the
+# launcher and everything it starts agree on where data lives.
+#
+#   CRYPTO_STORAGE     local (default) | tmpfs | s3
+#   CRYPTO_DATA_ROOT   directory for local/tmpfs, key prefix for s3
+#   CRYPTO_S3_BUCKET   bucket name (s3)
+#   CRYPTO_S3_ENDPOINT endpoint URL for MinIO / other S3-compatible stores
+#
+# The cold tier (aged, downsampled data) is configured the same way with
+# CRYPTO_COLD_STORAGE / CRYPTO_COLD_ROOT and defaults to data/cold.
+#
+# S3 credentials come from the usual AWS_* environment variables.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_LOCAL_ROOT = os.path.join(PROJECT_ROOT, "data", "raw")
+DEFAULT_COLD_ROOT = os.path.join(PROJECT_ROOT, "data", "cold")
+DEFAULT_TMPFS_ROOT = "/dev/shm/crypto-realtime"
+
+# Arrow IPC stream files (see arrow_stream.py) sit next to the Parquet
+# files; the suffix lives here so listing them needs no pyarrow import.
+IPC_SUFFIX = ".arrows"
+
+TIER_ENV = {
+    "hot": ("CRYPTO_STORAGE", "CRYPTO_DATA_ROOT", DEFAULT_LOCAL_ROOT),
+    "cold": ("CRYPTO_COLD_STORAGE", "CRYPTO_COLD_ROOT", DEFAULT_COLD_ROOT),
+}
+
+
+# ============================================================
+#                 LOCAL FILESYSTEM (DISK OR TMPFS)
+# ============================================================
+class LocalBackend:
+    """Files under a directory. Point it at tmpfs to keep hot data in RAM."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def uri(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def list(self, prefix: str, suffix: str = ".parquet") -> list:
+        """Sorted keys starting with `prefix` (may include a subdirectory)."""
+        subdir, name = os.path.split(prefix)
+        try:
+            entries = os.listdir(os.path.join(self.root, subdir))
+        except FileNotFoundError:
+            return []
+        return sorted(
+            os.path.join(subdir, e) for e in entries
+            if e.startswith(name) and e.endswith(suffix)
+        )
+
+    def read_parquet(self, key: str) -> pl.DataFrame:
+        return pl.read_parquet(self.uri(key))
+
+    def scan_parquet(self, key: str) -> pl.LazyFrame:
+        return pl.scan_parquet(self.uri(key))
+
+    def parquet_metadata(self, key: str) -> dict:
+        """Custom key-value metadata of a Parquet file (footer read only)."""
+        return pl.read_parquet_metadata(self.uri(key))
+
+    def write_parquet(self, key: str, df: pl.DataFrame, metadata: dict = None):
+        """Write-then-rename so readers never see a half-written file."""
+        path = self.uri(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        df.write_parquet(tmp, metadata=metadata)
+        os.replace(tmp, path)
+
+    def publish(self, key: str, path: str):
+        """Move a finished local file into place under `key` (atomic on one filesystem)."""
+        target = self.uri(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.uri(key))
+        except FileNotFoundError:
+            pass
+
+
+# ============================================================
+#                 S3-COMPATIBLE OBJECT STORE
+# ============================================================
+class S3Backend:
+    """
+    Objects in an S3 bucket (AWS, MinIO, or any S3-compatible endpoint).
+    Object puts are atomic, so no temp-file dance is needed.
+    """
+
+    def __init__(self, bucket: str, root: str = "", endpoint_url: str = None):
+        try:
+            import boto3
+        except ImportError as e:
+            raise ImportError("S3 storage requires boto3: pip install boto3") from e
+
+        self.bucket = bucket
+        self.root = root.strip("/")
+        self.endpoint_url = endpoint_url
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.root}/{key}" if self.root else key
+
+    def uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._key(key)}"
+
+    def list(self, prefix: str, suffix: str = ".parquet") -> list:
+        keys = []
+        strip = len(self.root) + 1 if self.root else 0
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for obj in page.get("Contents", []):
+                if obj["Key"].endswith(suffix):
+                    keys.append(obj["Key"][strip:])
+        return sorted(keys)
+
+    def read_parquet(self, key: str) -> pl.DataFrame:
+        obj = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        return pl.read_parquet(io.BytesIO(obj["Body"].read()))
+
+    def _storage_options(self):
+        options = None
+        if self.endpoint_url:
+            options = {"aws_endpoint_url": self.endpoint_url}
+            if self.endpoint_url.startswith("http://"):
+                options["aws_allow_http"] = "true"  # local MinIO-style stand-ins
+        return options
+
+    def scan_parquet(self, key: str) -> pl.LazyFrame:
+        return pl.scan_parquet(self.uri(key), storage_options=self._storage_options())
+
+    def parquet_metadata(self, key: str) -> dict:
+        """Custom key-value metadata of a Parquet file (ranged footer read)."""
+        return pl.read_parquet_metadata(self.uri(key), storage_options=self._storage_options())
+
+    def write_parquet(self, key: str, df: pl.DataFrame, metadata: dict = None):
+        buf = io.BytesIO()
+        df.write_parquet(buf, metadata=metadata)
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=buf.getvalue())
+
+    def publish(self, key: str, path: str):
+        """Upload a finished local file as `key`, then remove the local copy."""
+        self.client.upload_file(path, self.bucket, self._key(key))
+        os.remove(path)
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+
+# ============================================================
+#                 BACKEND FACTORY
+# ============================================================
+def make_backend(kind: str = None, root: str = None, tier: str = "hot"):
+    """Build a backend from arguments, falling back to the tier's environment."""
+    kind_var, root_var, default_root = TIER_ENV[tier]
+    kind = kind or os.environ.get(kind_var, "local")
+    root = root or os.environ.get(root_var)
+
+    if kind == "local":
+        return LocalBackend(root or default_root)
+    if kind == "tmpfs":
+        return LocalBackend(root or os.path.join(DEFAULT_TMPFS_ROOT, tier))
+    if kind == "s3":
+        return S3Backend(
+            bucket=os.environ["CRYPTO_S3_BUCKET"],
+            root=root or ("raw" if tier == "hot" else tier),
+            endpoint_url=os.environ.get("CRYPTO_S3_ENDPOINT"),
+        )
+    raise ValueError(f"Unknown storage backend: {kind!r}")
+
+
+_STORAGE = {}
+
+
+def get_storage(tier: str = "hot"):
+    """Process-wide configured backend for a tier ("hot" or "cold")."""
+    if tier not in _STORAGE:
+        _STORAGE[tier] = make_backend(tier=tier)
+    return _STORAGE[tier]
+
+
+def set_storage(backend, tier: str = "hot"):
+    """Swap a tier's backend (e.g. a tmpfs root or a local S3 stand-in)."""
+    _STORAGE[tier] = backend
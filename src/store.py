@@ -1,16 +1,218 @@
+import itertools
 import os
+import socket
+import sys
 import polars as pl
 import time
 
-# Determine absolute path of project root
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
+# Allow ingest scripts (run from src/) to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.storage import IPC_SUFFIX, get_storage
+
+# Unique per ingest process, so redundant (HA) ingesters and quick
+# successive flushes never overwrite each other's files.
+WRITER_ID = os.environ.get("INGEST_WRITER_ID", f"{socket.gethostname()}-{os.getpid()}")
+_SEQ = itertools.count()
+
+# How ingesters persist trades/depth micro-batches:
+#   parquet  one Parquet file per flush (default)
+#   arrow    append to an hourly Arrow IPC stream file per stream; readers
+#            memory-map it, compaction later rewrites closed hours as Parquet
+#   rolling  append each flush as a row group to one open Parquet file per
+#            stream, sealed and published every PARQUET_ROLL_SECONDS
+WRITER_MODE = os.environ.get("INGEST_WRITER_MODE", "parquet")
+_STREAM_WRITERS = {}
+
+
+def write_batch(df: pl.DataFrame, prefix="trades"):
+    """Persist one ingest micro-batch using the configured writer mode."""
+    if WRITER_MODE in ("arrow", "rolling"):
+        writer = _STREAM_WRITERS.get(prefix)
+        if writer is None:
+            # pyarrow only in the stream modes
+            if WRITER_MODE == "arrow":
+                from src.arrow_stream import HourlyIpcWriter as writer_class
+            else:
+                from src.parquet_stream import RollingParquetWriter as writer_class
+            writer = _STREAM_WRITERS[prefix] = writer_class(get_storage(), prefix, WRITER_ID)
+        writer.write(df)
+        print(f"Appended {len(df)} rows → {prefix} stream")
+    else:
+        write_parquet_batch(df, prefix)
+
+
+def seal_due_writers():
+    """Seal stream files whose roll period has ended (call on a timer)."""
+    for writer in _STREAM_WRITERS.values():
+        if hasattr(writer, "seal_if_due"):
+            writer.seal_if_due()
+
+
+def close_writers():
+    """Seal open stream files (call on ingester shutdown)."""
+    for writer in _STREAM_WRITERS.values():
+        writer.close()
+    _STREAM_WRITERS.clear()
 
-os.makedirs(DATA_DIR, exist_ok=True)
 
 def write_parquet_batch(df: pl.DataFrame, prefix="trades"):
     ts = int(time.time())
-    filename = os.path.join(DATA_DIR, f"{prefix}_{ts}.parquet")
-    df.write_parquet(filename)
-    print(f"Wrote {len(df)} rows → {filename}")
+    key = f"{prefix}_{ts}_{WRITER_ID}-{next(_SEQ)}.parquet"
+
+    storage = get_storage()
+    storage.write_parquet(key, df)
+    print(f"Wrote {len(df)} rows → {storage.uri(key)}")
+
+
+# ============================================================
+#          FILE-NAME TIME INDEX
+# ============================================================
+COMPACT_BUCKET_SECONDS = 3600  # span of one `<prefix>_<hour>_compacted` file
+# Footer key holding "<min_ms>,<max_ms>" of a compacted file's rows. Its
+# name only bounds rows from above (backfilled rows can be hours older).
+TIME_RANGE_METADATA = "crypto.time_range_ms"
+
+
+def file_timestamp(path: str) -> int:
+    """Unix seconds encoded in `<prefix>_<ts>[_...].parquet`."""
+    name = os.path.basename(path)
+    return int(name.split("_")[1].split(".")[0])
+
+
+def file_end_time(path: str) -> int:
+    """
+    Upper bound (unix seconds) on the rows in a file. Batch files are named
+    by write time (rows are older); compacted and stream files cover a
+    whole bucket.
+    """
+    end = file_timestamp(path) + 1
+    if is_bucket_file(path):
+        end += COMPACT_BUCKET_SECONDS
+    return end
+
+
+def is_bucket_file(path: str) -> bool:
+    """
+    Compacted and stream files hold rows written during the bucket starting
+    at their timestamp (backfilled rows among them can be older).
+    """
+    return path.endswith("_compacted.parquet") or path.endswith(IPC_SUFFIX)
+
+
+def file_may_contain(path: str, since_ms: int = None) -> bool:
+    """
+    Whether a file can hold rows at/after `since_ms`, from its name. Names
+    give no lower bound (backfilled rows can be arbitrarily old).
+    """
+    return since_ms is None or file_end_time(path) * 1000 >= since_ms
+
+
+def recorded_time_range(storage, key: str):
+    """(min_ms, max_ms) of a compacted file's rows from its footer, or None if not recorded."""
+    if not key.endswith("_compacted.parquet"):
+        return None
+    try:
+        value = storage.parquet_metadata(key).get(TIME_RANGE_METADATA)
+    except (OSError, pl.exceptions.PolarsError):
+        return None
+    return tuple(int(v) for v in value.split(",")) if value else None
+
+
+def time_range_metadata(df: pl.DataFrame, time_col: str) -> dict:
+    """Footer metadata recording the time span of `df` (see `recorded_time_range`)."""
+    if df.height == 0:
+        return None
+    return {TIME_RANGE_METADATA: f"{df[time_col].min()},{df[time_col].max()}"}
+
+
+def file_starts_before(storage, key: str, until_ms: int) -> bool:
+    """Whether a file can hold rows at/before `until_ms`."""
+    if file_timestamp(key) * 1000 <= until_ms:
+        return True
+    recorded = recorded_time_range(storage, key)
+    return recorded is None or recorded[0] <= until_ms
+
+
+# ============================================================
+#          DATASET READS (SHARED BY ALL LOADERS)
+# ============================================================
+def list_batches(prefix: str, since_ms: int = None, tier: str = "hot",
+                 until_ms: int = None) -> list:
+    """
+    Keys of one dataset (`<prefix>_*.parquet` and live `.arrows` streams),
+    optionally time-pruned.
+    """
+    storage = get_storage(tier)
+    keys = storage.list(f"{prefix}_") + storage.list(f"{prefix}_", suffix=IPC_SUFFIX)
+    if since_ms is not None:
+        keys = [k for k in keys if file_may_contain(k, since_ms)]
+    if until_ms is not None:
+        keys = [k for k in keys if file_starts_before(storage, k, until_ms)]
+    return keys
+
+
+def dataset_version(prefix: str, tier: str = "hot") -> tuple:
+    """
+    Cheap change token for a dataset (file listing only, no reads): file
+    count, newest key, and the size of live stream files, which grow in place.
+    """
+    keys = list_batches(prefix, tier=tier)
+    storage = get_storage(tier)
+
+    streams = []
+    for k in keys:
+        if k.endswith(IPC_SUFFIX):
+            try:
+                streams.append((k, os.path.getsize(storage.uri(k))))
+            except OSError:
+                pass
+    return len(keys), max(keys, default=None), tuple(sorted(streams))
+
+
+def read_batches(prefix: str, since_ms: int = None, tier: str = "hot"):
+    """
+    Concatenate a dataset from the configured storage backend.
+    Diagonal concat: older files may lack newer columns.
+    """
+    keys = list_batches(prefix, since_ms, tier)
+    if not keys:
+        return None
+
+    storage = get_storage(tier)
+    return pl.concat([read_key(storage, k) for k in keys], how="diagonal_relaxed")
+
+
+def scan_keys(keys: list, tier: str = "hot"):
+    """
+    Lazy union of dataset files: Parquet files are scanned (projection and
+    predicate pushdown down to row groups), stream files are read as-is.
+    """
+    if not keys:
+        return None
+
+    storage = get_storage(tier)
+    frames = [
+        read_key(storage, k).lazy() if k.endswith(IPC_SUFFIX) else storage.scan_parquet(k)
+        for k in keys
+    ]
+    return pl.concat(frames, how="diagonal_relaxed")
+
+
+def read_key(storage, key: str) -> pl.DataFrame:
+    """Read one Parquet file or (memory-mapped, incrementally) one stream file."""
+    if key.endswith(IPC_SUFFIX):
+        from src.arrow_stream import read_ipc_stream
+        df = read_ipc_stream(storage.uri(key))
+        return df if df is not None else pl.DataFrame()
+    return storage.read_parquet(key)
+
 
+def record_gaps(gaps: list):
+    """
+    Persist detected data gaps (one row per missing interval) next to the
+    raw data, so loaders and reports can tell missing data from quiet markets.
+    """
+    if not gaps:
+        return
+    write_parquet_batch(pl.DataFrame(gaps), prefix="gaps")
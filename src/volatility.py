@@ -0,0 +1,203 @@
+import math
+import os
+import sys
+import polars as pl
+
+# Allow `python src/volatility.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ============================================================
+#                 ESTIMATOR SETTINGS
+# ============================================================
+SAMPLE_MS = 1_000              # return sampling interval (calendar time)
+EWMA_HALFLIFE_SECONDS = 30
+BIPOWER_SCALE = math.pi / 2    # E|Z|^-2 for standard normal Z
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+# ============================================================
+#                 TIME-SAMPLED RETURNS
+# ============================================================
+def sample_prices(trades: pl.DataFrame, every_ms: int = SAMPLE_MS,
+                  since_ms: int = None, until_ms: int = None) -> pl.DataFrame:
+    """
+    Last trade price per `every_ms` bucket on a regular grid (empty buckets
+    carry the previous price). Sampling in calendar time removes the
+    trade-frequency bias of tick returns. Only trades in the window are read.
+    """
+    if since_ms is not None:
+        trades = trades.filter(pl.col("trade_time") >= since_ms)
+    if until_ms is not None:
+        trades = trades.filter(pl.col("trade_time") < until_ms)
+    if trades.height == 0:
+        return pl.DataFrame(schema={"ts": pl.Int64, "price": pl.Float64})
+
+    last = (
+        trades.group_by((pl.col("trade_time") // every_ms * every_ms).alias("ts"))
+        .agg(pl.col("price").sort_by("trade_time").last())
+    )
+    grid = pl.DataFrame({
+        "ts": pl.int_range(last["ts"].min(), last["ts"].max() + every_ms, every_ms, eager=True)
+    })
+    return grid.join(last, on="ts", how="left").sort("ts").with_columns(pl.col("price").forward_fill())
+
+
+def log_returns(prices: pl.DataFrame) -> pl.DataFrame:
+    """(ts, ret) log returns between consecutive samples."""
+    return prices.select("ts", pl.col("price").log().diff().alias("ret")).drop_nulls()
+
+
+# ============================================================
+#                 RETURN-BASED ESTIMATORS
+# ============================================================
+def realized_variance(returns: pl.Series) -> float:
+    """Sum of squared returns over the window."""
+    return float((returns ** 2).sum())
+
+
+def bipower_variation(returns: pl.Series) -> float:
+    """
+    (pi/2) * sum |r_t| |r_t-1|: the diffusive part of realized variance,
+    robust to isolated jumps (RV - BV estimates the jump contribution).
+    """
+    a = returns.abs()
+    return float(BIPOWER_SCALE * (a * a.shift(1)).sum())
+
+
+def ewma_variance(returns: pl.Series, halflife_seconds: float = EWMA_HALFLIFE_SECONDS,
+                  every_ms: int = SAMPLE_MS) -> pl.Series:
+    """EWMA of squared returns, per sample (vectorized, for backtests)."""
+    return (returns ** 2).ewm_mean(half_life=halflife_seconds * 1000 / every_ms, adjust=False)
+
+
+def realized_volatility(trades: pl.DataFrame, window_seconds: int = 60,
+                        every_ms: int = SAMPLE_MS, now_ms: int = None):
+    """
+    sqrt(realized variance) of `every_ms` log returns over the trailing
+    window ending at `now_ms` (default: latest trade). None when the window
+    holds fewer than two samples.
+    """
+    if trades is None or trades.height == 0:
+        return None
+    now_ms = trades["trade_time"].max() if now_ms is None else now_ms
+    # one extra sample before the window provides the first return
+    prices = sample_prices(trades, every_ms, now_ms - window_seconds * 1000 - every_ms, now_ms + 1)
+    rets = log_returns(prices)["ret"]
+    if rets.len() == 0:
+        return None
+    return math.sqrt(realized_variance(rets))
+
+
+def annualize(vol: float, horizon_seconds: float) -> float:
+    """Scale a volatility measured over `horizon_seconds` to one year."""
+    return vol * math.sqrt(SECONDS_PER_YEAR / horizon_seconds)
+
+
+# ============================================================
+#                 RANGE-BASED ESTIMATORS (OHLC BARS)
+# ============================================================
+def parkinson_variance() -> pl.Expr:
+    """Per-bar Parkinson variance from high/low: ln(H/L)^2 / (4 ln 2)."""
+    return (pl.col("high") / pl.col("low")).log() ** 2 / (4 * math.log(2))
+
+
+def garman_klass_variance() -> pl.Expr:
+    """Per-bar Garman-Klass variance: 0.5 ln(H/L)^2 - (2 ln 2 - 1) ln(C/O)^2."""
+    return (
+        0.5 * (pl.col("high") / pl.col("low")).log() ** 2
+        - (2 * math.log(2) - 1) * (pl.col("close") / pl.col("open")).log() ** 2
+    )
+
+
+def bar_volatility(bars: pl.DataFrame, estimator: str = "garman_klass"):
+    """
+    Volatility over all given bars (sum of per-bar variances): the bar
+    analogue of realized volatility. Use `load_bars(res, since_ms)` to
+    select the window.
+    """
+    if bars is None or bars.height == 0:
+        return None
+    expr = {"parkinson": parkinson_variance, "garman_klass": garman_klass_variance}[estimator]()
+    return math.sqrt(max(float(bars.select(expr.sum()).item()), 0.0))
+
+
+# ============================================================
+#                 ROLLING SERIES (BACKTESTS)
+# ============================================================
+def volatility_series(trades: pl.DataFrame, window_seconds: int = 60,
+                      every_ms: int = SAMPLE_MS,
+                      halflife_seconds: float = EWMA_HALFLIFE_SECONDS) -> pl.DataFrame:
+    """
+    Per-sample rolling realized volatility, bipower volatility and EWMA
+    volatility (all per `window_seconds` horizon), column-wise over the
+    whole history.
+    """
+    n = max(int(window_seconds * 1000 // every_ms), 1)
+    rets = log_returns(sample_prices(trades, every_ms))
+    a = pl.col("ret").abs()
+
+    return rets.with_columns(
+        (pl.col("ret") ** 2).rolling_sum(n).sqrt().alias("realized_vol"),
+        (BIPOWER_SCALE * (a * a.shift(1)).rolling_sum(n)).sqrt().alias("bipower_vol"),
+        (ewma_variance(pl.col("ret"), halflife_seconds, every_ms) * n).sqrt().alias("ewma_vol"),
+    )
+
+
+# ============================================================
+#                 INCREMENTAL EWMA (LIVE)
+# ============================================================
+class EwmaVolatility:
+    """
+    Live EWMA volatility fed trade by trade: prices are sampled on the
+    same `every_ms` grid as the batch estimators, and each completed
+    sample updates the variance in O(1). Empty samples count as zero
+    returns, matching the forward-filled batch grid.
+    """
+
+    def __init__(self, halflife_seconds: float = EWMA_HALFLIFE_SECONDS,
+                 every_ms: int = SAMPLE_MS):
+        self.every_ms = every_ms
+        self.alpha = 1 - 0.5 ** (every_ms / (halflife_seconds * 1000))
+        self.variance = None
+        self._bucket = None
+        self._last_price = None     # last price of the current bucket
+        self._prev_close = None     # close of the previous bucket
+
+    def update(self, trade_time: int, price: float):
+        bucket = trade_time // self.every_ms
+        if self._bucket is not None and bucket > self._bucket:
+            self._close_buckets(bucket)
+        self._bucket = bucket
+        self._last_price = price
+
+    def _close_buckets(self, bucket: int):
+        if self._prev_close is not None:
+            r2 = math.log(self._last_price / self._prev_close) ** 2
+            self.variance = r2 if self.variance is None else (
+                self.alpha * r2 + (1 - self.alpha) * self.variance
+            )
+            # skipped buckets are zero returns
+            if self.variance is not None:
+                self.variance *= (1 - self.alpha) ** (bucket - self._bucket - 1)
+        self._prev_close = self._last_price
+
+    def volatility(self, horizon_seconds: float = None):
+        """Per-sample volatility, or scaled to `horizon_seconds`."""
+        if self.variance is None:
+            return None
+        scale = 1 if horizon_seconds is None else horizon_seconds * 1000 / self.every_ms
+        return math.sqrt(self.variance * scale)
+
+
+if __name__ == "__main__":
+    from src.bars import load_bars
+    from src.process import load_all_trades
+
+    trades = load_all_trades()
+    if trades is None:
+        print("No trades found.")
+    else:
+        for w in (60, 300):
+            print(f"realized vol {w}s:", realized_volatility(trades, w))
+        print(volatility_series(trades).tail())
+        print("garman-klass (1m bars):", bar_volatility(load_bars("1m")))
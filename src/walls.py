@@ -0,0 +1,293 @@
+import os
+import sys
+import threading
+import time
+from statistics import median
+
+import polars as pl
+
+# Allow `python src/walls.py` to import sibling modules as `src.*`
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.process_depth import load_depth
+
+# ============================================================
+#                 WALL / SPOOFING SETTINGS
+# ============================================================
+# A level is "large" in a snapshot when its size is at least
+# WALL_MULTIPLE x the median level size of that snapshot (both sides) and
+# at least WALL_MIN_SIZE. An episode is a run of consecutive snapshots in
+# which one (side, price) level stays large. It ends in one of:
+#
+#   filled       the touch level shrank, or price moved through the level
+#   out_of_view  the book moved away and the level fell out of the top 5
+#   pull         the size was removed while the level is still in view
+#   fleeting     a pull within FLEETING_MS of the level turning large
+#                (flash orders: the spoofing pattern)
+#
+# An episode that stays large for WALL_MIN_MS is a persistent wall.
+WALL_MULTIPLE = float(os.environ.get("WALL_MULTIPLE", 10))
+WALL_MIN_SIZE = float(os.environ.get("WALL_MIN_SIZE", 1.0))    # base asset (BTC)
+WALL_MIN_MS = int(os.environ.get("WALL_MIN_MS", 10_000))
+FLEETING_MS = int(os.environ.get("FLEETING_MS", 1_000))
+LEVEL_TTL_MS = 60_000       # forget levels not seen in the book this long
+RECENT_EVENTS = 50
+
+EVENTS = ("wall", "pull", "fleeting")   # outcomes worth surfacing
+
+
+def _outcome(side: str, price: float, at_touch: bool, duration_ms: int, fleeting_ms: int,
+             best_bid: float, best_ask: float, low_bid: float, high_ask: float) -> str:
+    """How an episode ended, judged against the first snapshot where it is no longer large."""
+    if side == "bid":
+        through, out = best_bid < price, price < low_bid
+    else:
+        through, out = best_ask > price, price > high_ask
+    if through or at_touch:
+        return "filled"
+    if out:
+        return "out_of_view"
+    return "fleeting" if duration_ms < fleeting_ms else "pull"
+
+
+# ============================================================
+#          INCREMENTAL DETECTOR (ONE SNAPSHOT AT A TIME)
+# ============================================================
+class WallDetector:
+    """
+    Per-level state keyed by (side, price): last size and time seen, plus
+    the open large-size episode (start, peak, wall flag, touch). `update`
+    costs O(levels in the snapshot + open episodes); levels that left the
+    book are evicted after LEVEL_TTL_MS.
+    """
+
+    def __init__(self, multiple: float = WALL_MULTIPLE, min_size: float = WALL_MIN_SIZE,
+                 wall_ms: int = WALL_MIN_MS, fleeting_ms: int = FLEETING_MS):
+        self.multiple = multiple
+        self.min_size = min_size
+        self.wall_ms = wall_ms
+        self.fleeting_ms = fleeting_ms
+        self.levels = {}        # (side, price) → [size, last_seen]
+        self.open = {}          # (side, price) → [since, last_large, peak, is_wall, at_touch]
+        self.recent = []        # latest wall / pull / fleeting events
+        self.counts = dict.fromkeys(("wall", "pull", "fleeting", "filled", "out_of_view"), 0)
+        self.last_ts = None
+        self._next_evict = None
+
+    def update(self, ts: int, bids: list, asks: list) -> list:
+        """Consume one depth snapshot ([price, size] levels, best first); returns new events."""
+        book = [("bid", float(p), float(s), i) for i, (p, s) in enumerate(bids)]
+        book += [("ask", float(p), float(s), i) for i, (p, s) in enumerate(asks)]
+        if not book:
+            return []
+        threshold = max(self.multiple * median(s for _, _, s, _ in book), self.min_size)
+
+        large = {}
+        for side, price, size, rank in book:
+            self.levels[(side, price)] = [size, ts]
+            if size >= threshold:
+                large[(side, price)] = (size, rank == 0)
+
+        events = []
+        for key in [k for k in self.open if k not in large]:
+            since, last_large, peak, is_wall, at_touch = self.open.pop(key)
+            outcome = _outcome(
+                key[0], key[1], at_touch, last_large - since, self.fleeting_ms,
+                float(bids[0][0]) if bids else float("-inf"),
+                float(asks[0][0]) if asks else float("inf"),
+                float(bids[-1][0]) if bids else float("inf"),
+                float(asks[-1][0]) if asks else float("-inf"),
+            )
+            self.counts[outcome] += 1
+            if outcome in EVENTS:
+                events.append(self._event(outcome, key, ts, peak, last_large - since))
+
+        for key, (size, at_touch) in large.items():
+            episode = self.open.get(key)
+            if episode is None:
+                self.open[key] = episode = [ts, ts, size, False, at_touch]
+            else:
+                episode[1], episode[2], episode[4] = ts, max(episode[2], size), at_touch
+            if not episode[3] and ts - episode[0] >= self.wall_ms:
+                episode[3] = True
+                self.counts["wall"] += 1
+                events.append(self._event("wall", key, ts, episode[2], ts - episode[0]))
+
+        if self._next_evict is None or ts >= self._next_evict:
+            self._evict(ts)
+        self.last_ts = ts
+        if events:
+            self.recent = (self.recent + events)[-RECENT_EVENTS:]
+        return events
+
+    def _evict(self, ts: int):
+        cutoff = ts - LEVEL_TTL_MS
+        self.levels = {k: v for k, v in self.levels.items() if v[1] >= cutoff}
+        self._next_evict = ts + LEVEL_TTL_MS // 4
+
+    @staticmethod
+    def _event(kind: str, key: tuple, ts: int, size: float, age_ms: int) -> dict:
+        return {"event": kind, "side": key[0], "price": key[1], "size": size,
+                "age_ms": age_ms, "ts": ts}
+
+    def run(self, depth: pl.DataFrame) -> list:
+        """Feed snapshots newer than the last one consumed, in order."""
+        if self.last_ts is not None:
+            depth = depth.filter(pl.col("event_time") > self.last_ts)
+        events = []
+        for ts, bids, asks in depth.select("event_time", "bids", "asks").iter_rows():
+            events += self.update(ts, bids, asks)
+        return events
+
+    def walls(self) -> list:
+        """Open episodes that have persisted long enough to count as walls."""
+        return [
+            {"side": side, "price": price, "size": self.levels[(side, price)][0],
+             "peak": peak, "age_ms": last_large - since}
+            for (side, price), (since, last_large, peak, is_wall, _) in self.open.items() if is_wall
+        ]
+
+
+# ============================================================
+#          SHARED, INCREMENTALLY REFRESHED DETECTOR
+# ============================================================
+_DETECTOR = None
+_LOCK = threading.Lock()
+
+
+def refresh_wall_detector(warmup_seconds: int = 600) -> dict:
+    """
+    Process-wide detector (shared by all dashboard sessions). Each call
+    reads only depth files newer than the last snapshot consumed.
+    Returns {"walls": open walls, "events": recent pulls/fleeting/walls, "counts"}.
+    """
+    global _DETECTOR
+    with _LOCK:
+        if _DETECTOR is None:
+            _DETECTOR = WallDetector()
+        if _DETECTOR.last_ts is None:
+            since_ms = int(time.time() * 1000) - warmup_seconds * 1000
+        else:
+            since_ms = _DETECTOR.last_ts + 1
+
+        depth = load_depth(since_ms=since_ms)
+        if depth is not None:
+            _DETECTOR.run(depth)
+        return {"walls": _DETECTOR.walls(), "events": list(_DETECTOR.recent),
+                "counts": dict(_DETECTOR.counts)}
+
+
+# ============================================================
+#          BATCH DETECTOR (VECTORIZED OVER THE ARCHIVE)
+# ============================================================
+def level_table(depth: pl.DataFrame) -> pl.DataFrame:
+    """One row per (snapshot, side, level): snap, event_time, side, rank, price, size."""
+    snaps = depth.sort("event_time").select("event_time", "bids", "asks").with_row_index("snap")
+
+    def side(name: str, label: str) -> pl.DataFrame:
+        return (
+            snaps.select("snap", "event_time", name)
+            .explode(name).drop_nulls(name)
+            .select(
+                "snap", "event_time",
+                pl.lit(label).alias("side"),
+                pl.int_range(pl.len()).over("snap").cast(pl.Int32).alias("rank"),
+                pl.col(name).list.get(0).cast(pl.Float64).alias("price"),
+                pl.col(name).list.get(1).cast(pl.Float64).alias("size"),
+            )
+        )
+
+    return pl.concat([side("bids", "bid"), side("asks", "ask")])
+
+
+def detect_walls(depth: pl.DataFrame, multiple: float = WALL_MULTIPLE, min_size: float = WALL_MIN_SIZE,
+                 wall_ms: int = WALL_MIN_MS, fleeting_ms: int = FLEETING_MS) -> pl.DataFrame:
+    """
+    Every large-level episode in `depth`, with the same rules as
+    `WallDetector`, computed column-wise:
+        side | price | start | end | duration_ms | peak_size | is_wall | outcome
+    `end` is the last snapshot it was large; `outcome` is null while open.
+    """
+    levels = level_table(depth)
+    threshold = pl.max_horizontal(multiple * pl.col("size").median().over("snap"), pl.lit(min_size))
+
+    # per-snapshot view of the book, to classify how each episode ended
+    book = levels.group_by("snap").agg(
+        pl.col("price").filter((pl.col("side") == "bid") & (pl.col("rank") == 0)).first().alias("best_bid"),
+        pl.col("price").filter((pl.col("side") == "ask") & (pl.col("rank") == 0)).first().alias("best_ask"),
+        pl.col("price").filter(pl.col("side") == "bid").min().alias("low_bid"),
+        pl.col("price").filter(pl.col("side") == "ask").max().alias("high_ask"),
+    )
+    last_snap = levels["snap"].max()
+
+    large = (
+        levels.filter(pl.col("size") >= threshold)
+        .sort("side", "price", "snap")
+        .with_columns(
+            ((pl.col("snap") != pl.col("snap").shift(1) + 1)
+             | (pl.col("side") != pl.col("side").shift(1))
+             | (pl.col("price") != pl.col("price").shift(1)))
+            .fill_null(True).cum_sum().alias("episode")
+        )
+    )
+    episodes = (
+        large.group_by("episode")
+        .agg(
+            pl.col("side").first(), pl.col("price").first(),
+            pl.col("event_time").first().alias("start"),
+            pl.col("event_time").last().alias("end"),
+            pl.col("size").max().alias("peak_size"),
+            (pl.col("rank").last() == 0).alias("at_touch"),
+            (pl.col("snap").last() + 1).alias("snap"),
+        )
+        .with_columns((pl.col("end") - pl.col("start")).alias("duration_ms"))
+        .join(book, on="snap", how="left")
+    )
+
+    bid = pl.col("side") == "bid"
+    through = pl.when(bid).then(pl.col("best_bid") < pl.col("price")).otherwise(pl.col("best_ask") > pl.col("price"))
+    out = pl.when(bid).then(pl.col("price") < pl.col("low_bid")).otherwise(pl.col("price") > pl.col("high_ask"))
+    outcome = (
+        pl.when(pl.col("snap") > last_snap).then(None)
+        .when(through | pl.col("at_touch")).then(pl.lit("filled"))
+        .when(out).then(pl.lit("out_of_view"))
+        .when(pl.col("duration_ms") < fleeting_ms).then(pl.lit("fleeting"))
+        .otherwise(pl.lit("pull"))
+    )
+    return episodes.select(
+        "side", "price",
+        pl.col("start").cast(pl.Datetime("ms")),
+        pl.col("end").cast(pl.Datetime("ms")),
+        "duration_ms", "peak_size",
+        (pl.col("duration_ms") >= wall_ms).alias("is_wall"),
+        outcome.alias("outcome"),
+    ).sort("start")
+
+
+def wall_summary(episodes: pl.DataFrame) -> dict:
+    """Episode counts per outcome, plus persistent walls."""
+    counts = dict(episodes.group_by("outcome").len().iter_rows())
+    return {"episodes": episodes.height, "walls": int(episodes["is_wall"].sum()),
+            **{k: counts.get(k, 0) for k in ("pull", "fleeting", "filled", "out_of_view")},
+            "open": counts.get(None, 0)}
+
+
+if __name__ == "__main__":
+    depth = load_depth()
+    if depth is None:
+        print("No depth data found.")
+    else:
+        started = time.perf_counter()
+        episodes = detect_walls(depth)
+        batch_s = time.perf_counter() - started
+        print(f"Batch: {depth.height} snapshots in {batch_s * 1000:.0f}ms → {wall_summary(episodes)}")
+
+        detector = WallDetector()
+        started = time.perf_counter()
+        detector.run(depth)
+        per_snap = (time.perf_counter() - started) / depth.height * 1e6
+        print(f"Incremental: {per_snap:.1f} µs/snapshot → {detector.counts}, "
+              f"{len(detector.levels)} tracked levels, {len(detector.walls())} open walls")
+
+        print("\nLatest pulls / fleeting orders:")
+        print(episodes.filter(pl.col("outcome").is_in(["pull", "fleeting"])).tail(10))
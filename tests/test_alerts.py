@@ -0,0 +1,18 @@
+import pytest
+
+from src.alerts import ThresholdGroup
+
+
+@pytest.mark.parametrize("op, at_threshold, fires", [(">", 5.0, False), (">=", 5.0, True),
+                                                     ("<", 5.0, False), ("<=", 5.0, True)])
+def test_threshold_ops_at_the_threshold(op, at_threshold, fires):
+    group = ThresholdGroup([{"name": "r", "metric": "m", "threshold": 5.0, "op": op}])
+    events = group.update(0, at_threshold)
+    assert [state for _, state, _ in events] == (["firing"] if fires else [])
+
+
+def test_inclusive_threshold_clears_only_past_the_level():
+    group = ThresholdGroup([{"name": "r", "metric": "m", "threshold": 5.0, "op": ">="}])
+    assert [s for _, s, _ in group.update(0, 5.0)] == ["firing"]
+    assert group.update(1_000, 5.0) == []
+    assert [s for _, s, _ in group.update(2_000, 4.9)] == ["resolved"]
@@ -0,0 +1,80 @@
+import polars as pl
+import pytest
+
+from src import storage
+from src.bar_aggregator import BAR_COLUMNS, BarAggregator
+from src.bars import load_bars, write_bars
+from src.storage import LocalBackend
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    backend = LocalBackend(str(tmp_path))
+    monkeypatch.setitem(storage._STORAGE, "hot", backend)
+    return backend
+
+
+def test_late_trade_keeps_open_and_close_by_trade_time(store):
+    """A backfilled trade lands in the right bucket without taking over its open or close."""
+    agg = BarAggregator()
+    agg.add_trade(10_000, 100.0, 1.0, False)
+    agg.add_trade(50_000, 110.0, 1.0, False)
+    write_bars(agg.drain())                    # 1s bar at 10s closed
+
+    agg.add_trade(5_000, 90.0, 1.0, True)      # late: before the open of the minute
+    agg.add_trade(30_000, 95.0, 1.0, True)     # late: inside the minute
+    agg.add_trade(61_000, 120.0, 1.0, False)   # next minute closes the first one
+    write_bars(agg.drain(include_open=True))
+
+    bar = load_bars("1m").row(0, named=True)
+    assert (bar["open"], bar["high"], bar["low"], bar["close"]) == (90.0, 110.0, 90.0, 110.0)
+    assert (bar["first_trade_time"], bar["last_trade_time"]) == (5_000, 50_000)
+    assert bar["trades"] == 4
+
+    seconds = load_bars("1s")
+    assert seconds["bar_time"].to_list() == [5_000, 10_000, 30_000, 50_000, 61_000]
+
+
+def test_bars_written_before_trade_times_and_writer_tags_still_load(store):
+    legacy = [c for c in BAR_COLUMNS if not c.endswith("_trade_time")]
+    old = {"bar_time": 0, "open": 100.0, "high": 101.0, "low": 99.0, "close": 100.5, "volume": 1.0,
+           "quote_volume": 100.0, "buy_volume": 1.0, "sell_volume": 0.0, "trades": 3, "vwap": 100.0}
+    store.write_parquet("bars-1m_1_old-0.parquet", pl.DataFrame([old]).select(legacy))
+    correction = dict(old, open=98.0, high=98.0, low=98.0, close=98.0, trades=1, quote_volume=98.0)
+    store.write_parquet("bars-1m_2_old-1.parquet", pl.DataFrame([correction]).select(legacy))
+
+    # untagged parts count as one writer; without trade times, file order decides
+    bar = load_bars("1m").row(0, named=True)
+    assert (bar["open"], bar["high"], bar["low"], bar["close"], bar["trades"]) == (100.0, 101.0, 98.0, 98.0, 4)
+
+
+def write_session(monkeypatch, writer, trades):
+    monkeypatch.setattr("src.bars.WRITER_ID", writer)
+    agg = BarAggregator()
+    for t in trades:
+        agg.add_trade(*t)
+    write_bars(agg.drain(include_open=True))
+
+
+def test_redundant_writers_are_not_double_counted(store, monkeypatch):
+    trades = [(10_000, 100.0, 1.0, False), (20_000, 101.0, 2.0, True), (70_000, 102.0, 1.0, False)]
+    write_session(monkeypatch, "a", trades)
+    write_session(monkeypatch, "b", trades[1:])   # started late: misses the first trade
+
+    bars = load_bars("1m")
+    assert bars["volume"].to_list() == [3.0, 1.0]
+    assert bars["open"].to_list() == [100.0, 102.0]
+
+
+def test_compacted_bars_load_the_same(store, monkeypatch):
+    from src.compact import compact_bucket
+
+    write_session(monkeypatch, "a", [(10_000, 100.0, 1.0, False), (70_000, 102.0, 1.0, False)])
+    write_session(monkeypatch, "a", [(20_000, 99.0, 1.0, True)])       # correction bar
+    write_session(monkeypatch, "b", [(10_000, 100.0, 1.0, False), (70_000, 102.0, 1.0, False)])
+    before = load_bars("1m")
+
+    compact_bucket("bars-1m", 0, store.list("bars-1m_"))
+    assert len(store.list("bars-1m_")) == 1
+    assert load_bars("1m").equals(before)
+    assert before["volume"].to_list() == [2.0, 1.0]
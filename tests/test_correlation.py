@@ -0,0 +1,38 @@
+import numpy as np
+import polars as pl
+
+from src.correlation import GRACE_SECONDS, EWCrossCorrelation, observe_trades
+
+START_MS = 1_700_000_000_000
+
+
+def synthetic_trades(seconds=900, ticks=4, symbols=3):
+    """Common factor for every symbol; SYM1 copies SYM0's return with a 2s delay."""
+    rng = np.random.default_rng(0)
+    factor = rng.normal(0, 1e-4, seconds)
+    returns = 0.5 * factor[:, None] + rng.normal(0, 1e-4, (seconds, symbols))
+    returns[2:, 1] = returns[:-2, 0] + rng.normal(0, 2e-5, seconds - 2)
+    prices = 100 * np.exp(np.cumsum(returns, axis=0))
+
+    times = [START_MS + t * 1000 + k * (1000 // ticks) for t in range(seconds) for k in range(ticks)]
+    return {
+        f"SYM{i}": pl.DataFrame({"trade_time": times, "price": np.repeat(prices[:, i], ticks)})
+        for i in range(symbols)
+    }
+
+
+def test_lead_lag_is_recovered_from_per_symbol_frames():
+    trades = synthetic_trades()
+    corr = EWCrossCorrelation(list(trades))
+
+    # first half, then the rest: every symbol resumes after its own last tick
+    half = {s: df.head(df.height // 2) for s, df in trades.items()}
+    fed = observe_trades(corr, half) + observe_trades(corr, trades)
+    corr.advance(int(trades["SYM0"]["trade_time"][-1]) + (GRACE_SECONDS + 2) * 1000)
+
+    assert fed == sum(df.height for df in trades.values())
+    ll = corr.lead_lag()
+    assert ll["lag"][1, 0] == 2
+    assert ll["corr"][1, 0] > 0.9
+    assert 0.1 < corr.correlation()[0, 2] < 0.4
+    assert corr.features("SYM1")["lead_corr"] > 0.9
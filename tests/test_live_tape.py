@@ -0,0 +1,108 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from src import storage
+from src.live_tape import LiveTape, id_ranges, in_ranges, merge_ranges
+from src.storage import LocalBackend
+
+HOUR = 1_700_000_000 // 3600 * 3600
+
+
+def trade_rows(ids):
+    return pl.DataFrame({
+        "trade_id": ids,
+        "trade_time": [HOUR * 1000 + i for i in ids],
+        "price": [100.0] * len(ids),
+        "qty": [1.0] * len(ids),
+        "is_buyer_maker": [i % 2 == 0 for i in ids],
+    })
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    backend = LocalBackend(str(tmp_path))
+    monkeypatch.setitem(storage._STORAGE, "hot", backend)
+    return backend
+
+
+def test_backfilled_trades_below_the_newest_id_are_counted_once(store):
+    tape = LiveTape()
+    store.write_parquet(f"trades_{HOUR + 1}_w-0.parquet", trade_rows([1, 2, 3, 10]))
+    tape.refresh()
+    assert tape.totals["volume"] == 4
+
+    # gap 4..9 repaired by the REST backfill, written after trade 11 arrived
+    store.write_parquet(f"trades_{HOUR + 2}_w-1.parquet", trade_rows([4, 5, 6, 7, 8, 9, 11]))
+    tape.refresh()
+    assert tape.totals["volume"] == 11
+    assert tape.buy_sell_ratio()[:2] == (6, 5)
+    assert tape.trades["trade_id"].to_list() == list(range(1, 12))
+
+    # a redundant ingester's copy and a re-read of the same files add nothing
+    store.write_parquet(f"trades_{HOUR + 3}_v-0.parquet", trade_rows([9, 10, 11]))
+    tape.refresh()
+    assert tape.totals["volume"] == 11
+    assert tape.trades.height == 11
+
+
+def test_restored_tape_counts_only_trades_it_has_not_seen(store):
+    tape = LiveTape()
+    store.write_parquet(f"trades_{HOUR + 1}_w-0.parquet", trade_rows([1, 2, 5]))
+    tape.refresh()
+
+    restored = LiveTape()
+    restored.restore(tape.state())
+    store.write_parquet(f"trades_{HOUR + 2}_w-1.parquet", trade_rows([3, 4, 6]))
+    restored.refresh()
+    assert restored.totals["volume"] == 6
+
+
+def test_id_ranges():
+    runs = id_ranges([7, 1, 2, 3, 9, 8, 3])
+    assert runs.tolist() == [[1, 3], [7, 9]]
+    assert merge_ranges(runs, id_ranges([4, 5, 6, 12])).tolist() == [[1, 9], [12, 12]]
+    assert in_ranges(np.array([0, 1, 4, 9, 10]), runs).tolist() == [False, True, False, True, False]
+
+
+def test_bar_series_reads_each_bar_file_once_and_is_cached(store, monkeypatch):
+    import time
+
+    import src.live_tape
+    from src.bar_aggregator import BarAggregator
+    from src.bars import write_bars
+    from src.compact import compact_bucket
+    from src.store import file_timestamp
+
+    reads = []
+    read_key = src.live_tape.read_key
+    monkeypatch.setattr(src.live_tape, "read_key", lambda s, k: reads.append(k) or read_key(s, k))
+
+    base = (int(time.time()) // 60 - 30) * 60_000
+    agg = BarAggregator()
+    agg.add_trade(base + 1_000, 100.0, 1.0, False)
+    agg.add_trade(base + 61_000, 101.0, 1.0, False)
+    agg.add_trade(base + 62_000, 101.0, 1.0, False)   # closes the 1s bar, so the first minute
+    write_bars(agg.drain())
+    tape = LiveTape()
+    tape.refresh()
+    series = tape.bar_series()
+    assert series["price"].to_list() == [100.0]
+
+    tape.refresh()                             # nothing closed: no read, same frame
+    assert tape.bar_series() is series and len(reads) == 1
+
+    agg.add_trade(base + 121_000, 102.0, 1.0, False)
+    agg.add_trade(base + 122_000, 102.0, 1.0, False)
+    write_bars(agg.drain())
+    tape.refresh()
+    assert tape.bar_series()["price"].to_list() == [100.0, 101.0]
+    assert len(reads) == 2
+
+    # the compacted file replaces files already read: not read again
+    keys = store.list("bars-1m_")
+    compact_bucket("bars-1m", file_timestamp(keys[0]) // 3600 * 3600, keys)
+    tape.refresh()
+    assert tape.bar_keys == set(store.list("bars-1m_")) and len(tape.bar_keys) == 1
+    assert len(reads) == 2
+    assert tape.bar_series()["price"].to_list() == [100.0, 101.0]
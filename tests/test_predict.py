@@ -0,0 +1,18 @@
+import pytest
+
+from src.predict import predict_short_term_confidence
+
+
+@pytest.mark.parametrize("vol_1m", [None, 3e-4, 7.7e-4, 2e-3])
+def test_neutral_inputs_predict_neutral(vol_1m):
+    """A balanced book and flow must not turn into a directional call at any normal volatility."""
+    direction, confidence = predict_short_term_confidence(
+        microprice=90_000.0,
+        mid_price=90_000.0,
+        imbalance=0.0,
+        buy_sell_ratio=1.0,
+        spread=0.01,
+        volatility_1m=vol_1m,
+    )
+    assert direction == "NEUTRAL"
+    assert confidence < 5
@@ -0,0 +1,68 @@
+import polars as pl
+import pytest
+
+from src import storage
+from src.query import trades
+from src.storage import LocalBackend
+from src.store import list_batches
+
+HOUR = 1_700_000_000 // 3600 * 3600
+
+
+def trade_rows(ids):
+    return pl.DataFrame({
+        "trade_id": ids,
+        "trade_time": [HOUR * 1000 + i for i in ids],
+        "price": [100.0] * len(ids),
+        "qty": [1.0] * len(ids),
+        "is_buyer_maker": [False] * len(ids),
+    })
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    backend = LocalBackend(str(tmp_path))
+    monkeypatch.setitem(storage._STORAGE, "hot", backend)
+    return backend
+
+
+def test_trades_are_exactly_once_across_compacted_and_fresh_files(store):
+    store.write_parquet(f"trades_{HOUR}_compacted.parquet", trade_rows([1, 2, 3]))
+    # a backfill re-delivered trade 3 after the hour was compacted
+    store.write_parquet(f"trades_{HOUR + 3600}_compacted.parquet", trade_rows([3, 4]))
+    store.write_parquet(f"trades_{HOUR + 7300}_w-0.parquet", trade_rows([4, 5]))
+
+    assert trades()["trade_id"].to_list() == [1, 2, 3, 4, 5]
+
+
+def test_compacted_hour_with_backfilled_rows_is_not_pruned(store):
+    # compacted an hour later than its oldest (backfilled) rows
+    store.write_parquet(f"trades_{HOUR + 3600}_compacted.parquet", trade_rows([1, 2]))
+    assert trades(end=HOUR * 1000 + 2)["trade_id"].to_list() == [1]
+
+
+def test_compaction_records_the_row_time_range(store):
+    from src.compact import run_compaction
+
+    store.write_parquet(f"trades_{HOUR + 3600}_w-0.parquet", trade_rows([1, 2]))
+    store.write_parquet(f"trades_{HOUR + 10_800}_w-0.parquet", trade_rows([500_000]))
+    run_compaction(("trades",))
+
+    assert list_batches("trades", until_ms=HOUR * 1000 + 2) == [f"trades_{HOUR + 3600}_compacted.parquet"]
+    assert trades(end=HOUR * 1000 + 2)["trade_id"].to_list() == [1]
+    assert trades(start=HOUR * 1000 + 400_000, end=HOUR * 1000 + 600_000)["trade_id"].to_list() == [500_000]
+
+
+def test_time_range_is_pushed_into_the_scans_below_the_dedup(store):
+    from src.query import DEDUP_SLACK_MS, scan_trades
+
+    for k in range(3):
+        store.write_parquet(f"trades_{HOUR + k}_w-{k}.parquet", trade_rows([3 * k + 1, 3 * k + 2, 3 * k + 3]))
+    start, end = HOUR * 1000 + 4, HOUR * 1000 + 6
+
+    plan = scan_trades(start=start, end=end).explain()
+    scans = plan.count("Parquet SCAN")
+    selections = [line for line in plan.splitlines() if line.strip().startswith("SELECTION:")]
+    assert scans >= 3 and len(selections) == scans
+    assert all(f'col("trade_time") >= {start - DEDUP_SLACK_MS}' in line for line in selections)
+    assert trades(start=start, end=end)["trade_id"].to_list() == [4, 5]
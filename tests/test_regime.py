@@ -0,0 +1,14 @@
+import numpy as np
+
+from src.regime import GaussianHMM, RegimeFilter, smooth_observations
+
+
+def test_live_filter_matches_batch_filter():
+    rng = np.random.default_rng(0)
+    raw = np.column_stack([rng.normal(0, 0.3, 500), rng.normal(0, 0.2, 500)])
+    model = GaussianHMM()
+    model.fit(smooth_observations(raw), n_iter=5)
+
+    live = RegimeFilter(model)
+    probs = np.array([live.update(*row).copy() for row in raw])
+    np.testing.assert_allclose(probs, model.filter(smooth_observations(raw)), atol=1e-12)